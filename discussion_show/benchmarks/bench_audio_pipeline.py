@@ -0,0 +1,74 @@
+# Per-chunk latency of the old temp-file transcription prep vs the in-memory AudioPipeline.
+# Neither path calls Whisper; this measures decode -> VAD input -> upload body only.
+#
+# Usage (from discussion_show/): python benchmarks/bench_audio_pipeline.py [iterations]
+
+import os
+import sys
+import time
+import base64
+import tempfile
+import statistics
+import subprocess
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pydub import AudioSegment
+from ds.audio import AudioPipeline, FFMPEG_BINARY
+
+def make_chunk(seconds=8):
+    """Synthesize a recorder-like webm/opus chunk (~15 KB at 16 kbps)."""
+    command = [
+        FFMPEG_BINARY, "-hide_banner", "-loglevel", "error",
+        "-f", "lavfi", "-i", f"sine=frequency=220:duration={seconds}",
+        "-ac", "1", "-ar", "48000", "-c:a", "libopus", "-b:a", "16k", "-f", "webm", "pipe:1"
+    ]
+    webm = subprocess.run(command, stdout=subprocess.PIPE, check=True).stdout
+    return "data:audio/webm;base64," + base64.b64encode(webm).decode()
+
+def temp_file_prep(audio_blob_base64):
+    """The pre-pipeline path: three temp files and three ffmpeg runs."""
+    base64_data = audio_blob_base64.split(",", 1)[1]
+    audio_data = base64.b64decode(base64_data)
+    with tempfile.NamedTemporaryFile(suffix='.ogg', delete=False) as temp_ogg:
+        with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as temp_wav:
+            with tempfile.NamedTemporaryFile(delete=False) as temp_audio:
+                temp_audio.write(audio_data)
+                temp_audio.flush()
+                audio = AudioSegment.from_file(temp_audio.name, format="webm")
+                os.unlink(temp_audio.name)
+            audio.export(temp_wav.name, format='wav', parameters=["-acodec", "pcm_s16le", "-ac", "1", "-ar", "16000"])
+            with open(temp_wav.name, 'rb') as f:
+                f.read()
+            os.unlink(temp_wav.name)
+        audio.export(temp_ogg.name, format='ogg', parameters=["-q:a", "4"])
+        with open(temp_ogg.name, 'rb') as f:
+            upload = f.read()
+        os.unlink(temp_ogg.name)
+    return upload
+
+def in_memory_prep(pipeline, audio_blob_base64, format="ogg"):
+    audio = pipeline.decode(audio_blob_base64)
+    return pipeline.encode(audio, format)
+
+def measure(label, fn, iterations):
+    fn()  # warm up
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+    print(f"{label:<24} mean {statistics.mean(timings):8.1f} ms   p50 {statistics.median(timings):8.1f} ms   p95 {p95:8.1f} ms")
+    return statistics.mean(timings)
+
+if __name__ == "__main__":
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    chunk = make_chunk()
+    pipeline = AudioPipeline()
+    print(f"Chunk: {len(chunk)} base64 chars, {iterations} iterations")
+    before = measure("temp files (before)", lambda: temp_file_prep(chunk), iterations)
+    after = measure("in-memory ogg (after)", lambda: in_memory_prep(pipeline, chunk), iterations)
+    measure("in-memory wav (after)", lambda: in_memory_prep(pipeline, chunk, "wav"), iterations)
+    print(f"Speedup (ogg): {before / after:.2f}x")
@@ -0,0 +1,61 @@
+# End-to-end latency from a finished SDXL payload to an image URL the UI can show:
+# the old save_base64_image/show_image path (fsync plus two fixed 0.5 s sleeps)
+# vs the content-addressed ImageStore. Both run the save in a worker thread like run.io_bound.
+#
+# Usage (from discussion_show/): python benchmarks/bench_image_display.py [images]
+
+import os
+import sys
+import time
+import base64
+import asyncio
+import tempfile
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ds.fake_runpod import fake_image_data_url
+from ds.image_store import ImageStore
+
+async def old_display(images_dir, base64_data):
+    """The pre-change save_base64_image + show_image, minus the UI calls."""
+    def _save_image():
+        base64_data_clean = base64_data.split(',')[1] if ',' in base64_data else base64_data
+        filename = f"generated_{int(time.time())}.png"
+        filepath = os.path.join(images_dir, filename)
+        with open(filepath, 'wb') as f:
+            f.write(base64.b64decode(base64_data_clean))
+            f.flush()
+            os.fsync(f.fileno())
+        return f"/static/images/{filename}"
+
+    image_url = await asyncio.to_thread(_save_image)
+    await asyncio.sleep(0.5)
+    await asyncio.sleep(0.5)
+    return image_url
+
+async def new_display(store, base64_data):
+    return await asyncio.to_thread(store.save_base64, base64_data)
+
+async def measure(label, display, payloads):
+    latencies, urls = [], set()
+    for payload in payloads:
+        started = time.perf_counter()
+        urls.add(await display(payload))
+        latencies.append((time.perf_counter() - started) * 1000)
+    print(f"{label:<34} mean {statistics.mean(latencies):8.1f} ms   max {max(latencies):8.1f} ms   "
+          f"distinct files {len(urls)}/{len(payloads)}")
+
+async def main(images):
+    for size in (512, 1024):
+        payloads = [fake_image_data_url(size, size) for _ in range(images)]
+        print(f"{size}x{size}, {len(payloads[0]) // 1024} KiB of base64 per image")
+        with tempfile.TemporaryDirectory() as old_dir, tempfile.TemporaryDirectory() as new_dir:
+            await measure("  fsync + fixed sleeps (before)", lambda p: old_display(old_dir, p), payloads)
+            store = ImageStore(new_dir, max_files=images)
+            await measure("  content-addressed store", lambda p: new_display(store, p), payloads)
+            await measure("  same images again (dedupe)", lambda p: new_display(store, p), payloads)
+            print(f"  store stats {store.stats}")
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 5))
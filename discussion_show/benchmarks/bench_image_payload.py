@@ -0,0 +1,63 @@
+# Peak extra memory (tracemalloc) and time to turn one SDXL data URL into image bytes,
+# at 512, 1024 and 2048 px. The payload string itself is allocated before measuring.
+#
+# Usage (from discussion_show/): python benchmarks/bench_image_payload.py
+
+import os
+import sys
+import time
+import base64
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ds.fake_runpod import fake_image_data_url
+from ds.image_payload import ImagePayload
+
+def old_save(data_url, path):
+    """The pre-change save_base64_image: split, decode, write."""
+    base64_data_clean = data_url.split(',')[1] if ',' in data_url else data_url
+    with open(path, 'wb') as f:
+        f.write(base64.b64decode(base64_data_clean))
+
+def old_flet(data_url, path):
+    """flet_gen_ui's decode_image: strip the header with replace()."""
+    return data_url.replace("data:image/png;base64,", "")
+
+def payload_save(data_url, path):
+    with open(path, 'wb') as f:
+        ImagePayload(data_url).write_to(f)
+
+def payload_flet(data_url, path):
+    return ImagePayload(data_url).base64()
+
+def measure(fn, data_url, path, buffer=None):
+    args = (data_url, buffer) if buffer is not None else (data_url, path)
+    tracemalloc.start()
+    started = time.perf_counter()
+    fn(*args)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak, elapsed
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "image.png")
+        for size in (512, 1024, 2048):
+            data_url = fake_image_data_url(size, size)
+            buffer = bytearray(ImagePayload(data_url).decoded_size)
+            print(f"{size}x{size}: {len(data_url) / 2**20:.1f} MiB data URL, {len(buffer) / 2**20:.1f} MiB image")
+            for label, fn, extra in (
+                ("split + b64decode + write (before)", old_save, None),
+                ("ImagePayload.write_to file", payload_save, None),
+                ("ImagePayload.decode_into buffer", lambda d, b: ImagePayload(d).decode_into(b), buffer),
+                ("flet replace() header (before)", old_flet, None),
+                ("flet ImagePayload.base64()", payload_flet, None),
+            ):
+                peak, elapsed = measure(fn, data_url, path, extra)
+                print(f"  {label:<36} peak {peak / 2**20:7.2f} MiB   {elapsed * 1000:7.1f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+# Completion-detection latency for RunPod jobs against the local fake server:
+# the old fixed 2 s polling loop vs adaptive polling (cold and warm history) vs webhooks.
+#
+# Usage (from discussion_show/): python benchmarks/bench_runpod_polling.py [jobs]
+
+import os
+import sys
+import time
+import random
+import asyncio
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+from ds.fake_runpod import FakeRunPod
+from ds.runpod_api import RunPodAPI
+from ds.runpod_jobs import JobDurationHistory, WebhookReceiver
+
+class NoHistory(JobDurationHistory):
+    """Never learns, so every job polls as if it were the first."""
+    def record(self, endpoint_id, seconds):
+        pass
+
+async def fixed_interval(api, job_id, retry_delay=2):
+    """The pre-change get_result loop, minus the blocking sleep."""
+    polls = 0
+    while True:
+        status = await api.get_status(job_id)
+        polls += 1
+        if status.get("status") == "COMPLETED":
+            return polls
+        await asyncio.sleep(retry_delay)
+
+async def run_strategy(label, server, api, strategy, jobs):
+    lags, polls = [], []
+    for _ in range(jobs):
+        job = await api.submit({"prompt": "benchmark", "width": 64, "height": 64})
+        if strategy == "fixed":
+            polls.append(await fixed_interval(api, job.job_id))
+        else:
+            await job
+            polls.append(job.polls)
+        lags.append((time.monotonic() - server.jobs[job.job_id]["completed_at"]) * 1000)
+    lags.sort()
+    p95 = lags[min(len(lags) - 1, int(len(lags) * 0.95))]
+    print(f"{label:<22} lag mean {statistics.mean(lags):7.0f} ms   p95 {p95:7.0f} ms   "
+          f"status polls/job {statistics.mean(polls):5.1f}")
+
+async def main(jobs):
+    random.seed(7)
+    # SDXL-like durations: mostly 3-5 s with the odd slow job
+    server = FakeRunPod(job_seconds=lambda _: random.choice([3.0, 3.5, 4.0, 4.5, 5.0, 8.0]))
+    await server.start()
+    client = httpx.AsyncClient()
+    try:
+        def api(history, receiver=None):
+            return RunPodAPI(endpoint_id="sdxl", api_key="bench", base_url=server.base_url,
+                             client=client, history=history, webhook_receiver=receiver)
+
+        await run_strategy("fixed 2 s (before)", server, api(JobDurationHistory()), "fixed", jobs)
+        await run_strategy("adaptive, cold", server, api(NoHistory()), "adaptive", jobs)
+        warm = JobDurationHistory()
+        for seconds in (3.0, 4.0, 4.0, 4.5, 5.0):
+            warm.record("sdxl", seconds)
+        await run_strategy("adaptive, warm history", server, api(warm), "adaptive", jobs)
+
+        receiver = WebhookReceiver(host="127.0.0.1", port=0)
+        await receiver.start()
+        await run_strategy("webhook", server, api(JobDurationHistory(), receiver), "webhook", jobs)
+        await receiver.stop()
+    finally:
+        await client.aclose()
+        await server.stop()
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 10))
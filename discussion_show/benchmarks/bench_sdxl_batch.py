@@ -0,0 +1,70 @@
+# Eight SDXL images against the local fake RunPod server, where every job pays a fixed
+# cold-start/queue overhead plus a per-image cost: one job per image run back to back
+# (the old run_sdxl loop) vs multi-image jobs vs single-image jobs fanned out over endpoints.
+#
+# Usage (from discussion_show/): python benchmarks/bench_sdxl_batch.py
+
+import os
+import sys
+import time
+import asyncio
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+from ds.fake_runpod import FakeRunPod
+from ds.runpod_api import RunPodAPI
+from ds.runpod_jobs import JobDurationHistory
+
+JOB_OVERHEAD = 0.6   # cold start + queue wait, paid once per job
+IMAGE_SECONDS = 0.2  # diffusion time per image
+IMAGES = 8
+PROMPTS = [f"a lighthouse on a cliff, variation {i}" for i in range(IMAGES)]
+
+def job_seconds(input_data):
+    return JOB_OVERHEAD + IMAGE_SECONDS * input_data.get("num_images", 1)
+
+def report(label, started, first, images, gpu_seconds):
+    print(f"{label:<42} first image {first * 1000:6.0f} ms   all {(time.perf_counter() - started) * 1000:6.0f} ms   "
+          f"images {images}   GPU {gpu_seconds:4.1f} s")
+
+async def sequential(api):
+    started = time.perf_counter()
+    first, images, gpu = None, 0, 0.0
+    for prompt in PROMPTS:
+        job = await api.run_sdxl_job(prompt)
+        images += 1
+        gpu += job.execution_seconds
+        first = first or time.perf_counter() - started
+    report("one job per image, sequential (before)", started, first, images, gpu)
+
+async def batched(label, api, prompts, num_images, max_in_flight, endpoints=()):
+    started = time.perf_counter()
+    first, images, gpu = None, 0, 0.0
+    async for result in api.run_sdxl_batch(prompts, num_images=num_images, max_in_flight=max_in_flight,
+                                           endpoints=endpoints):
+        images += len(result.images)
+        gpu += result.execution_seconds
+        first = first or time.perf_counter() - started
+    report(label, started, first, images, gpu)
+
+async def main():
+    server = FakeRunPod(job_seconds=job_seconds)
+    await server.start()
+    client = httpx.AsyncClient()
+    try:
+        history = JobDurationHistory()
+        def api(endpoint_id):
+            return RunPodAPI(endpoint_id=endpoint_id, api_key="bench", base_url=server.base_url,
+                             client=client, history=history)
+
+        await sequential(api("sdxl-a"))
+        await batched("2 prompts x 4 images, 1 endpoint", api("sdxl-a"), PROMPTS[:2], 4, 2)
+        await batched("8 prompts x 1 image, 2 endpoints, 4 live", api("sdxl-a"), PROMPTS, 1, 4, [api("sdxl-b")])
+        await batched("4 prompts x 2 images, 2 endpoints, 4 live", api("sdxl-a"), PROMPTS[:4], 2, 4, [api("sdxl-b")])
+    finally:
+        await client.aclose()
+        await server.stop()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,156 @@
+# Load test: many simulated browser tabs, each with its own DiscussionSession, against the
+# local fake RunPod server standing in for both Whisper (runsync) and SDXL (run + status).
+# Audio decoding is replaced by fixed-size PCM so the run measures session and backend
+# scheduling rather than ffmpeg.
+#
+# Usage (from discussion_show/): python benchmarks/load_sessions.py [clients] [blobs per client]
+
+import os
+import sys
+import time
+import base64
+import asyncio
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ds.audio import SAMPLE_RATE, SAMPLE_WIDTH
+from ds.context_buffer import TranscriptContext
+from ds.fake_runpod import FakeRunPod, default_output
+from ds.http_client import close_http_client
+from ds.image_generator import ImageGenerator
+from ds.runpod_api import RunPodAPI
+from ds.sessions import DiscussionSession, SessionRegistry, SessionView
+from ds.transcription_session import TranscriptionSession
+
+BLOB_SECONDS = 1.0     # recorder blob length
+BLOB_INTERVAL = 0.25   # real time between blobs, i.e. speech played back 4x faster than live
+WHISPER_SECONDS = 0.3
+SDXL_SECONDS = 2.0
+LLM_SECONDS = 0.2
+BLOB = "data:audio/webm;base64," + base64.b64encode(os.urandom(4096)).decode()
+WORDS = "castle marble banners dragons harbour lanterns forest meadow comet orchard".split()
+
+def fake_output(input_data):
+    """Distinct sentences per window, so overlap merging does not swallow them."""
+    if "audio_base64" in input_data:
+        fake_output.calls += 1
+        n = fake_output.calls
+        return {"transcription": " ".join(f"{WORDS[(n + i) % len(WORDS)]}{n}" for i in range(12))}
+    return default_output(input_data)
+fake_output.calls = 0
+
+class LoadTranscriber:
+    """Skips decoding; windows go to the fake Whisper endpoint."""
+    def __init__(self, api):
+        self.api = api
+        self.provider = "runpod"
+        self.windows = 0
+
+    async def decode(self, audio_blob_base64):
+        pcm = bytes(int(SAMPLE_RATE * BLOB_SECONDS) * SAMPLE_WIDTH)
+        return pcm, BLOB_SECONDS * 1000
+
+    async def transcribe_pcm(self, pcm):
+        self.windows += 1
+        result = await self.api.run_sync({"audio_base64": base64.b64encode(pcm[:1024]).decode()})
+        return result["output"]["transcription"] if result else None
+
+    def create_session(self):
+        return TranscriptionSession(decode=self.decode, transcribe=self.transcribe_pcm, step_ms=6000, overlap_ms=1500)
+
+class LoadContextBuffer:
+    """MyContextBuffer with the chat call replaced by a fixed delay."""
+    def __init__(self):
+        self.context = TranscriptContext(full_enough=40)
+
+    def add_to_context(self, text):
+        self.context.add(text)
+
+    def is_full_enough(self):
+        return self.context.is_full_enough()
+
+    def get_fill_percentage(self):
+        return self.context.fill_percentage
+
+    async def generate_image_prompt(self):
+        taken = self.context.take()
+        await asyncio.sleep(LLM_SECONDS)
+        return taken[2][:200] if taken else None
+
+class LoadView(SessionView):
+    def __init__(self, counters):
+        self.counters = counters
+
+    def show_transcript(self, text):
+        self.counters["transcripts"] += 1
+
+    def show_prompt(self, prompt):
+        self.counters["prompts"] += 1
+
+    async def show_image(self, base64_image, prompt):
+        self.counters["images"] += 1
+
+async def run_client(client_id, registry, transcriber, generator, counters, blobs, latencies):
+    session = registry.add(DiscussionSession(
+        client_id, transcriber=transcriber, context_buffer=LoadContextBuffer(),
+        generator=generator, view=LoadView(counters)
+    ))
+    session.recording = True
+    for i in range(blobs):
+        if i == blobs - 1:
+            session.recording = False
+        started = time.perf_counter()
+        await session.handle_audio(BLOB)
+        latencies.append((time.perf_counter() - started) * 1000)
+        counters["blobs"] += 1
+        await asyncio.sleep(BLOB_INTERVAL)
+    while session.scheduler.busy:
+        await asyncio.sleep(0.05)
+    return session.scheduler.stats
+
+async def main(clients, blobs):
+    server = FakeRunPod(job_seconds=lambda input_data: WHISPER_SECONDS if "audio_base64" in input_data else SDXL_SECONDS,
+                        output=fake_output)
+    await server.start()
+    registry = SessionRegistry(idle_seconds=60)
+    try:
+        transcriber = LoadTranscriber(RunPodAPI(endpoint_id="whisper", api_key="load", base_url=server.base_url))
+        generator = ImageGenerator(api=RunPodAPI(endpoint_id="sdxl", api_key="load", base_url=server.base_url))
+        counters = {"blobs": 0, "transcripts": 0, "prompts": 0, "images": 0}
+        latencies = []
+
+        started = time.perf_counter()
+        stats = await asyncio.gather(*[
+            run_client(f"client-{i}", registry, transcriber, generator, counters, blobs, latencies)
+            for i in range(clients)
+        ])
+        elapsed = time.perf_counter() - started
+
+        latencies.sort()
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        dropped = sum(s["dropped"] for s in stats)
+        cancelled = sum(s["cancelled"] for s in stats)
+        print(f"{clients} clients x {blobs} blobs of {BLOB_SECONDS:.0f} s audio in {elapsed:.1f} s")
+        print(f"  audio throughput   {counters['blobs'] / elapsed:7.1f} blobs/s "
+              f"({counters['blobs'] * BLOB_SECONDS / elapsed:.1f}x real time)")
+        print(f"  whisper windows    {transcriber.windows:7d}   ({transcriber.windows / elapsed:.1f}/s)")
+        print(f"  transcripts shown  {counters['transcripts']:7d}")
+        print(f"  image prompts      {counters['prompts']:7d}")
+        print(f"  images shown       {counters['images']:7d}   ({counters['images'] / elapsed:.2f}/s), "
+              f"{dropped} dropped, {cancelled} cancelled")
+        print(f"  handle_audio       p50 {statistics.median(latencies):6.0f} ms   p95 {p95:6.0f} ms")
+        print(f"  server requests    {server.requests}")
+
+        evicted = await registry.evict_idle(now=time.monotonic() + registry.idle_seconds + 1)
+        print(f"  sessions           {registry.stats['created']} created, {evicted} evicted when idle, {len(registry)} left")
+    finally:
+        await registry.close()
+        await close_http_client()
+        await server.stop()
+
+if __name__ == "__main__":
+    asyncio.run(main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 20,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 30
+    ))
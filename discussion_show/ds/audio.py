@@ -0,0 +1,115 @@
+import os
+import io
+import base64
+import logging
+import subprocess
+import tempfile
+import wave
+from typing import List, Tuple
+
+# Every stage after decoding works on the same 16 kHz mono pcm_s16le buffer,
+# which is also what webrtcvad expects.
+SAMPLE_RATE = 16000
+SAMPLE_WIDTH = 2
+CHANNELS = 1
+
+FFMPEG_BINARY = os.environ.get("FFMPEG_BINARY", "ffmpeg")
+
+class DecodedAudio:
+    """A decoded recorder chunk held in memory as raw PCM."""
+    def __init__(self, pcm: bytes, mime_type: str, encoded_size: int = 0, sample_rate: int = SAMPLE_RATE):
+        self.pcm = pcm
+        self.mime_type = mime_type
+        self.encoded_size = encoded_size
+        self.sample_rate = sample_rate
+
+    @property
+    def duration_ms(self) -> int:
+        return int(len(self.pcm) / (self.sample_rate * SAMPLE_WIDTH * CHANNELS) * 1000)
+
+    def trimmed(self, segments: List[Tuple[int, int]]) -> "DecodedAudio":
+        """Keep only the given PCM byte ranges, joined back to back."""
+        view = memoryview(self.pcm)
+        pcm = b"".join(view[start:min(end, len(self.pcm))] for start, end in segments)
+        return DecodedAudio(pcm, self.mime_type, encoded_size=self.encoded_size, sample_rate=self.sample_rate)
+
+    def to_wav(self) -> bytes:
+        """Wrap the PCM buffer in a WAV header without touching the disk."""
+        out = io.BytesIO()
+        with wave.open(out, 'wb') as wf:
+            wf.setnchannels(CHANNELS)
+            wf.setsampwidth(SAMPLE_WIDTH)
+            wf.setframerate(self.sample_rate)
+            wf.writeframes(self.pcm)
+        return out.getvalue()
+
+class AudioPipeline:
+    """Decode recorder blobs to PCM and encode upload bodies through ffmpeg pipes."""
+    def __init__(self, sample_rate: int = SAMPLE_RATE, ffmpeg: str = FFMPEG_BINARY):
+        self.sample_rate = sample_rate
+        self.ffmpeg = ffmpeg
+        self.logger = logging.getLogger('discussion_show.audio_pipeline')
+
+    @staticmethod
+    def extract_mime_and_data(audio_blob_base64: str) -> Tuple[str, str]:
+        """Extract MIME type and actual base64 data from the input."""
+        mime_type = "audio/webm"  # default
+        base64_data = audio_blob_base64
+
+        if "data:" in audio_blob_base64:
+            parts = audio_blob_base64.split(",", 1)
+            if len(parts) == 2:
+                mime_type = parts[0].split(":")[1].split(";")[0]
+                base64_data = parts[1]
+
+        return mime_type, base64_data
+
+    def _run_ffmpeg(self, args, data: bytes) -> bytes:
+        command = [self.ffmpeg, "-hide_banner", "-loglevel", "error", *args]
+        process = subprocess.run(command, input=data, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        if process.returncode != 0:
+            raise RuntimeError(f"ffmpeg failed ({process.returncode}): {process.stderr.decode(errors='replace').strip()}")
+        return process.stdout
+
+    def _pcm_output_args(self):
+        return ["-vn", "-ac", str(CHANNELS), "-ar", str(self.sample_rate), "-acodec", "pcm_s16le", "-f", "s16le", "pipe:1"]
+
+    def decode(self, audio_blob_base64: str) -> DecodedAudio:
+        """Decode a (data URL or bare) base64 blob straight to PCM."""
+        mime_type, base64_data = self.extract_mime_and_data(audio_blob_base64)
+        return self.decode_bytes(base64.b64decode(base64_data), mime_type)
+
+    def decode_bytes(self, audio_data: bytes, mime_type: str = "audio/webm") -> DecodedAudio:
+        """Decode container bytes to PCM with a single ffmpeg call over stdin/stdout."""
+        format_name = mime_type.split('/')[-1].split(';')[0]
+        try:
+            pcm = self._run_ffmpeg(["-f", format_name, "-i", "pipe:0", *self._pcm_output_args()], audio_data)
+        except RuntimeError as e:
+            # Let ffmpeg probe the container itself if the MIME hint is wrong
+            self.logger.warning(f"Failed to decode as {format_name}, probing format: {e}")
+            try:
+                pcm = self._run_ffmpeg(["-i", "pipe:0", *self._pcm_output_args()], audio_data)
+            except RuntimeError:
+                pcm = self._decode_seekable(audio_data)
+        self.logger.debug(f"Decoded {len(audio_data)} bytes of {mime_type} to {len(pcm)} bytes of PCM")
+        return DecodedAudio(pcm, mime_type, encoded_size=len(audio_data), sample_rate=self.sample_rate)
+
+    def _decode_seekable(self, audio_data: bytes) -> bytes:
+        """Last resort for containers that cannot be read from a pipe (non-fragmented mp4)."""
+        self.logger.warning("Container is not streamable, decoding from a temporary file")
+        with tempfile.NamedTemporaryFile() as temp_audio:
+            temp_audio.write(audio_data)
+            temp_audio.flush()
+            return self._run_ffmpeg(["-i", temp_audio.name, *self._pcm_output_args()], b"")
+
+    def encode(self, audio: DecodedAudio, format: str = "ogg") -> bytes:
+        """Encode the PCM buffer into an upload body."""
+        if format == "wav":
+            return audio.to_wav()
+        input_args = ["-f", "s16le", "-ar", str(audio.sample_rate), "-ac", str(CHANNELS), "-i", "pipe:0"]
+        if format == "ogg":
+            output_args = ["-q:a", "4", "-f", "ogg", "pipe:1"]
+        else:
+            output_args = ["-f", format, "pipe:1"]
+        return self._run_ffmpeg([*input_args, *output_args], audio.pcm)
+
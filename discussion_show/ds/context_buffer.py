@@ -0,0 +1,102 @@
+import re
+import logging
+from collections import deque
+from typing import Callable, List, NamedTuple, Optional, Tuple
+
+try:
+    import tiktoken
+    _ENCODING = tiktoken.get_encoding("cl100k_base")
+except ImportError:
+    _ENCODING = None
+except Exception as e:
+    # tiktoken downloads the encoding on first use, which fails on offline hosts
+    logging.getLogger('discussion_show.context_buffer').warning(f"tiktoken encoding unavailable, estimating tokens: {e}")
+    _ENCODING = None
+
+_TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+def count_tokens(text: str) -> int:
+    """Token count with tiktoken when installed, else a words-and-punctuation estimate."""
+    if _ENCODING is not None:
+        return len(_ENCODING.encode(text))
+    # BPE splits longer words, so the raw piece count runs a little low
+    return int(len(_TOKEN_PATTERN.findall(text)) * 1.3)
+
+class Segment(NamedTuple):
+    text: str
+    tokens: int
+
+class TranscriptContext:
+    """Transcript segments with running token counts and a rolling summary of older ones.
+
+    New segments are "pending" until an image prompt consumes them. Consumed
+    segments stay as recent context for the next prompts, and once the summary
+    plus all segments go over `budget` tokens the oldest consumed segments are
+    folded into the summary, so prompt size stays bounded however long the show runs.
+    """
+    def __init__(self, full_enough: int = 120, budget: int = 1500, summary_budget: int = 200,
+                 counter: Callable[[str], int] = count_tokens):
+        self.full_enough = full_enough
+        self.budget = budget
+        self.summary_budget = summary_budget
+        self.counter = counter
+        self.segments = deque()
+        self.summary = ""
+        self.summary_tokens = 0
+        self.segment_tokens = 0
+        self.pending_tokens = 0
+        self.pending_count = 0
+        self.fill_percentage = 0
+        self.logger = logging.getLogger('discussion_show.context_buffer')
+
+    @property
+    def total_tokens(self) -> int:
+        return self.summary_tokens + self.segment_tokens
+
+    def add(self, text: str) -> None:
+        text = text.strip()
+        if not text:
+            return
+        segment = Segment(text, self.counter(text))
+        self.segments.append(segment)
+        self.segment_tokens += segment.tokens
+        self.pending_tokens += segment.tokens
+        self.pending_count += 1
+        self.fill_percentage = min(100, int(self.pending_tokens / self.full_enough * 100))
+        self.logger.debug(f"Added {segment.tokens} tokens to context, {self.pending_tokens} pending, {self.total_tokens} total")
+
+    def is_full_enough(self) -> bool:
+        return self.pending_tokens >= self.full_enough
+
+    def take(self) -> Optional[Tuple[str, str, str]]:
+        """Consume the pending segments; returns (summary, earlier text, new text)."""
+        if not self.pending_count:
+            return None
+        segments = list(self.segments)
+        split = len(segments) - self.pending_count
+        earlier = " ".join(s.text for s in segments[:split])
+        new = " ".join(s.text for s in segments[split:])
+        self.pending_tokens = 0
+        self.pending_count = 0
+        self.fill_percentage = 0
+        return self.summary, earlier, new
+
+    def overflow(self) -> List[Segment]:
+        """Pop the oldest consumed segments until the context fits the budget again."""
+        folded = []
+        while self.total_tokens > self.budget and len(self.segments) > self.pending_count:
+            segment = self.segments.popleft()
+            self.segment_tokens -= segment.tokens
+            folded.append(segment)
+        return folded
+
+    def set_summary(self, summary: str) -> None:
+        self.summary = summary.strip()
+        self.summary_tokens = self.counter(self.summary) if self.summary else 0
+        self.logger.debug(f"Summary is now {self.summary_tokens} tokens, context {self.total_tokens} tokens")
+
+    def clear(self) -> None:
+        self.segments.clear()
+        self.summary = ""
+        self.summary_tokens = self.segment_tokens = self.pending_tokens = self.pending_count = 0
+        self.fill_percentage = 0
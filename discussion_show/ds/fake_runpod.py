@@ -0,0 +1,140 @@
+import os
+import json
+import time
+import uuid
+import base64
+import asyncio
+import logging
+from typing import Callable, Dict, Optional, Union
+
+from .local_http import read_request, write_json, post_json
+
+# A local stand-in for the RunPod serverless API (/run, /runsync, /status, /cancel)
+# used by the tests, benchmarks and load tests. Jobs "run" for a configurable
+# number of seconds and return canned SDXL or Whisper output.
+
+def fake_image_data_url(width: int = 512, height: int = 512) -> str:
+    """A PNG-sized data URL; the bytes are random, only the size is realistic."""
+    size = width * height * 3 // 2
+    return "data:image/png;base64," + base64.b64encode(b"\x89PNG\r\n\x1a\n" + os.urandom(size)).decode()
+
+def default_output(input_data: Dict) -> Dict:
+    if "audio_base64" in input_data:
+        return {"transcription": "the quick brown fox jumps over the lazy dog"}
+    width, height = input_data.get("width", 512), input_data.get("height", 512)
+    if input_data.get("num_images", 1) > 1:
+        return {"images": [fake_image_data_url(width, height) for _ in range(input_data["num_images"])]}
+    return {"image_url": fake_image_data_url(width, height)}
+
+class FakeRunPod:
+    def __init__(self, job_seconds: Union[float, Callable[[Dict], float]] = 1.0,
+                 output: Callable[[Dict], Dict] = default_output, host: str = "127.0.0.1", port: int = 0):
+        self.job_seconds = job_seconds
+        self.output = output
+        self.host = host
+        self.port = port
+        self.jobs: Dict[str, Dict] = {}
+        self.requests: Dict[str, int] = {"run": 0, "runsync": 0, "status": 0, "cancel": 0}
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._webhooks = set()
+        self.logger = logging.getLogger('discussion_show.fake_runpod')
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    async def start(self) -> str:
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self.base_url
+
+    async def stop(self) -> None:
+        for task in list(self._webhooks):
+            task.cancel()
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    def _duration(self, input_data: Dict) -> float:
+        return self.job_seconds(input_data) if callable(self.job_seconds) else self.job_seconds
+
+    def _create_job(self, input_data: Dict) -> Dict:
+        job = {
+            "id": str(uuid.uuid4()),
+            "input": input_data,
+            "created_at": time.monotonic(),
+            "duration": self._duration(input_data),
+            "cancelled": False,
+        }
+        job["completed_at"] = job["created_at"] + job["duration"]
+        self.jobs[job["id"]] = job
+        return job
+
+    def _status(self, job: Dict) -> Dict:
+        if job["cancelled"]:
+            return {"id": job["id"], "status": "CANCELLED"}
+        if time.monotonic() < job["completed_at"]:
+            return {"id": job["id"], "status": "IN_PROGRESS"}
+        if "result" not in job:
+            job["result"] = self.output(job["input"])
+        return {
+            "id": job["id"],
+            "status": "COMPLETED",
+            "delayTime": 0,
+            "executionTime": int(job["duration"] * 1000),
+            "output": job["result"],
+        }
+
+    async def _send_webhook(self, job: Dict, url: str) -> None:
+        await asyncio.sleep(job["duration"])
+        if not job["cancelled"]:
+            try:
+                await post_json(url, self._status(job))
+            except OSError as e:
+                self.logger.warning(f"Webhook to {url} failed: {e}")
+
+    async def _route(self, method: str, path: str, body: bytes):
+        # Paths look like /{endpoint_id}/{action}[/{job_id}]
+        parts = [p for p in path.split("?")[0].split("/") if p]
+        if len(parts) < 2:
+            return 404, {"error": "not found"}
+        action = parts[1]
+        if action in self.requests:
+            self.requests[action] += 1
+
+        if method == "POST" and action in ("run", "runsync"):
+            request = json.loads(body or b"{}")
+            job = self._create_job(request.get("input", {}))
+            if action == "runsync":
+                await asyncio.sleep(job["duration"])
+                return 200, self._status(job)
+            if request.get("webhook"):
+                task = asyncio.ensure_future(self._send_webhook(job, request["webhook"]))
+                self._webhooks.add(task)
+                task.add_done_callback(self._webhooks.discard)
+            return 200, {"id": job["id"], "status": "IN_QUEUE"}
+
+        job = self.jobs.get(parts[2]) if len(parts) > 2 else None
+        if job is None:
+            return 404, {"error": "job not found"}
+        if method == "GET" and action == "status":
+            return 200, self._status(job)
+        if method == "POST" and action == "cancel":
+            job["cancelled"] = True
+            return 200, {"id": job["id"], "status": "CANCELLED"}
+        return 404, {"error": "not found"}
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                request = await read_request(reader)
+                if request is None:
+                    break
+                method, path, _, body = request
+                status, payload = await self._route(method, path, body)
+                await write_json(writer, status, payload)
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
@@ -1,12 +1,13 @@
-import os
+import asyncio
 import logging
 from typing import Optional
-from nicegui import run
-from .runpod_api import RunPodAPI
+from .runpod_api import RunPodAPI, SDXL_DEFAULTS
+from .runpod_batch import extract_images
 
 class ImageGenerator:
-    def __init__(self, endpoint_id=None):
-        self.api = RunPodAPI(endpoint_id=endpoint_id)
+    def __init__(self, endpoint_id=None, webhook_receiver=None, api=None, cache=None):
+        self.api = api or RunPodAPI(endpoint_id=endpoint_id, webhook_receiver=webhook_receiver)
+        self.cache = cache
         self.logger = logging.getLogger('discussion_show.image_generator')
 
     def truncate_prompt(self, prompt: str, max_words: int = 30) -> str:
@@ -17,39 +18,45 @@ class ImageGenerator:
             return ' '.join(words[:max_words])
         return prompt
 
+    def cache_params(self) -> dict:
+        """Everything besides the prompt that changes the image."""
+        return {"endpoint_id": self.api.endpoint_id, **SDXL_DEFAULTS}
+
     async def generate_image(self, context: str) -> Optional[str]:
         """Generate an image from the given context."""
-        def _generate():
-            try:
-                # Truncate prompt to avoid token limit issues
-                # truncated_prompt = self.truncate_prompt(context)
-                truncated_prompt = context
-                self.logger.debug(f"Using truncated prompt: {truncated_prompt}")
-
-                # Run SDXL with the truncated prompt
-                result = self.api.run_sdxl(truncated_prompt)
-                
-                if not result:
-                    self.logger.error("Failed to generate image")
-                    return None
-
-                # Extract image data from result
-                if isinstance(result, list) and result:
-                    image_data = result[0].get("image", None)
-                elif isinstance(result, dict):
-                    image_data = result.get("image") or result.get("image_url")
-                else:
-                    image_data = result
-
-                if image_data:
-                    self.logger.info("Successfully generated image")
-                    return image_data
-                else:
-                    self.logger.error(f"No image in output: {result}")
-                    return None
-
-            except Exception as e:
-                self.logger.error(f"Error in generate_image: {str(e)}")
+        try:
+            # Truncate prompt to avoid token limit issues
+            # truncated_prompt = self.truncate_prompt(context)
+            truncated_prompt = context
+            self.logger.debug(f"Using truncated prompt: {truncated_prompt}")
+
+            if self.cache is not None:
+                cached = await asyncio.to_thread(self.cache.get, truncated_prompt, self.cache_params())
+                if cached:
+                    return cached
+
+            # Run SDXL with the truncated prompt
+            job = await self.api.run_sdxl_job(truncated_prompt)
+            result = job.output if job else None
+
+            if not result:
+                self.logger.error("Failed to generate image")
+                return None
+
+            # Extract image data from result
+            images = extract_images(result)
+            image_data = images[0] if images else None
+
+            if image_data:
+                self.logger.info("Successfully generated image")
+                if self.cache is not None:
+                    await asyncio.to_thread(self.cache.put, truncated_prompt, self.cache_params(),
+                                            image_data, job.execution_seconds)
+                return image_data
+            else:
+                self.logger.error(f"No image in output: {result}")
                 return None
 
-        return await run.io_bound(_generate)
+        except Exception as e:
+            self.logger.error(f"Error in generate_image: {str(e)}")
+            return None
@@ -0,0 +1,80 @@
+import binascii
+from typing import BinaryIO, Iterator, Optional
+
+# Base64 characters decoded per step; a multiple of 4 so every chunk decodes on its own
+CHUNK_CHARS = 256 * 1024
+HEADER_SEARCH = 256
+
+class ImagePayload:
+    """A base64 image as RunPod returns it, as a data URL or bare base64.
+
+    The header is located by index, not split off, and decoding works through
+    the text in fixed-size chunks. So the full image never exists as a second
+    string, and the decoded bytes can go straight into a preallocated buffer
+    or a file.
+    """
+    __slots__ = ("text", "mime_type", "offset", "_end")
+
+    def __init__(self, text: str, default_mime: str = "image/png"):
+        self.text = text
+        self.mime_type = default_mime
+        self.offset = 0
+        if text.startswith("data:"):
+            comma = text.find(",", 0, HEADER_SEARCH)
+            if comma < 0:
+                raise ValueError("Data URL has no ',' after its header")
+            self.mime_type = text[5:comma].split(";")[0] or default_mime
+            self.offset = comma + 1
+        self._end = len(text)
+        while self._end > self.offset and text[self._end - 1].isspace():
+            self._end -= 1
+
+    @property
+    def encoded_size(self) -> int:
+        return self._end - self.offset
+
+    @property
+    def decoded_size(self) -> int:
+        """Exact decoded length, assuming no whitespace inside the base64."""
+        padding = 0
+        if self.encoded_size >= 2:
+            padding = (self.text[self._end - 1] == "=") + (self.text[self._end - 2] == "=")
+        return self.encoded_size // 4 * 3 - padding
+
+    def _contiguous(self) -> bool:
+        # Chunks only line up with base64 quanta when there are no line breaks
+        return self.text.find("\n", self.offset, self._end) < 0
+
+    def chunks(self, chunk_chars: int = CHUNK_CHARS) -> Iterator[bytes]:
+        """Decoded bytes, one chunk at a time."""
+        if not self._contiguous():
+            yield binascii.a2b_base64(self.text[self.offset:self._end])
+            return
+        for start in range(self.offset, self._end, chunk_chars):
+            yield binascii.a2b_base64(self.text[start:min(start + chunk_chars, self._end)])
+
+    def decode_into(self, buffer: Optional[bytearray] = None) -> memoryview:
+        """Decode into `buffer` (allocated at the exact size when omitted); returns a view of the image bytes."""
+        if buffer is None:
+            buffer = bytearray(self.decoded_size)
+        view = memoryview(buffer)
+        position = 0
+        for chunk in self.chunks():
+            view[position:position + len(chunk)] = chunk
+            position += len(chunk)
+        return view[:position]
+
+    def write_to(self, stream: BinaryIO) -> int:
+        """Stream the decoded image into a binary file object; returns the number of bytes written."""
+        written = 0
+        for chunk in self.chunks():
+            stream.write(chunk)
+            written += len(chunk)
+        return written
+
+    def base64(self) -> str:
+        """The bare base64 text, for UIs that take it directly. Free when there is no header."""
+        return self.text[self.offset:self._end] if self.offset or self._end != len(self.text) else self.text
+
+    def data_url(self) -> str:
+        return self.text if self.offset else f"data:{self.mime_type};base64,{self.text}"
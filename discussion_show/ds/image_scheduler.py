@@ -0,0 +1,88 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+class ImageJobScheduler:
+    """Run image generations under a concurrency cap where only the newest prompt is worth showing.
+
+    A single queue slot holds the next prompt, so a newer prompt replaces a waiting one.
+    When a job finishes, any older job still running is cancelled because its image
+    would be replaced immediately anyway.
+    """
+    def __init__(self, generator, on_image: Callable[[str, str], Awaitable[None]],
+                 max_concurrent: int = 1, on_status: Optional[Callable[[str], None]] = None):
+        self.generator = generator
+        self.on_image = on_image
+        self.on_status = on_status
+        self.max_concurrent = max_concurrent
+        self._queued: Optional[Tuple[int, str]] = None
+        self._running: Dict[int, asyncio.Task] = {}
+        self._next_id = 0
+        self._displayed_id = 0
+        self.stats = {"submitted": 0, "dropped": 0, "cancelled": 0, "completed": 0, "failed": 0}
+        self.logger = logging.getLogger('discussion_show.image_scheduler')
+
+    @property
+    def busy(self) -> bool:
+        return bool(self._running or self._queued)
+
+    def submit(self, prompt: str) -> int:
+        """Queue a prompt without waiting for it; returns its job number."""
+        self._next_id += 1
+        self.stats["submitted"] += 1
+        if self._queued is not None:
+            self.stats["dropped"] += 1
+            self.logger.info(f"Dropping queued image job {self._queued[0]}, superseded by {self._next_id}")
+        self._queued = (self._next_id, prompt)
+        self._pump()
+        return self._next_id
+
+    def _pump(self) -> None:
+        while self._queued is not None and len(self._running) < self.max_concurrent:
+            job_id, prompt = self._queued
+            self._queued = None
+            task = asyncio.ensure_future(self._run(job_id, prompt))
+            self._running[job_id] = task
+            task.add_done_callback(lambda _, job_id=job_id: self._finished(job_id))
+
+    def _finished(self, job_id: int) -> None:
+        self._running.pop(job_id, None)
+        self._pump()
+
+    def _status(self, text: str) -> None:
+        if self.on_status is not None:
+            self.on_status(text)
+
+    async def _run(self, job_id: int, prompt: str) -> None:
+        self.logger.info(f"Starting image job {job_id} ({len(self._running)} running)")
+        self._status("Generating image...")
+        try:
+            image = await self.generator.generate_image(prompt)
+        except asyncio.CancelledError:
+            self.stats["cancelled"] += 1
+            self.logger.info(f"Cancelled image job {job_id}")
+            raise
+
+        if job_id < self._displayed_id:
+            return
+        if not image:
+            self.stats["failed"] += 1
+            self._status("Failed to generate image")
+            return
+
+        self._displayed_id = job_id
+        self.stats["completed"] += 1
+        # Older jobs still running would only replace this image with an older one
+        for other_id in [other_id for other_id in self._running if other_id < job_id]:
+            self._running.pop(other_id).cancel()
+        await self.on_image(image, prompt)
+        # This task is still registered as running until it returns
+        if self._queued is None and len(self._running) <= 1:
+            self._status("Not generating image")
+
+    async def close(self) -> None:
+        self._queued = None
+        tasks = list(self._running.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
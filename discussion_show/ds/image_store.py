@@ -0,0 +1,121 @@
+import os
+import hashlib
+import logging
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Tuple
+
+from .image_payload import ImagePayload
+
+MAX_BYTES = 500 * 1024 * 1024
+MAX_FILES = 200
+
+EXTENSIONS = {
+    "image/png": ".png",
+    "image/jpeg": ".jpg",
+    "image/webp": ".webp",
+}
+
+class ImageStore:
+    """Content-addressed image files under one directory, evicted least recently used first.
+
+    Files are named by the SHA-256 of their bytes, so the same image is stored once
+    and two different images can never overwrite each other. Writes go to a temp
+    file in the same directory followed by an atomic rename, so a URL is servable
+    as soon as it is returned. A repeated image is still written once before its
+    hash is known; the duplicate temp file is then dropped.
+    """
+    def __init__(self, directory: str, url_prefix: str = "/static/images",
+                 max_bytes: int = MAX_BYTES, max_files: int = MAX_FILES):
+        self.directory = directory
+        self.url_prefix = url_prefix.rstrip("/")
+        self.max_bytes = max_bytes
+        self.max_files = max_files
+        self.stats = {"saved": 0, "deduplicated": 0, "evicted": 0}
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self._total_bytes = 0
+        self.logger = logging.getLogger('discussion_show.image_store')
+        os.makedirs(directory, exist_ok=True)
+        self._load()
+
+    def _load(self) -> None:
+        """Index what is already on disk, oldest first."""
+        files = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and not entry.name.startswith("."):
+                stat = entry.stat()
+                files.append((stat.st_mtime, entry.name, stat.st_size))
+        for _, name, size in sorted(files):
+            self._entries[name] = size
+            self._total_bytes += size
+        self._evict()
+
+    def url_for(self, name: str) -> str:
+        return f"{self.url_prefix}/{name}"
+
+    def _store(self, write, mime_type: str) -> str:
+        """Write via `write(file) -> sha256` into a temp file, then file it under its hash."""
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                digest = write(f)
+            size = os.path.getsize(tmp_path)
+            name = digest.hexdigest()[:32] + EXTENSIONS.get(mime_type, ".png")
+            path = os.path.join(self.directory, name)
+            with self._lock:
+                if name in self._entries and os.path.exists(path):
+                    os.unlink(tmp_path)
+                    self._entries.move_to_end(name)
+                    # mtime carries the LRU order across restarts
+                    os.utime(path)
+                    self.stats["deduplicated"] += 1
+                    self.logger.info(f"Image already stored: {name}")
+                    return self.url_for(name)
+                os.replace(tmp_path, path)
+                self._entries[name] = size
+                self._total_bytes += size
+                self.stats["saved"] += 1
+                self._evict(keep=name)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        self.logger.info(f"Stored image {name} ({size} bytes)")
+        return self.url_for(name)
+
+    def save(self, data: bytes, mime_type: str = "image/png") -> str:
+        """Store the image bytes and return their URL."""
+        def write(f):
+            f.write(data)
+            return hashlib.sha256(data)
+        return self._store(write, mime_type)
+
+    def save_payload(self, payload: ImagePayload) -> str:
+        """Decode a base64 payload chunk by chunk straight into the file, hashing as it goes."""
+        def write(f):
+            digest = hashlib.sha256()
+            for chunk in payload.chunks():
+                digest.update(chunk)
+                f.write(chunk)
+            return digest
+        return self._store(write, payload.mime_type)
+
+    def save_base64(self, base64_data: str) -> str:
+        """Store a data URL or bare base64 image."""
+        return self.save_payload(ImagePayload(base64_data))
+
+    def _evict(self, keep: str = None) -> None:
+        while self._entries and (self._total_bytes > self.max_bytes or len(self._entries) > self.max_files):
+            name, size = next(iter(self._entries.items()))
+            if name == keep:
+                break
+            del self._entries[name]
+            self._total_bytes -= size
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+            self.stats["evicted"] += 1
+            self.logger.debug(f"Evicted image {name}")
@@ -0,0 +1,198 @@
+import os
+import re
+import json
+import time
+import hashlib
+import logging
+import tempfile
+import threading
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+EMBEDDING_DIMS = 512
+
+_NON_WORD = re.compile(r"[^\w\s]+")
+
+def normalize_prompt(prompt: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace, so trivially different prompts share a key."""
+    return " ".join(_NON_WORD.sub(" ", prompt.lower()).split())
+
+def _bucket(feature: str, dims: int) -> Tuple[int, float]:
+    digest = hashlib.blake2b(feature.encode(), digest_size=8).digest()
+    value = int.from_bytes(digest, "little")
+    return value % dims, 1.0 if value >> 63 else -1.0
+
+def embed_prompt(normalized: str, dims: int = EMBEDDING_DIMS) -> np.ndarray:
+    """Signed feature hashing of words and word pairs, L2-normalized. Cheap and fully local."""
+    words = normalized.split()
+    vector = np.zeros(dims, dtype=np.float32)
+    for feature in words + [f"{a} {b}" for a, b in zip(words, words[1:])]:
+        index, sign = _bucket(feature, dims)
+        vector[index] += sign
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+def params_key(params: Dict) -> str:
+    return json.dumps(params, sort_keys=True, separators=(",", ":"))
+
+class PromptImageCache:
+    """On-disk cache from SDXL prompt and parameters to the generated image.
+
+    Exact hits use the normalized prompt. With `similarity` set, a miss falls back
+    to the closest cached prompt with the same parameters whose embedding cosine
+    similarity reaches the threshold. Entries expire after `ttl_seconds`, and the
+    least recently used go first once there are more than `max_entries`. Hits
+    update the on-disk index at most every `save_interval` seconds, and on every
+    put or flush, so the LRU order survives a restart.
+    """
+    def __init__(self, directory: str, ttl_seconds: float = 24 * 3600, max_entries: int = 200,
+                 similarity: Optional[float] = 0.88, save_interval: float = 60):
+        self.directory = directory
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.similarity = similarity
+        self.save_interval = save_interval
+        self.index_path = os.path.join(directory, "index.json")
+        self.stats = {"lookups": 0, "hits": 0, "near_hits": 0, "misses": 0, "stores": 0,
+                      "evicted": 0, "gpu_seconds_saved": 0.0}
+        self._entries: Dict[str, Dict] = {}
+        self._embeddings: Dict[str, np.ndarray] = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._saved_at = time.time()
+        self.logger = logging.getLogger('discussion_show.prompt_cache')
+        os.makedirs(directory, exist_ok=True)
+        self._load()
+
+    @property
+    def hit_ratio(self) -> float:
+        return (self.stats["hits"] + self.stats["near_hits"]) / self.stats["lookups"] if self.stats["lookups"] else 0.0
+
+    def snapshot(self) -> Dict:
+        return {**self.stats, "entries": len(self._entries), "hit_ratio": round(self.hit_ratio, 3)}
+
+    def _key(self, normalized: str, params: str) -> str:
+        return hashlib.sha256(f"{params}\n{normalized}".encode()).hexdigest()[:32]
+
+    def _image_path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.img")
+
+    def _load(self) -> None:
+        try:
+            with open(self.index_path) as f:
+                entries = json.load(f)
+        except FileNotFoundError:
+            return
+        except ValueError as e:
+            self.logger.warning(f"Ignoring unreadable prompt cache index: {e}")
+            return
+        for key, entry in entries.items():
+            if os.path.exists(self._image_path(key)):
+                self._entries[key] = entry
+                self._embeddings[key] = embed_prompt(entry["normalized"])
+
+    def _save_index(self) -> None:
+        self._dirty = False
+        self._saved_at = time.time()
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=".index-")
+        with os.fdopen(fd, "w") as f:
+            json.dump(self._entries, f)
+        os.replace(tmp_path, self.index_path)
+
+    def _remove(self, key: str) -> None:
+        self._entries.pop(key, None)
+        self._embeddings.pop(key, None)
+        try:
+            os.remove(self._image_path(key))
+        except FileNotFoundError:
+            pass
+
+    def _expire(self, now: float) -> None:
+        for key in [key for key, entry in self._entries.items() if now - entry["created"] > self.ttl_seconds]:
+            self._remove(key)
+            self._dirty = True
+            self.stats["evicted"] += 1
+
+    def flush(self) -> None:
+        """Write last-used times from hits since the last save, e.g. on shutdown."""
+        with self._lock:
+            if self._dirty:
+                self._save_index()
+
+    def _nearest(self, embedding: np.ndarray, params: str) -> Tuple[Optional[str], float]:
+        keys = [key for key, entry in self._entries.items() if entry["params"] == params]
+        if not keys:
+            return None, 0.0
+        scores = np.stack([self._embeddings[key] for key in keys]) @ embedding
+        best = int(np.argmax(scores))
+        return keys[best], float(scores[best])
+
+    def get(self, prompt: str, params: Dict) -> Optional[str]:
+        """Cached image for this prompt, or a near-duplicate of it, if any."""
+        normalized = normalize_prompt(prompt)
+        params = params_key(params)
+        now = time.time()
+        with self._lock:
+            self.stats["lookups"] += 1
+            self._expire(now)
+            key = self._key(normalized, params)
+            kind = "hits"
+            if key not in self._entries:
+                key, score = (None, 0.0)
+                if self.similarity:
+                    key, score = self._nearest(embed_prompt(normalized), params)
+                if key is None or score < self.similarity:
+                    self.stats["misses"] += 1
+                    return None
+                kind = "near_hits"
+                self.logger.info(f"Near-duplicate prompt (similarity {score:.2f}): {self._entries[key]['prompt']}")
+        # Read without the lock, so lookups do not queue behind each other's disk reads
+        try:
+            with open(self._image_path(key)) as f:
+                image = f.read()
+        except FileNotFoundError:
+            with self._lock:
+                if not os.path.exists(self._image_path(key)):
+                    self._remove(key)
+                self.stats["misses"] += 1
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry["last_used"] = now
+                self._dirty = True
+            gpu_seconds = entry["gpu_seconds"] if entry is not None else 0.0
+            self.stats[kind] += 1
+            self.stats["gpu_seconds_saved"] += gpu_seconds
+            if self._dirty and now - self._saved_at >= self.save_interval:
+                self._save_index()
+        self.logger.info(f"Image cache {kind[:-1].replace('_', ' ')}, saved {gpu_seconds:.1f} GPU seconds")
+        return image
+
+    def put(self, prompt: str, params: Dict, image: str, gpu_seconds: float = 0.0) -> None:
+        normalized = normalize_prompt(prompt)
+        params = params_key(params)
+        key = self._key(normalized, params)
+        now = time.time()
+        with self._lock:
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=".tmp-")
+            with os.fdopen(fd, "w") as f:
+                f.write(image)
+            os.replace(tmp_path, self._image_path(key))
+            self._entries[key] = {
+                "prompt": prompt,
+                "normalized": normalized,
+                "params": params,
+                "created": now,
+                "last_used": now,
+                "gpu_seconds": gpu_seconds,
+            }
+            self._embeddings[key] = embed_prompt(normalized)
+            self.stats["stores"] += 1
+            self._expire(now)
+            while len(self._entries) > self.max_entries:
+                oldest = min(self._entries, key=lambda k: self._entries[k]["last_used"])
+                self._remove(oldest)
+                self.stats["evicted"] += 1
+            self._save_index()
@@ -1,127 +1,171 @@
 import os
-import time
+import asyncio
 import logging
-import requests
-from typing import Optional, Dict, Any
+import httpx
+from typing import Optional, Dict, Any, Sequence
+from .http_client import get_http_client
+from .runpod_jobs import RunPodJob, WebhookReceiver, JobDurationHistory, job_history
+
+RUNPOD_BASE_URL = "https://api.runpod.ai/v2"
+
+SDXL_DEFAULTS = {
+    # "num_inference_steps": 25,
+    # "refiner_inference_steps": 50,
+    "width": 512,
+    "height": 512,
+    # "guidance_scale": 7.5,
+    # "strength": 0.3,
+    # "num_images": 1
+}
 
 class RunPodAPI:
-    def __init__(self, endpoint_id: Optional[str] = None, api_key: Optional[str] = None):
+    def __init__(self, endpoint_id: Optional[str] = None, api_key: Optional[str] = None,
+                 base_url: str = RUNPOD_BASE_URL, client: Optional[httpx.AsyncClient] = None,
+                 webhook_receiver: Optional[WebhookReceiver] = None, history: JobDurationHistory = job_history):
         self.endpoint_id = endpoint_id or os.environ.get("RUNPOD_ENDPOINT")
         self.api_key = api_key or os.environ.get("RUNPOD_API_KEY")
+        self.base_url = base_url
+        self._client = client
+        self.webhook_receiver = webhook_receiver
+        self.history = history
         self.logger = logging.getLogger('discussion_show.runpod_api')
-        
+
         if not self.endpoint_id or not self.api_key:
             raise ValueError("Both endpoint_id and api_key are required")
 
+    @property
+    def client(self) -> httpx.AsyncClient:
+        return self._client or get_http_client()
+
+    def _url(self, path: str) -> str:
+        return f"{self.base_url}/{self.endpoint_id}/{path}"
+
     def _get_headers(self) -> Dict[str, str]:
         return {
             'Content-Type': 'application/json',
             'Authorization': f'Bearer {self.api_key}'
         }
 
-    def _handle_response(self, response: requests.Response, operation: str) -> Optional[Dict]:
+    def _handle_response(self, response: httpx.Response, operation: str) -> Optional[Dict]:
         """Handle API response with proper logging."""
         try:
             response.raise_for_status()
             result = response.json()
             self.logger.debug(f"RunPod {operation} response: {result}")
             return result
-        except requests.exceptions.HTTPError as e:
+        except httpx.HTTPStatusError as e:
             self.logger.error(f"HTTP error in {operation}: {e.response.status_code} - {e.response.text}")
             return None
-        except requests.exceptions.RequestException as e:
-            self.logger.error(f"Request error in {operation}: {str(e)}")
-            return None
         except ValueError as e:
             self.logger.error(f"JSON decode error in {operation}: {str(e)}")
             return None
 
-    def run_inference(self, input_data: Dict[str, Any]) -> Optional[Dict]:
+    async def run_inference(self, input_data: Dict[str, Any], webhook: Optional[str] = None) -> Optional[Dict]:
         """Start a new inference job."""
-        url = f"https://api.runpod.ai/v2/{self.endpoint_id}/run"
         self.logger.info(f"Starting inference with input: {input_data}")
+        body = {"input": input_data}
+        if webhook:
+            body["webhook"] = webhook
         try:
-            response = requests.post(
-                url,
+            response = await self.client.post(
+                self._url("run"),
                 headers=self._get_headers(),
-                json={"input": input_data},
-                timeout=30
+                json=body
             )
             return self._handle_response(response, "inference start")
-        except Exception as e:
+        except httpx.RequestError as e:
             self.logger.error(f"Failed to start inference: {str(e)}")
             return None
 
-    def get_status(self, job_id: str) -> Optional[Dict]:
-        """Check the status of a job."""
-        url = f"https://api.runpod.ai/v2/{self.endpoint_id}/status/{job_id}"
+    async def run_sync(self, input_data: Dict[str, Any], timeout: float = 120) -> Optional[Dict]:
+        """Run a job through /runsync and return the full response."""
         try:
-            response = requests.get(
-                url,
+            response = await self.client.post(
+                self._url("runsync"),
                 headers=self._get_headers(),
-                timeout=30
+                json={"input": input_data},
+                timeout=timeout
+            )
+            return self._handle_response(response, "runsync")
+        except httpx.RequestError as e:
+            self.logger.error(f"Failed to run sync job: {str(e)}")
+            return None
+
+    async def get_status(self, job_id: str) -> Optional[Dict]:
+        """Check the status of a job."""
+        try:
+            response = await self.client.get(
+                self._url(f"status/{job_id}"),
+                headers=self._get_headers()
             )
             result = self._handle_response(response, "status check")
             if result:
                 self.logger.debug(f"Job {job_id} status: {result.get('status')}")
             return result
-        except Exception as e:
+        except httpx.RequestError as e:
             self.logger.error(f"Failed to check status: {str(e)}")
             return None
 
-    def get_result(self, job_id: str, max_retries: int = 60, retry_delay: int = 2) -> Optional[Dict]:
-        """Get the result of a job with retries."""
-        retries = 0
-        while retries < max_retries:
-            status = self.get_status(job_id)
-            if not status:
-                return None
-
-            job_status = status.get("status")
-            if job_status == "COMPLETED":
-                output = status.get("output")
-                self.logger.info(f"Job {job_id} completed successfully")
-                self.logger.debug(f"Job output: {output}")
-                return output
-            elif job_status in ["FAILED", "CANCELLED"]:
-                error = status.get("error", "Unknown error")
-                self.logger.error(f"Job {job_id} failed: {error}")
-                return None
-
-            retries += 1
-            self.logger.debug(f"Job {job_id} still running, attempt {retries}/{max_retries}")
-            time.sleep(retry_delay)
-
-        self.logger.error(f"Job {job_id} timed out after {max_retries} attempts")
-        return None
-
-    def run_sdxl(self, prompt: str, **kwargs) -> Optional[Dict]:
-        """Run Stable Diffusion XL with default parameters."""
-        default_params = {
-            "prompt": prompt,
-            # "num_inference_steps": 25,
-            # "refiner_inference_steps": 50,
-            "width": 512,
-            "height": 512,
-            # "guidance_scale": 7.5,
-            # "strength": 0.3,
-            # "num_images": 1
-        }
-        
-        # Update defaults with any provided kwargs
-        input_data = {**default_params, **kwargs}
-        self.logger.info(f"Running SDXL with prompt: {prompt}")
-        self.logger.debug(f"Full parameters: {input_data}")
-        
-        # Start the job
-        job = self.run_inference(input_data)
+    async def cancel(self, job_id: str) -> Optional[Dict]:
+        """Cancel a queued or running job."""
+        try:
+            response = await self.client.post(
+                self._url(f"cancel/{job_id}"),
+                headers=self._get_headers()
+            )
+            return self._handle_response(response, "cancel")
+        except httpx.RequestError as e:
+            self.logger.error(f"Failed to cancel job {job_id}: {str(e)}")
+            return None
+
+    def job(self, job_id: str, timeout: float = 120) -> RunPodJob:
+        """Wrap an already submitted job id in an awaitable handle."""
+        completion = self.webhook_receiver.expect(job_id) if self.webhook_receiver else None
+        return RunPodJob(self, job_id, timeout=timeout, history=self.history, completion=completion)
+
+    async def submit(self, input_data: Dict[str, Any], timeout: float = 120) -> Optional[RunPodJob]:
+        """Start a job and return an awaitable handle for its output."""
+        webhook = self.webhook_receiver.url if self.webhook_receiver else None
+        job = await self.run_inference(input_data, webhook=webhook)
         if not job:
             return None
-            
+
         job_id = job.get("id")
         if not job_id:
             self.logger.error("No job ID in response")
             return None
-            
-        # Get the result
-        return self.get_result(job_id)
+        return self.job(job_id, timeout=timeout)
+
+    async def get_result(self, job_id: str, timeout: float = 120) -> Optional[Dict]:
+        """Wait for a job's output with adaptive polling (or its webhook, when configured)."""
+        return await self.job(job_id, timeout=timeout)
+
+    async def run_sdxl_job(self, prompt: str, **kwargs) -> Optional[RunPodJob]:
+        """Run Stable Diffusion XL with default parameters and return the finished job."""
+        # Update defaults with any provided kwargs
+        input_data = {"prompt": prompt, **SDXL_DEFAULTS, **kwargs}
+        self.logger.info(f"Running SDXL with prompt: {prompt}")
+        self.logger.debug(f"Full parameters: {input_data}")
+
+        # Start the job and wait for its output
+        job = await self.submit(input_data)
+        if not job:
+            return None
+        try:
+            await job
+        except asyncio.CancelledError:
+            # Nobody will look at this image; stop paying for the GPU
+            await job.cancel()
+            raise
+        return job
+
+    async def run_sdxl(self, prompt: str, **kwargs) -> Optional[Dict]:
+        """Run Stable Diffusion XL with default parameters."""
+        job = await self.run_sdxl_job(prompt, **kwargs)
+        return job.output if job else None
+
+    def run_sdxl_batch(self, prompts: Sequence[str], num_images: int = 1, max_in_flight: int = 4,
+                       endpoints: Sequence["RunPodAPI"] = (), **kwargs):
+        """Run many prompts over this and any extra endpoints; async-iterate the results as they finish."""
+        from .runpod_batch import SdxlBatch
+        return SdxlBatch([self, *endpoints], max_in_flight=max_in_flight).run(prompts, num_images, **kwargs)
@@ -0,0 +1,91 @@
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence
+
+from .runpod_api import RunPodAPI
+
+def extract_images(output: Any) -> List[str]:
+    """All images in an SDXL worker output, whichever shape the worker used."""
+    if isinstance(output, list):
+        return [item.get("image") or item.get("image_url") for item in output
+                if isinstance(item, dict) and (item.get("image") or item.get("image_url"))]
+    if isinstance(output, dict):
+        if isinstance(output.get("images"), list):
+            return [image for image in output["images"] if image]
+        image = output.get("image") or output.get("image_url")
+        return [image] if image else []
+    return [output] if output else []
+
+@dataclass
+class BatchResult:
+    index: int
+    prompt: str
+    endpoint_id: str
+    images: List[str] = field(default_factory=list)
+    job_id: Optional[str] = None
+    execution_seconds: float = 0.0
+    error: Optional[str] = None
+
+class SdxlBatch:
+    """Fan SDXL prompts out over one or more endpoints and yield results as they finish.
+
+    Each prompt is one job asking for `num_images` images, so a worker's cold start
+    and queue wait are paid once per prompt rather than once per image. At most
+    `max_in_flight` jobs run at a time, and each goes to the endpoint with the fewest
+    jobs in flight. Leaving the iterator early cancels whatever is still running.
+    """
+    def __init__(self, apis: Sequence[RunPodAPI], max_in_flight: int = 4):
+        if not apis:
+            raise ValueError("At least one endpoint is required")
+        self.apis = list(apis)
+        self.max_in_flight = max_in_flight
+        self._in_flight: Dict[str, int] = {api.endpoint_id: 0 for api in self.apis}
+        self.logger = logging.getLogger('discussion_show.sdxl_batch')
+
+    def _pick_api(self) -> RunPodAPI:
+        return min(self.apis, key=lambda api: self._in_flight[api.endpoint_id])
+
+    async def _run_one(self, semaphore: asyncio.Semaphore, index: int, prompt: str,
+                       num_images: int, params: Dict) -> BatchResult:
+        async with semaphore:
+            api = self._pick_api()
+            self._in_flight[api.endpoint_id] += 1
+            result = BatchResult(index=index, prompt=prompt, endpoint_id=api.endpoint_id)
+            try:
+                if num_images > 1:
+                    params = {**params, "num_images": num_images}
+                job = await api.run_sdxl_job(prompt, **params)
+                if job is None:
+                    result.error = "submission failed"
+                else:
+                    result.job_id = job.job_id
+                    result.execution_seconds = job.execution_seconds
+                    result.images = extract_images(job.output)
+                    if not result.images:
+                        result.error = job.error or "no images in output"
+            except Exception as e:
+                result.error = str(e)
+            finally:
+                self._in_flight[api.endpoint_id] -= 1
+            if result.error:
+                self.logger.error(f"Batch prompt {index} failed on {api.endpoint_id}: {result.error}")
+            return result
+
+    async def run(self, prompts: Sequence[str], num_images: int = 1, **params) -> AsyncIterator[BatchResult]:
+        """Yield one BatchResult per prompt, in completion order."""
+        semaphore = asyncio.Semaphore(self.max_in_flight)
+        tasks = [asyncio.ensure_future(self._run_one(semaphore, index, prompt, num_images, params))
+                 for index, prompt in enumerate(prompts)]
+        self.logger.info(f"Batch of {len(tasks)} prompts x {num_images} images over {len(self.apis)} endpoints")
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            pending = [task for task in tasks if not task.done()]
+            for task in pending:
+                task.cancel()
+            if pending:
+                # Let run_sdxl_job send its cancel requests before we return
+                await asyncio.gather(*pending, return_exceptions=True)
+                self.logger.info(f"Cancelled {len(pending)} unfinished batch jobs")
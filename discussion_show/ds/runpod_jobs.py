@@ -0,0 +1,261 @@
+import hmac
+import json
+import time
+import random
+import secrets
+import asyncio
+import logging
+import statistics
+from collections import defaultdict, deque
+from typing import Dict, Optional, Iterator, Tuple
+
+from .local_http import read_request, write_json
+
+TERMINAL_STATUSES = {"COMPLETED", "FAILED", "CANCELLED", "TIMED_OUT"}
+# Completions held for jobs whose submit() has not returned yet; that gap is a second or two at most
+MAX_EARLY_COMPLETIONS = 256
+MAX_EARLY_BYTES = 32 * 1024 * 1024
+EARLY_COMPLETION_TTL = 30.0
+
+class JobDurationHistory:
+    """Recent job durations per endpoint, used to time the first status poll."""
+    def __init__(self, maxlen: int = 20):
+        self._durations = defaultdict(lambda: deque(maxlen=maxlen))
+
+    def record(self, endpoint_id: str, seconds: float) -> None:
+        self._durations[endpoint_id].append(seconds)
+
+    def expected(self, endpoint_id: str) -> Optional[float]:
+        durations = self._durations.get(endpoint_id)
+        if not durations:
+            return None
+        return statistics.median(durations)
+
+# Shared by every RunPodAPI in the process so new instances start warm
+job_history = JobDurationHistory()
+
+class PollSchedule:
+    """Sleep out most of the expected duration, poll fast around it, then back off exponentially with jitter."""
+    def __init__(self, expected: Optional[float] = None, min_delay: float = 0.25, max_delay: float = 2.0,
+                 factor: float = 1.5, jitter: float = 0.2, fast_polls: int = 3,
+                 lead: float = 0.85, window: float = 1.3):
+        self.expected = expected
+        self.min_delay = min_delay
+        # The old fixed interval, so a long job is never noticed later than before; jitter never goes past it
+        self.max_delay = max_delay
+        self.factor = factor
+        self.jitter = jitter
+        self.fast_polls = fast_polls
+        self.lead = lead
+        self.window = window
+
+    def _jittered(self, delay: float) -> float:
+        return min(self.max_delay, delay * (1 + self.jitter * (random.random() * 2 - 1)))
+
+    def delays(self) -> Iterator[float]:
+        if self.expected:
+            elapsed = self.expected * self.lead
+            yield elapsed
+            # Most jobs on this endpoint finish inside this window
+            while elapsed < self.expected * self.window:
+                delay = self._jittered(self.min_delay)
+                elapsed += delay
+                yield delay
+        else:
+            for _ in range(self.fast_polls):
+                yield self._jittered(self.min_delay)
+        delay = self.min_delay
+        while True:
+            delay = min(self.max_delay, delay * self.factor)
+            yield self._jittered(delay)
+
+class RunPodJob:
+    """Awaitable handle for a submitted job: `output = await job`."""
+    def __init__(self, api, job_id: str, timeout: float = 120, history: JobDurationHistory = job_history,
+                 completion: Optional[asyncio.Future] = None):
+        self.api = api
+        self.job_id = job_id
+        self.timeout = timeout
+        self.history = history
+        self.completion = completion
+        self.submitted_at = time.monotonic()
+        self.status: Optional[str] = None
+        self.output = None
+        self.error = None
+        self.polls = 0
+        self.execution_seconds = 0.0
+        self._task: Optional[asyncio.Task] = None
+        self.logger = logging.getLogger('discussion_show.runpod_job')
+
+    @property
+    def done(self) -> bool:
+        return self.status in TERMINAL_STATUSES
+
+    def __await__(self):
+        return self.wait().__await__()
+
+    async def wait(self):
+        """Return the job output, or None if it failed, was cancelled or timed out."""
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+        return await asyncio.shield(self._task)
+
+    async def cancel(self) -> None:
+        if not self.done:
+            await self.api.cancel(self.job_id)
+            self.status = "CANCELLED"
+        if self._task is not None:
+            self._task.cancel()
+
+    async def _run(self):
+        try:
+            status = await asyncio.wait_for(self._wait_for_status(), self.timeout)
+        except asyncio.TimeoutError:
+            self.status = "TIMED_OUT"
+            self.logger.error(f"Job {self.job_id} timed out after {self.timeout}s ({self.polls} polls)")
+            # Nobody is waiting for the output any more; stop the GPU working on it
+            await self.api.cancel(self.job_id)
+            return None
+        return self._finish(status)
+
+    async def _wait_for_status(self) -> Dict:
+        if self.completion is None:
+            return await self._poll(PollSchedule(expected=self.history.expected(self.api.endpoint_id)))
+
+        # A webhook should arrive first; slow polling only covers a lost callback
+        poll = asyncio.ensure_future(self._poll(PollSchedule(min_delay=5.0, max_delay=15.0, fast_polls=0, jitter=0.3)))
+        try:
+            done, _ = await asyncio.wait({self.completion, poll}, return_when=asyncio.FIRST_COMPLETED)
+            return done.pop().result()
+        finally:
+            # Also on timeout or cancellation; cancelling the completion drops it from the receiver
+            poll.cancel()
+            self.completion.cancel()
+
+    async def _poll(self, schedule: PollSchedule) -> Dict:
+        for delay in schedule.delays():
+            await asyncio.sleep(delay)
+            status = await self.api.get_status(self.job_id)
+            self.polls += 1
+            if status is None:
+                return {"status": "FAILED", "error": "status check failed"}
+            if status.get("status") in TERMINAL_STATUSES:
+                return status
+            self.logger.debug(f"Job {self.job_id} {status.get('status')}, poll {self.polls}")
+
+    def _finish(self, status: Dict):
+        self.status = status.get("status")
+        if self.status == "COMPLETED":
+            self.output = status.get("output")
+            # Prefer RunPod's own timings over our detection time, which includes polling lag
+            if "executionTime" in status:
+                duration = (status.get("delayTime", 0) + status["executionTime"]) / 1000
+                self.execution_seconds = status["executionTime"] / 1000
+            else:
+                duration = self.execution_seconds = time.monotonic() - self.submitted_at
+            self.history.record(self.api.endpoint_id, duration)
+            self.logger.info(f"Job {self.job_id} completed in {duration:.2f}s after {self.polls} polls")
+            return self.output
+
+        self.error = status.get("error", "Unknown error")
+        self.logger.error(f"Job {self.job_id} {self.status}: {self.error}")
+        return None
+
+class WebhookReceiver:
+    """Local endpoint that RunPod POSTs job completions to, resolving the matching RunPodJob.
+
+    Only POSTs to the path plus `secret` are accepted, so nobody who can reach
+    the port can complete a job with an image of their choosing. Without a
+    configured secret a random one is made per process. It listens on localhost
+    only unless `host` says otherwise; put a tunnel in front for RunPod to reach it.
+    """
+    def __init__(self, host: str = "127.0.0.1", port: int = 8787, public_url: Optional[str] = None,
+                 path: str = "/runpod/webhook", secret: Optional[str] = None):
+        self.host = host
+        self.port = port
+        self.secret = secret or secrets.token_urlsafe(24)
+        self.path = f"{path.rstrip('/')}/{self.secret}"
+        self.public_url = public_url
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._waiting: Dict[str, asyncio.Future] = {}
+        # Completions that arrive before submit() has returned the job id: (arrived, size, payload)
+        self._early: Dict[str, Tuple[float, int, Dict]] = {}
+        self._early_bytes = 0
+        self.logger = logging.getLogger('discussion_show.webhook_receiver')
+
+    @property
+    def url(self) -> str:
+        if self.public_url:
+            return f"{self.public_url.rstrip('/')}/{self.secret}"
+        return f"http://{self.host}:{self.port}{self.path}"
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        self.logger.info(f"Listening for RunPod webhooks on {self.url}")
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        for future in self._waiting.values():
+            future.cancel()
+        self._waiting.clear()
+
+    def expect(self, job_id: str) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        self._prune_early()
+        if job_id in self._early:
+            _, size, payload = self._early.pop(job_id)
+            self._early_bytes -= size
+            future.set_result(payload)
+        else:
+            self._waiting[job_id] = future
+            future.add_done_callback(lambda _: self._waiting.pop(job_id, None))
+        return future
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                request = await read_request(reader)
+                if request is None:
+                    break
+                method, path, _, body = request
+                if method != "POST" or not hmac.compare_digest(path.split("?")[0].encode(), self.path.encode()):
+                    await write_json(writer, 404, {"error": "not found"})
+                    continue
+                try:
+                    payload = json.loads(body)
+                except ValueError:
+                    await write_json(writer, 400, {"error": "invalid json"})
+                    continue
+                self._resolve(payload, len(body))
+                await write_json(writer, 200, {"ok": True})
+        finally:
+            writer.close()
+
+    def _resolve(self, payload: Dict, size: int = 0) -> None:
+        job_id = payload.get("id")
+        if not job_id:
+            self.logger.warning(f"Webhook without job id: {payload}")
+            return
+        future = self._waiting.get(job_id)
+        if future is not None and not future.done():
+            future.set_result(payload)
+        else:
+            self._early[job_id] = (time.monotonic(), size, payload)
+            self._early_bytes += size
+            self._prune_early()
+        self.logger.debug(f"Webhook for job {job_id}: {payload.get('status')}")
+
+    def _prune_early(self) -> None:
+        """Drop early completions nobody claimed in time, oldest first, and keep the rest under the caps."""
+        expired = time.monotonic() - EARLY_COMPLETION_TTL
+        while self._early:
+            job_id, (arrived, size, _) = next(iter(self._early.items()))
+            if (arrived > expired and len(self._early) <= MAX_EARLY_COMPLETIONS
+                    and self._early_bytes <= MAX_EARLY_BYTES):
+                break
+            del self._early[job_id]
+            self._early_bytes -= size
@@ -0,0 +1,148 @@
+import time
+import asyncio
+import logging
+from typing import Dict, Optional
+
+from .image_scheduler import ImageJobScheduler
+
+class SessionView:
+    """What a session needs from its page. The NiceGUI page and the load test both implement it."""
+    def show_transcript(self, text: str) -> None:
+        pass
+
+    def show_progress(self, percentage: int) -> None:
+        pass
+
+    def show_prompt(self, prompt: str) -> None:
+        pass
+
+    def set_status(self, text: str) -> None:
+        pass
+
+    async def show_image(self, base64_image: str, prompt: str) -> None:
+        pass
+
+class DiscussionSession:
+    """Everything one browser tab owns: its context buffer, transcription stream, image queue and view."""
+    def __init__(self, client_id: str, transcriber, context_buffer, generator, view: SessionView,
+                 streaming: bool = True, max_concurrent_images: int = 1):
+        self.client_id = client_id
+        self.transcriber = transcriber
+        self.context_buffer = context_buffer
+        self.view = view
+        self.streaming = streaming
+        self.transcription = transcriber.create_session() if streaming else None
+        self.scheduler = ImageJobScheduler(
+            generator,
+            on_image=view.show_image,
+            max_concurrent=max_concurrent_images,
+            on_status=view.set_status
+        )
+        self.recording = False
+        self.last_active = time.monotonic()
+        self.closed = False
+        self.logger = logging.getLogger('discussion_show.session')
+
+    def touch(self) -> None:
+        self.last_active = time.monotonic()
+
+    async def handle_audio(self, base64_audio: str) -> Optional[str]:
+        """Transcribe one recorder blob and act on the text; returns what was transcribed."""
+        self.touch()
+        if self.transcription is not None:
+            transcription = await self.transcription.feed(base64_audio)
+            if not self.recording:
+                # The recorder emits one last blob after the switch is turned off
+                pending = await self.transcription.flush()
+                transcription = " ".join(text for text in (transcription, pending) if text) or None
+        else:
+            transcription = await self.transcriber.transcribe(base64_audio)
+        if transcription and not self.closed:
+            await self.handle_transcription(transcription)
+        return transcription
+
+    async def handle_transcription(self, transcription: str) -> None:
+        self.logger.info(f"Successfully transcribed audio for client {self.client_id}")
+        self.context_buffer.add_to_context(transcription)
+        self.view.show_progress(self.context_buffer.get_fill_percentage())
+        self.view.show_transcript(transcription)
+
+        if self.context_buffer.is_full_enough():
+            self.logger.info("Context buffer full, generating image")
+            image_prompt = await self.context_buffer.generate_image_prompt()
+            # The pending speech is consumed now, whatever the outcome
+            self.view.show_progress(self.context_buffer.get_fill_percentage())
+            if image_prompt and not self.closed:
+                self.logger.debug(f"Generated image prompt: {image_prompt}")
+                self.view.show_prompt(image_prompt)
+                # Only the newest prompt is still relevant
+                self.scheduler.submit(image_prompt)
+
+    async def close(self) -> None:
+        self.closed = True
+        await self.scheduler.close()
+
+class SessionRegistry:
+    """Sessions keyed by client id; sessions with no audio for `idle_seconds` are closed and dropped."""
+    def __init__(self, idle_seconds: float = 900, sweep_seconds: float = 60):
+        self.idle_seconds = idle_seconds
+        self.sweep_seconds = sweep_seconds
+        self._sessions: Dict[str, DiscussionSession] = {}
+        self._sweeper: Optional[asyncio.Task] = None
+        self.stats = {"created": 0, "closed": 0, "evicted": 0}
+        self.logger = logging.getLogger('discussion_show.session_registry')
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def get(self, client_id: str) -> Optional[DiscussionSession]:
+        return self._sessions.get(client_id)
+
+    def add(self, session: DiscussionSession) -> DiscussionSession:
+        previous = self._sessions.get(session.client_id)
+        if previous is not None and previous is not session:
+            asyncio.ensure_future(previous.close())
+        self._sessions[session.client_id] = session
+        self.stats["created"] += 1
+        self.logger.info(f"Session started for client {session.client_id} ({len(self._sessions)} active)")
+        return session
+
+    async def drop(self, client_id: str) -> None:
+        session = self._sessions.pop(client_id, None)
+        if session is not None:
+            self.stats["closed"] += 1
+            await session.close()
+            self.logger.info(f"Session closed for client {client_id} ({len(self._sessions)} active)")
+
+    async def evict_idle(self, now: Optional[float] = None) -> int:
+        now = time.monotonic() if now is None else now
+        idle = [client_id for client_id, session in self._sessions.items()
+                if not session.recording and now - session.last_active > self.idle_seconds]
+        for client_id in idle:
+            self.stats["evicted"] += 1
+            await self.drop(client_id)
+        return len(idle)
+
+    async def _sweep(self) -> None:
+        while True:
+            await asyncio.sleep(self.sweep_seconds)
+            try:
+                evicted = await self.evict_idle()
+                if evicted:
+                    self.logger.info(f"Evicted {evicted} idle sessions")
+            except Exception as e:
+                self.logger.error(f"Error evicting idle sessions: {str(e)}", exc_info=True)
+
+    def start(self) -> None:
+        if self._sweeper is None:
+            self._sweeper = asyncio.ensure_future(self._sweep())
+
+    async def close(self) -> None:
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            self._sweeper = None
+        for client_id in list(self._sessions):
+            await self.drop(client_id)
+
+    def snapshot(self) -> Dict:
+        return {"active": len(self._sessions), **self.stats}
@@ -0,0 +1,140 @@
+import re
+import asyncio
+import logging
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+from .audio import SAMPLE_RATE, SAMPLE_WIDTH
+
+def ms_to_bytes(ms: float, sample_rate: int = SAMPLE_RATE) -> int:
+    return int(sample_rate * ms / 1000) * SAMPLE_WIDTH
+
+def bytes_to_ms(size: int, sample_rate: int = SAMPLE_RATE) -> float:
+    return size / (sample_rate * SAMPLE_WIDTH) * 1000
+
+class PcmRingBuffer:
+    """Fixed-capacity PCM store addressed by absolute byte offsets since the session started."""
+    def __init__(self, capacity: int):
+        self.capacity = capacity - capacity % SAMPLE_WIDTH
+        self._buffer = bytearray(self.capacity)
+        self.end = 0
+
+    @property
+    def start(self) -> int:
+        return max(0, self.end - self.capacity)
+
+    def append(self, pcm: bytes) -> None:
+        view = memoryview(pcm)
+        if len(view) > self.capacity:
+            self.end += len(view) - self.capacity
+            view = view[-self.capacity:]
+        pos = self.end % self.capacity
+        first = min(len(view), self.capacity - pos)
+        self._buffer[pos:pos + first] = view[:first]
+        self._buffer[:len(view) - first] = view[first:]
+        self.end += len(view)
+
+    def read(self, start: int, end: int) -> bytes:
+        """Copy out [start, end), clamped to what is still buffered."""
+        start = max(start, self.start)
+        end = min(end, self.end)
+        if end <= start:
+            return b""
+        a, b = start % self.capacity, end % self.capacity
+        if a < b:
+            return bytes(self._buffer[a:b])
+        return bytes(self._buffer[a:]) + bytes(self._buffer[:b])
+
+_WORD_CHARS = re.compile(r"[^\w']+")
+
+def _normalize(word: str) -> str:
+    return _WORD_CHARS.sub("", word.lower())
+
+def merge_overlap(previous_words: List[str], text: str, max_overlap: int = 30, max_skip: int = 2,
+                  min_match: int = 2) -> str:
+    """Drop the start of `text` that repeats the end of the previous window's transcript.
+
+    The overlap may start a word or two into the new window, because the window
+    edge can cut a word that Whisper then mishears or drops. Single-word matches
+    are ignored by default since common words repeat naturally.
+    """
+    words = text.split()
+    previous = [_normalize(w) for w in previous_words[-max_overlap:]]
+    current = [_normalize(w) for w in words]
+    for k in range(min(len(previous), len(current)), min_match - 1, -1):
+        for skip in range(0, min(max_skip, len(current) - k) + 1):
+            if previous[-k:] == current[skip:skip + k]:
+                return " ".join(words[skip + k:])
+    return text
+
+class TranscriptionSession:
+    """Streaming transcription for one client over a rolling PCM buffer.
+
+    Blobs are decoded once and appended to the ring buffer. A window is sent only
+    after `step_ms` of new speech has built up, or when speech is followed by
+    `silence_flush_ms` of silence. Each window repeats `overlap_ms` of audio from
+    before, so words cut at a blob boundary are heard whole, and the repeated text
+    is removed from the result.
+    """
+    def __init__(self, decode: Callable[[str], Awaitable[Tuple[bytes, float]]],
+                 transcribe: Callable[[bytes], Awaitable[Optional[str]]],
+                 step_ms: int = 6000, overlap_ms: int = 1500, silence_flush_ms: int = 1500,
+                 buffer_ms: int = 30000, sample_rate: int = SAMPLE_RATE):
+        self.decode = decode
+        self.transcribe = transcribe
+        self.step_ms = step_ms
+        self.overlap_ms = overlap_ms
+        self.silence_flush_ms = silence_flush_ms
+        self.sample_rate = sample_rate
+        self.ring = PcmRingBuffer(ms_to_bytes(buffer_ms, sample_rate))
+        self.transcribed_end = 0
+        self.pending_voiced_ms = 0.0
+        self.trailing_silence_ms = 0.0
+        self.recent_words: List[str] = []
+        self.windows_sent = 0
+        self._lock = asyncio.Lock()
+        self.logger = logging.getLogger('discussion_show.transcription_session')
+
+    async def feed(self, audio_blob_base64: str) -> Optional[str]:
+        """Add one recorder blob; returns newly transcribed text when a window was sent."""
+        async with self._lock:
+            pcm, voiced_ms = await self.decode(audio_blob_base64)
+            if not pcm:
+                return None
+            self.ring.append(pcm)
+            if voiced_ms > 0:
+                self.pending_voiced_ms += voiced_ms
+                self.trailing_silence_ms = 0.0
+            else:
+                self.trailing_silence_ms += bytes_to_ms(len(pcm), self.sample_rate)
+
+            if self.pending_voiced_ms >= self.step_ms or (
+                    self.pending_voiced_ms > 0 and self.trailing_silence_ms >= self.silence_flush_ms):
+                return await self._transcribe_window()
+
+            if self.pending_voiced_ms == 0:
+                # Nothing worth sending yet; never resend this silence
+                self.transcribed_end = self.ring.end
+            return None
+
+    async def flush(self) -> Optional[str]:
+        """Transcribe whatever speech is still pending, e.g. when recording stops."""
+        async with self._lock:
+            if self.pending_voiced_ms > 0:
+                return await self._transcribe_window()
+            return None
+
+    async def _transcribe_window(self) -> Optional[str]:
+        end = self.ring.end
+        start = max(self.ring.start, self.transcribed_end - ms_to_bytes(self.overlap_ms, self.sample_rate))
+        window = self.ring.read(start, end)
+        self.transcribed_end = end
+        self.pending_voiced_ms = 0.0
+        self.windows_sent += 1
+        self.logger.debug(f"Transcribing window {self.windows_sent}: {bytes_to_ms(len(window), self.sample_rate):.0f} ms")
+
+        text = await self.transcribe(window)
+        if not text:
+            return None
+        new_text = merge_overlap(self.recent_words, text.strip())
+        self.recent_words = (self.recent_words + text.split())[-50:]
+        return new_text or None
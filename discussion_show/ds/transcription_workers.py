@@ -0,0 +1,249 @@
+import os
+import time
+import base64
+import asyncio
+import logging
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import resource_tracker, shared_memory
+from typing import Dict, Optional, Tuple
+
+import httpx
+
+from .audio import AudioPipeline, DecodedAudio
+from .vad import VoiceActivityDetector
+
+RUNPOD_BASE_URL = "https://api.runpod.ai/v2"
+MAX_UPLOAD_BYTES = 25 * 1024 * 1024
+
+# ---- worker process side ----
+
+_state = None
+
+class WorkerState:
+    """Decoder, detector and HTTP client that live for the whole life of one worker process."""
+    def __init__(self, config: Dict):
+        self.config = config
+        self.pipeline = AudioPipeline()
+        self.detector = VoiceActivityDetector()
+        self.http = httpx.Client(
+            timeout=httpx.Timeout(120.0, connect=10.0),
+            limits=httpx.Limits(max_connections=4, max_keepalive_connections=2)
+        )
+        self.openai = None
+        if config["provider"] == "openai":
+            from openai import OpenAI
+            self.openai = OpenAI(api_key=config["openai_api_key"], http_client=self.http)
+        self.logger = logging.getLogger('discussion_show.transcription_worker')
+
+    def trim_silence(self, audio: DecodedAudio, vad) -> DecodedAudio:
+        """Cut the audio down to its voiced segments before upload."""
+        if not self.config["trim_silence"]:
+            return audio
+        trimmed = audio.trimmed(vad.speech_segments(self.config["trim_padding_ms"]))
+        if not trimmed.pcm:
+            return audio
+        # Encoded size scales with duration, so report savings as a share of the PCM
+        saved = len(audio.pcm) - len(trimmed.pcm)
+        logging.getLogger('discussion_show.transcriber').info(
+            f"Silence trimming kept {trimmed.duration_ms}/{audio.duration_ms} ms, "
+            f"saved {saved} PCM bytes ({saved / len(audio.pcm) * 100:.1f}%)"
+        )
+        return trimmed
+
+    def upload(self, body: bytes, upload_format: str) -> Optional[str]:
+        if self.config["provider"] == "openai":
+            transcript = self.openai.audio.transcriptions.create(
+                model="whisper-1",
+                file=(f"audio.{upload_format}", body)
+            )
+            return transcript.text
+
+        response = self.http.post(
+            f"{RUNPOD_BASE_URL}/{self.config['runpod_whisper_endpoint_id']}/runsync",
+            headers={
+                "Authorization": f"Bearer {self.config['runpod_api_key']}",
+                "Content-Type": "application/json"
+            },
+            json={"input": runpod_whisper_input(body)}
+        )
+        response.raise_for_status()
+        result = response.json()
+        if result and "output" in result:
+            return result["output"].get("transcription")
+        self.logger.error("No transcript in RunPod response")
+        return None
+
+def runpod_whisper_input(body: bytes) -> Dict:
+    return {
+        "audio_base64": base64.b64encode(body).decode(),
+        "model": "base",
+        "transcription": "plain_text",
+        "translate": False,
+        "language": None,
+        "temperature": 0,
+        "best_of": 5,
+        "beam_size": 5,
+        "enable_vad": True
+    }
+
+def _init_worker(config: Dict) -> None:
+    global _state
+    _state = WorkerState(config)
+
+def _ping(delay: float) -> int:
+    time.sleep(delay)
+    return os.getpid()
+
+def _write_shared(data) -> Tuple[str, int]:
+    shm = shared_memory.SharedMemory(create=True, size=max(1, len(data)))
+    shm.buf[:len(data)] = data
+    name = shm.name
+    shm.close()
+    # The event loop side reads and unlinks it, so this process no longer owns it
+    resource_tracker.unregister(shm._name, "shared_memory")
+    return name, len(data)
+
+def _read_shared(name: str, size: int, unlink: bool = False) -> bytes:
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        return bytes(shm.buf[:size])
+    finally:
+        shm.close()
+        if unlink:
+            shm.unlink()
+        else:
+            # Attaching registers the block with this process's tracker, which would
+            # "clean up" the owner's block again at exit
+            resource_tracker.unregister(shm._name, "shared_memory")
+
+def _decode_job(name: str, size: int, mime_type: str, submitted_at: float):
+    timings = {"queue": time.time() - submitted_at}
+    started = time.perf_counter()
+    audio = _state.pipeline.decode_bytes(_read_shared(name, size), mime_type)
+    timings["decode"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    vad = _state.detector.detect(audio.pcm, audio.sample_rate)
+    timings["vad"] = time.perf_counter() - started
+    return _write_shared(audio.pcm), vad.voice_frames * vad.frame_ms, timings
+
+def _transcribe_job(name: str, size: int, submitted_at: float):
+    timings = {"queue": time.time() - submitted_at}
+    audio = DecodedAudio(_read_shared(name, size), "audio/pcm")
+
+    started = time.perf_counter()
+    vad = _state.detector.detect(audio.pcm, audio.sample_rate)
+    timings["vad"] = time.perf_counter() - started
+    if not vad.has_voice():
+        _state.logger.info(f"No significant voice activity detected ({vad.percentage:.1f}% speech)")
+        return None, timings
+
+    started = time.perf_counter()
+    upload_format = "ogg" if _state.config["provider"] == "runpod" else _state.config["upload_format"]
+    body = _state.pipeline.encode(_state.trim_silence(audio, vad), upload_format)
+    timings["encode"] = time.perf_counter() - started
+    if len(body) > MAX_UPLOAD_BYTES:
+        raise ValueError("Audio file too large (>25MB)")
+
+    started = time.perf_counter()
+    text = _state.upload(body, upload_format)
+    timings["upload"] = time.perf_counter() - started
+    return text, timings
+
+# ---- event loop side ----
+
+class PoolMetrics:
+    """Queue depth and rolling per-stage timings for the worker pool."""
+    def __init__(self, workers: int, window: int = 200):
+        self.workers = workers
+        self.pending = 0
+        self.completed = 0
+        self.failed = 0
+        self._stages = defaultdict(lambda: deque(maxlen=window))
+
+    @property
+    def queue_depth(self) -> int:
+        return max(0, self.pending - self.workers)
+
+    def record(self, timings: Dict[str, float]) -> None:
+        for stage, seconds in timings.items():
+            self._stages[stage].append(seconds * 1000)
+
+    def snapshot(self) -> Dict:
+        stages = {}
+        for stage, values in self._stages.items():
+            ordered = sorted(values)
+            stages[stage] = {
+                "count": len(ordered),
+                "mean_ms": round(sum(ordered) / len(ordered), 2),
+                "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 2),
+            }
+        return {
+            "workers": self.workers,
+            "pending": self.pending,
+            "queue_depth": self.queue_depth,
+            "completed": self.completed,
+            "failed": self.failed,
+            "stages": stages,
+        }
+
+class TranscriptionWorkerPool:
+    """Warm worker processes for decoding and transcription; audio crosses over in shared memory."""
+    def __init__(self, config: Dict, workers: int = 2):
+        self.config = config
+        self.workers = workers
+        self.metrics = PoolMetrics(workers)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self.logger = logging.getLogger('discussion_show.transcription_pool')
+
+    async def start(self) -> None:
+        self._executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker, initargs=(self.config,))
+        # Overlapping pings make the executor start (and initialize) every worker now
+        loop = asyncio.get_running_loop()
+        pids = await asyncio.gather(*[loop.run_in_executor(self._executor, _ping, 0.2) for _ in range(self.workers)])
+        self.logger.info(f"Transcription workers ready: {sorted(set(pids))}")
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def _run(self, fn, *args):
+        self.metrics.pending += 1
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        except Exception:
+            self.metrics.failed += 1
+            raise
+        finally:
+            self.metrics.pending -= 1
+        self.metrics.completed += 1
+        self.metrics.record(result[-1])
+        return result
+
+    @staticmethod
+    def _share(data: bytes) -> shared_memory.SharedMemory:
+        shm = shared_memory.SharedMemory(create=True, size=max(1, len(data)))
+        shm.buf[:len(data)] = data
+        return shm
+
+    async def decode(self, audio_data: bytes, mime_type: str) -> Tuple[bytes, float]:
+        """Decode container bytes; returns the PCM and how many ms of it are speech."""
+        shm = self._share(audio_data)
+        try:
+            (pcm_name, pcm_size), voiced_ms, _ = await self._run(_decode_job, shm.name, len(audio_data), mime_type, time.time())
+        finally:
+            shm.close()
+            shm.unlink()
+        return _read_shared(pcm_name, pcm_size, unlink=True), voiced_ms
+
+    async def transcribe(self, pcm: bytes) -> Optional[str]:
+        """Gate, trim, encode and upload one PCM window inside a worker."""
+        shm = self._share(pcm)
+        try:
+            text, _ = await self._run(_transcribe_job, shm.name, len(pcm), time.time())
+        finally:
+            shm.close()
+            shm.unlink()
+        return text
@@ -0,0 +1,101 @@
+import math
+import logging
+from typing import List, Tuple
+import numpy as np
+import webrtcvad
+
+from .audio import SAMPLE_RATE, SAMPLE_WIDTH
+
+# webrtcvad only accepts 10, 20 or 30 ms frames
+FRAME_MS = 30
+# Frames quieter than this RMS (int16 scale, roughly -44 dBFS) never reach webrtcvad
+ENERGY_THRESHOLD = 200
+# Quiet frames with this many sign changes per sample may be unvoiced consonants
+ZCR_THRESHOLD = 0.25
+
+class VadResult:
+    """Per-frame speech flags for one PCM buffer."""
+    def __init__(self, flags: np.ndarray, frame_ms: int, sample_rate: int, checked_frames: int):
+        self.flags = flags
+        self.frame_ms = frame_ms
+        self.sample_rate = sample_rate
+        self.checked_frames = checked_frames
+
+    @property
+    def total_frames(self) -> int:
+        return len(self.flags)
+
+    @property
+    def voice_frames(self) -> int:
+        return int(np.count_nonzero(self.flags))
+
+    @property
+    def percentage(self) -> float:
+        if self.total_frames == 0:
+            return 0.0
+        return (self.voice_frames / self.total_frames) * 100
+
+    @property
+    def frame_bytes(self) -> int:
+        return int(self.sample_rate * self.frame_ms / 1000) * SAMPLE_WIDTH
+
+    def has_voice(self, min_percentage: float = 10) -> bool:
+        return self.percentage > min_percentage
+
+    def speech_segments(self, padding_ms: int = 0) -> List[Tuple[int, int]]:
+        """Byte ranges of voiced frames, each widened by padding_ms; overlapping ranges are merged."""
+        voiced = np.flatnonzero(self.flags)
+        if len(voiced) == 0:
+            return []
+        pad = int(math.ceil(padding_ms / self.frame_ms))
+        # Two voiced frames end up in one segment when their padded ranges touch
+        breaks = np.flatnonzero(np.diff(voiced) > 2 * pad + 1)
+        starts = np.concatenate(([voiced[0]], voiced[breaks + 1]))
+        ends = np.concatenate((voiced[breaks], [voiced[-1]]))
+        frame_bytes = self.frame_bytes
+        return [
+            (int(max(0, start - pad)) * frame_bytes, int(min(self.total_frames, end + 1 + pad)) * frame_bytes)
+            for start, end in zip(starts, ends)
+        ]
+
+class VoiceActivityDetector:
+    """Frame a contiguous PCM buffer without copying and run one shared webrtcvad detector."""
+    def __init__(self, aggressiveness: int = 3, frame_ms: int = FRAME_MS,
+                 energy_threshold: float = ENERGY_THRESHOLD, zcr_threshold: float = ZCR_THRESHOLD):
+        self.vad = webrtcvad.Vad(aggressiveness)
+        self.frame_ms = frame_ms
+        self.energy_threshold = energy_threshold
+        self.zcr_threshold = zcr_threshold
+        self.logger = logging.getLogger('discussion_show.vad')
+
+    def frames(self, pcm, sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+        """Return an (n_frames, samples_per_frame) int16 view over the buffer; the tail is dropped."""
+        samples_per_frame = int(sample_rate * self.frame_ms / 1000)
+        samples = np.frombuffer(pcm, dtype=np.int16, count=len(pcm) // SAMPLE_WIDTH)
+        n_frames = len(samples) // samples_per_frame
+        return samples[:n_frames * samples_per_frame].reshape(n_frames, samples_per_frame)
+
+    def prefilter(self, frames: np.ndarray) -> np.ndarray:
+        """Cheap energy/zero-crossing gate; False means the frame is silent and skips webrtcvad."""
+        if len(frames) == 0:
+            return np.zeros(0, dtype=bool)
+        as_float = frames.astype(np.float32)
+        rms = np.sqrt(np.einsum('ij,ij->i', as_float, as_float) / frames.shape[1])
+        zcr = np.count_nonzero(np.diff(np.signbit(frames), axis=1), axis=1) / frames.shape[1]
+        return (rms >= self.energy_threshold) | ((rms >= self.energy_threshold / 2) & (zcr >= self.zcr_threshold))
+
+    def detect(self, pcm, sample_rate: int = SAMPLE_RATE) -> VadResult:
+        frames = self.frames(pcm, sample_rate)
+        flags = np.zeros(len(frames), dtype=bool)
+        candidates = np.flatnonzero(self.prefilter(frames))
+
+        frame_bytes = frames.shape[1] * SAMPLE_WIDTH if len(frames) else 0
+        view = memoryview(pcm)
+        for i in candidates:
+            start = int(i) * frame_bytes
+            flags[i] = self.vad.is_speech(view[start:start + frame_bytes], sample_rate)
+
+        result = VadResult(flags, self.frame_ms, sample_rate, checked_frames=len(candidates))
+        self.logger.debug(f"VAD: {result.voice_frames}/{result.total_frames} speech frames "
+                          f"({result.percentage:.1f}%), {result.total_frames - len(candidates)} skipped by pre-filter")
+        return result
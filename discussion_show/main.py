@@ -1,23 +1,24 @@
 from nicegui import ui, run, app
 from nicegui.element import Element
 from ds.image_generator import ImageGenerator  # Updated import
+from ds.audio import AudioPipeline
+from ds.runpod_jobs import WebhookReceiver
+from ds.sessions import DiscussionSession, SessionRegistry, SessionView
+from ds.transcription_session import TranscriptionSession
+from ds.transcription_workers import TranscriptionWorkerPool
+from ds.context_buffer import TranscriptContext
+from ds.image_store import ImageStore
+from ds.prompt_cache import PromptImageCache
+from ds.http_client import close_http_client
 from dotenv import load_dotenv
 from typing import Callable, Optional
 from openai import OpenAI
 import os
 import base64
-import tempfile
-import time
-from pydub import AudioSegment, silence
-import io
 import asyncio
 import logging
 import sys
 from datetime import datetime
-import webrtcvad
-import wave
-import array
-import requests
 
 # Configure logging
 def setup_logger():
@@ -73,374 +74,285 @@ RUNPOD_ENDPOINT_ID=os.getenv("RUNPOD_ENDPOINT_ID")
 RUNPOD_WHISPER_ENDPOINT_ID=os.getenv("RUNPOD_WHISPER_ENDPOINT_ID")
 RUNPOD_SDXL_ENDPOINT_ID=os.getenv("RUNPOD_SDXL_ENDPOINT_ID")
 WHISPER_PROVIDER=os.getenv("WHISPER_PROVIDER", "openai")  # Default to OpenAI if not set
-FULL_ENOUGH=500 # 2000 is also a good value
-# FULL_ENOUGH=1000
+# Public URL RunPod can reach; when set, job completions arrive by webhook instead of polling
+RUNPOD_WEBHOOK_URL=os.getenv("RUNPOD_WEBHOOK_URL")
+RUNPOD_WEBHOOK_PORT=int(os.getenv("RUNPOD_WEBHOOK_PORT", "8787"))
+RUNPOD_WEBHOOK_HOST=os.getenv("RUNPOD_WEBHOOK_HOST", "127.0.0.1")
+RUNPOD_WEBHOOK_SECRET=os.getenv("RUNPOD_WEBHOOK_SECRET")
+IMAGE_MAX_CONCURRENT=int(os.getenv("IMAGE_MAX_CONCURRENT", "1"))  # SDXL jobs in flight at once, per session
+# Reuse images for repeated or near-identical prompts (similarity 0 means exact matches only)
+IMAGE_CACHE=os.getenv("IMAGE_CACHE", "true").lower() == "true"
+IMAGE_CACHE_TTL_HOURS=float(os.getenv("IMAGE_CACHE_TTL_HOURS", "24"))
+IMAGE_CACHE_MAX_ENTRIES=int(os.getenv("IMAGE_CACHE_MAX_ENTRIES", "200"))
+IMAGE_CACHE_SIMILARITY=float(os.getenv("IMAGE_CACHE_SIMILARITY", "0.88"))
+SESSION_IDLE_SECONDS=int(os.getenv("SESSION_IDLE_SECONDS", "900"))  # drop tabs that sent no audio for this long
+WHISPER_UPLOAD_FORMAT=os.getenv("WHISPER_UPLOAD_FORMAT", "ogg")  # "wav" skips the encoder entirely
+TRIM_SILENCE=os.getenv("TRIM_SILENCE", "true").lower() == "true"  # upload only voiced segments
+TRIM_PADDING_MS=int(os.getenv("TRIM_PADDING_MS", "200"))
+# Streaming sessions send a window once this much new speech has arrived, repeating the overlap
+STREAMING_TRANSCRIPTION=os.getenv("STREAMING_TRANSCRIPTION", "true").lower() == "true"
+STREAM_STEP_MS=int(os.getenv("STREAM_STEP_MS", "6000"))
+STREAM_OVERLAP_MS=int(os.getenv("STREAM_OVERLAP_MS", "1500"))
+TRANSCRIPTION_WORKERS=int(os.getenv("TRANSCRIPTION_WORKERS", "2"))  # warm decode/upload processes
+# New transcript tokens that trigger an image prompt (about 500 characters; 500 tokens is also a good value)
+FULL_ENOUGH=int(os.getenv("CONTEXT_FULL_TOKENS", "120"))
+# Summary plus recent transcript sent with each prompt; older speech is folded into the summary
+CONTEXT_TOKEN_BUDGET=int(os.getenv("CONTEXT_TOKEN_BUDGET", "1500"))
+CONTEXT_SUMMARY_TOKENS=int(os.getenv("CONTEXT_SUMMARY_TOKENS", "200"))
+# Generated images kept under static/images; least recently shown are deleted first
+IMAGE_STORE_MAX_MB=int(os.getenv("IMAGE_STORE_MAX_MB", "500"))
+IMAGE_STORE_MAX_FILES=int(os.getenv("IMAGE_STORE_MAX_FILES", "200"))
 
 # Get the absolute path for the images directory
 CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
 STATIC_DIR = os.path.join(CURRENT_DIR, "static")
 IMAGES_DIR = os.path.join(STATIC_DIR, "images")
-os.makedirs(IMAGES_DIR, exist_ok=True)
+image_store = ImageStore(IMAGES_DIR, max_bytes=IMAGE_STORE_MAX_MB * 1024 * 1024, max_files=IMAGE_STORE_MAX_FILES)
+image_cache = PromptImageCache(
+    os.path.join(CURRENT_DIR, "cache", "sdxl"),
+    ttl_seconds=IMAGE_CACHE_TTL_HOURS * 3600,
+    max_entries=IMAGE_CACHE_MAX_ENTRIES,
+    similarity=IMAGE_CACHE_SIMILARITY or None
+) if IMAGE_CACHE else None
 
 class AudioTranscriber:
-    def __init__(self):
+    """Hands decoding and transcription to the warm worker pool."""
+    def __init__(self, pool):
         self.provider = WHISPER_PROVIDER
+        self.pool = pool
         self.logger = logging.getLogger('discussion_show.transcriber')
-        
-        if self.provider == "openai":
-            self.openai = OpenAI(api_key=OPENAI_API_KEY)
-        else:  # runpod
-            self.endpoint_id = RUNPOD_WHISPER_ENDPOINT_ID
-            self.api_key = RUNPOD_API_KEY
-
-    @staticmethod
-    def check_voice_activity(wav_path):
-        """Check if the WAV file contains voice activity."""
-        with wave.open(wav_path, 'rb') as wf:
-            if wf.getnchannels() != 1 or wf.getsampwidth() != 2:
-                return False
-            
-            raw_data = wf.readframes(wf.getnframes())
-            samples = array.array('h', raw_data)
-            
-            frame_duration = 30  # ms
-            samples_per_frame = int(wf.getframerate() * frame_duration / 1000)
-            voice_frames = 0
-            total_frames = 0
-            
-            for i in range(0, len(samples), samples_per_frame):
-                frame = samples[i:i + samples_per_frame]
-                if len(frame) == samples_per_frame:
-                    vad = webrtcvad.Vad(3)  # Aggressiveness mode 3 (highest)
-                    is_speech = vad.is_speech(frame.tobytes(), wf.getframerate())
-                    if is_speech:
-                        voice_frames += 1
-                    total_frames += 1
-            
-            if total_frames == 0:
-                return False
-                
-            voice_percentage = (voice_frames / total_frames) * 100
-            return voice_percentage > 10
-
-    @staticmethod
-    def _extract_mime_and_data(audio_blob_base64):
-        """Extract MIME type and actual base64 data from the input."""
-        mime_type = "audio/webm"  # default
-        base64_data = audio_blob_base64
-        
-        if "data:" in audio_blob_base64:
-            parts = audio_blob_base64.split(",", 1)
-            if len(parts) == 2:
-                mime_type = parts[0].split(":")[1].split(";")[0]
-                base64_data = parts[1]
-        
-        return mime_type, base64_data
 
-    def transcribe_with_openai(audio_blob_base64):
-        logger = logging.getLogger('discussion_show.transcribe_with_openai')
-        """Transcribe audio using OpenAI's Whisper API"""
+    async def decode(self, audio_blob_base64):
+        """Decode a recorder blob to PCM and measure its speech."""
         try:
-            logger.info("Starting OpenAI audio transcription process")
-            
-            # Extract MIME type and actual base64 data
-            mime_type, base64_data = AudioTranscriber._extract_mime_and_data(audio_blob_base64)
-            logger.debug(f"Detected MIME type: {mime_type}")
-            
-            # Decode base64 to binary
-            audio_data = base64.b64decode(base64_data)
-            logger.debug("Successfully decoded base64 audio data")
-            
-            # Save the audio data to a temporary file with appropriate extension
-            with tempfile.NamedTemporaryFile(suffix='.ogg', delete=False) as temp_ogg:
-                # Convert to WAV first for consistency
-                with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as temp_wav:
-                    # Write the audio data to a temporary file
-                    with tempfile.NamedTemporaryFile(delete=False) as temp_audio:
-                        temp_audio.write(audio_data)
-                        temp_audio.flush()
-                        
-                        # Convert to AudioSegment using the detected format
-                        format_name = mime_type.split('/')[-1].split(';')[0]
-                        try:
-                            audio = AudioSegment.from_file(temp_audio.name, format=format_name)
-                        except:
-                            # Fallback to default format if detection fails
-                            logger.warning(f"Failed to load as {format_name}, trying default format")
-                            audio = AudioSegment.from_file(temp_audio.name)
-                        
-                        os.unlink(temp_audio.name)
-                    
-                    # Export as WAV for voice activity detection
-                    audio.export(temp_wav.name, format='wav', parameters=[
-                        "-acodec", "pcm_s16le",
-                        "-ac", "1",
-                        "-ar", "16000"
-                    ])
-                    
-                    if not AudioTranscriber.check_voice_activity(temp_wav.name):
-                        logger.info("No significant voice activity detected")
-                        os.unlink(temp_wav.name)
-                        return None
-                    
-                    os.unlink(temp_wav.name)
-                
-                # Export as OGG for Whisper API
-                audio.export(temp_ogg.name, format='ogg', parameters=["-q:a", "4"])
-                
-                file_size = os.path.getsize(temp_ogg.name)
-                if file_size > 25 * 1024 * 1024:
-                    logger.error("Audio file too large (>25MB)")
-                    os.unlink(temp_ogg.name)
-                    raise ValueError("Audio file too large (>25MB)")
-                
-                logger.info("Sending audio to OpenAI Whisper API")
-                with open(temp_ogg.name, 'rb') as audio_file:
-                    openai = OpenAI(api_key=OPENAI_API_KEY)
-                    transcript = openai.audio.transcriptions.create(
-                        model="whisper-1",
-                        file=audio_file
-                    )
-                
-                # Clean up temp files
-                os.unlink(temp_ogg.name)
-                
-                logger.info("Successfully transcribed audio")
-                return transcript.text
-                
+            mime_type, base64_data = AudioPipeline.extract_mime_and_data(audio_blob_base64)
+            return await self.pool.decode(base64.b64decode(base64_data), mime_type)
         except Exception as e:
-            logger.error(f"Error in OpenAI transcription: {str(e)}", exc_info=True)
-            return None
+            self.logger.error(f"Error decoding audio chunk: {str(e)}", exc_info=True)
+            return b"", 0
 
-    def transcribe_with_runpod(audio_blob_base64):
-        logger = logging.getLogger('discussion_show.transcribe_with_runpod')
-        """Transcribe audio using RunPod's Whisper endpoint"""
+    async def transcribe_pcm(self, pcm):
+        """Gate, trim, encode and upload one PCM window."""
         try:
-            logger.info("Starting RunPod audio transcription process")
-            
-            # Extract MIME type and actual base64 data
-            mime_type, base64_data = AudioTranscriber._extract_mime_and_data(audio_blob_base64)
-            logger.debug(f"Detected MIME type: {mime_type}")
-            
-            # Check for voice activity
-            audio_data = base64.b64decode(base64_data)
-            
-            # Save to temporary file and check for voice activity
-            with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as temp_wav:
-                with tempfile.NamedTemporaryFile(delete=False) as temp_audio:
-                    temp_audio.write(audio_data)
-                    temp_audio.flush()
-                    
-                    # Convert to AudioSegment using the detected format
-                    format_name = mime_type.split('/')[-1].split(';')[0]
-                    try:
-                        audio = AudioSegment.from_file(temp_audio.name, format=format_name)
-                    except:
-                        # Fallback to default format if detection fails
-                        logger.warning(f"Failed to load as {format_name}, trying default format")
-                        audio = AudioSegment.from_file(temp_audio.name)
-                    
-                    os.unlink(temp_audio.name)
-                
-                audio.export(temp_wav.name, format='wav', parameters=[
-                    "-acodec", "pcm_s16le",
-                    "-ac", "1",
-                    "-ar", "16000"
-                ])
-                
-                if not AudioTranscriber.check_voice_activity(temp_wav.name):
-                    logger.info("No significant voice activity detected")
-                    os.unlink(temp_wav.name)
-                    return None
-                
-                os.unlink(temp_wav.name)
-
-            # Send base64 audio directly to RunPod
-            api_key = RUNPOD_API_KEY
-            headers = {
-                "Authorization": f"Bearer {api_key}",
-                "Content-Type": "application/json"
-            }
-            
-            payload = {
-                "input": {
-                    "audio_base64": base64_data,
-                    "model": "base",
-                    "transcription": "plain_text",
-                    "translate": False,
-                    "language": None,
-                    "temperature": 0,
-                    "best_of": 5,
-                    "beam_size": 5,
-                    "enable_vad": True
-                }
-            }
-            
-            endpoint_id = RUNPOD_WHISPER_ENDPOINT_ID
-            url = f"https://api.runpod.ai/v2/{endpoint_id}/runsync"
-            logger.info("Sending audio to RunPod Whisper API")
-            
-            response = requests.post(url, headers=headers, json=payload)
-            response.raise_for_status()
-            result = response.json()
-            
-            if result and "output" in result:
-                transcript = result["output"].get("transcription")
-                if transcript:
-                    logger.info("Successfully transcribed audio with RunPod")
-                    return transcript
-            
-            logger.error("No transcript in RunPod response")
-            return None
-            
+            text = await self.pool.transcribe(pcm)
+            if text:
+                self.logger.info("Successfully transcribed audio")
+            return text
         except Exception as e:
-            logger.error(f"Error in RunPod transcription: {str(e)}", exc_info=True)
+            self.logger.error(f"Error in {self.provider} transcription: {str(e)}", exc_info=True)
             return None
 
-    @staticmethod
-    def transcribe(provider, audio_blob_base64):
+    async def transcribe(self, audio_blob_base64):
         """Transcribe audio using the configured provider"""
-        if provider == "debug":
+        if self.provider == "debug":
             return """
                 This is a really nice long context that fills the entire buffer. Create a castle in the sky a bright blue cloudy sky with birds flying around and people partying. Make the castle whimsical and made out of marble with medieval aesthetic. Put big flags and banners along the top. Make a draw bridge with crocodiles.
             """
-        if provider == "openai":
-            return AudioTranscriber.transcribe_with_openai(audio_blob_base64)
-        else:  # runpod
-            if RUNPOD_WHISPER_ENDPOINT_ID == None:
-                exit(1)
-            return AudioTranscriber.transcribe_with_runpod(audio_blob_base64)
+        if self.provider == "runpod" and RUNPOD_WHISPER_ENDPOINT_ID == None:
+            exit(1)
+
+        pcm, voiced_ms = await self.decode(audio_blob_base64)
+        if not voiced_ms:
+            self.logger.info("No voice activity detected in chunk")
+            return None
+        return await self.transcribe_pcm(pcm)
+
+    def create_session(self):
+        return TranscriptionSession(
+            decode=self.decode,
+            transcribe=self.transcribe_pcm,
+            step_ms=STREAM_STEP_MS,
+            overlap_ms=STREAM_OVERLAP_MS
+        )
 
 class MyContextBuffer:
-    def __init__(self):
-        self.context = ""
-        self.full_enough = FULL_ENOUGH
-        self.provider = WHISPER_PROVIDER
+    def __init__(self, openai_client):
+        self.context = TranscriptContext(
+            full_enough=FULL_ENOUGH,
+            budget=CONTEXT_TOKEN_BUDGET,
+            summary_budget=CONTEXT_SUMMARY_TOKENS
+        )
+        self.openai = openai_client
         self.logger = logging.getLogger('discussion_show.context_buffer')
-        if self.provider == "openai":
-            self.openai = OpenAI(api_key=OPENAI_API_KEY)
-        else:  # runpod
-            self.openai = OpenAI(
-                api_key=RUNPOD_API_KEY,
-                base_url=f"https://api.runpod.ai/v2/{RUNPOD_ENDPOINT_ID}/openai/v1"
-            )
 
     def add_to_context(self, text):
         if text:
-            self.context += f" {text.strip()}"
-            self.logger.debug(f"Added text to context. Current length: {len(self.context)}")
+            self.context.add(text)
 
     def is_full_enough(self):
-        is_full = len(self.context) > self.full_enough
+        is_full = self.context.is_full_enough()
         self.logger.debug(f"Context buffer fullness check: {is_full}")
         return is_full
 
     def get_fill_percentage(self):
-        percentage = min(100, int((len(self.context) / self.full_enough) * 100))
-        self.logger.debug(f"Context buffer fill percentage: {percentage}%")
-        return percentage
+        return self.context.fill_percentage
 
     async def generate_image_prompt(self):
-        if not self.context:
+        taken = self.context.take()
+        if taken is None:
             self.logger.warning("Attempted to generate image prompt with empty context")
             return None
-        
+        summary, earlier, excerpt = taken
+        folded = self.context.overflow()
+
         def _generate_prompt():
             self.logger.info("Generating image prompt from context")
-            context = self.context
-            self.clear()
-            # Reset progress bar after clearing context
-            progress_bar.set_value(0)
-            progress_label.set_text("Context Buffer: 0%")
+            background = ""
+            if summary:
+                background += f"Summary of the conversation so far: {summary}\n\n"
+            if earlier:
+                background += f"Recent conversation: {earlier}\n\n"
             response = self.openai.chat.completions.create(
                 model=RUNPOD_MODEL_NAME,
                 messages=[
                     {"role": "system", "content": "You are a creative assistant that generates concise image prompts based on conversations. Focus on the key themes and emotions. Create realistic and accurate art."},
-                    {"role": "user", "content": f"Generate an image prompt based on this conversation excerpt: {context}"}
+                    {"role": "user", "content": f"{background}Generate an image prompt based on this conversation excerpt: {excerpt}"}
                 ]
             )
             prompt = response.choices[0].message.content
             self.logger.info(f"Generated image prompt: {prompt}")
-            return prompt
-            
-        return await run.io_bound(_generate_prompt)
+            new_summary = None
+            if folded:
+                try:
+                    new_summary = self._summarize(summary, folded)
+                except Exception as e:
+                    # The prompt is still good; the folded segments are just not remembered
+                    self.logger.error(f"Error summarizing older context: {str(e)}", exc_info=True)
+            return prompt, new_summary
+
+        prompt, new_summary = await run.io_bound(_generate_prompt)
+        # Applied back on the event loop, which is the only place the context is changed
+        if new_summary is not None:
+            self.context.set_summary(new_summary)
+        return prompt
+
+    def _summarize(self, summary, folded):
+        """Fold the oldest transcript segments into the rolling summary."""
+        older = " ".join(segment.text for segment in folded)
+        self.logger.info(f"Summarizing {sum(segment.tokens for segment in folded)} tokens of older context")
+        response = self.openai.chat.completions.create(
+            model=RUNPOD_MODEL_NAME,
+            max_tokens=self.context.summary_budget,
+            messages=[
+                {"role": "system", "content": f"You keep a running summary of a live conversation. Keep the main themes, people, places and mood in at most {self.context.summary_budget} tokens."},
+                {"role": "user", "content": f"Current summary: {summary or '(none)'}\n\nFold in this older part of the conversation: {older}"}
+            ]
+        )
+        return response.choices[0].message.content or summary
 
     def clear(self):
-        self.context = ""
+        self.context.clear()
         self.logger.debug("Context buffer cleared")
 
+def create_openai_client():
+    """The chat client shared by every session's context buffer."""
+    if WHISPER_PROVIDER == "openai":
+        return OpenAI(api_key=OPENAI_API_KEY)
+    # runpod
+    return OpenAI(
+        api_key=RUNPOD_API_KEY,
+        base_url=f"https://api.runpod.ai/v2/{RUNPOD_ENDPOINT_ID}/openai/v1"
+    )
+
 async def save_base64_image(base64_data):
-    logger = logging.getLogger('discussion_show.image_saver')
-    
-    def _save_image():
-        logger.info("Starting image save process")
-        # Remove the data URL prefix if present
-        if ',' in base64_data:
-            base64_data_clean = base64_data.split(',')[1]
-        else:
-            base64_data_clean = base64_data
-        
-        # Generate a unique filename
-        filename = f"generated_{int(time.time())}.png"
-        filepath = os.path.join(IMAGES_DIR, filename)
-        logger.debug(f"Saving image to: {filepath}")
-        
-        # Decode and save the image
-        image_data = base64.b64decode(base64_data_clean)
-        with open(filepath, 'wb') as f:
-            f.write(image_data)
-            f.flush()
-            os.fsync(f.fileno())
-        
-        logger.info(f"Successfully saved image: {filename}")
-        return f"/static/images/{filename}"
+    """Store the image by content hash off the event loop and return its URL."""
+    return await run.io_bound(image_store.save_base64, base64_data)
 
-    image_url = await run.io_bound(_save_image)
-    await asyncio.sleep(0.5)
-    return image_url
+class PageView(SessionView):
+    """The widgets of one browser tab."""
+    def __init__(self):
+        self.audio_recorder = None
+        self.progress_label = None
+        self.progress_bar = None
+        self.transcription_display = None
+        self.image_prompt_display = None
+        self.image_generation_status = None
+        self.interactive_image = None
+        self.logger = logging.getLogger('discussion_show.image_updater')
+
+    def show_transcript(self, text):
+        # Update transcription display with trailing effect
+        self.transcription_display.clear()
+        with self.transcription_display:
+            ui.label(text).classes('animate-fade-out')
 
-async def update_image(interactive_image, prompt):
-    logger = logging.getLogger('discussion_show.image_updater')
-    
-    ig = ImageGenerator(endpoint_id=RUNPOD_SDXL_ENDPOINT_ID)
-    logger.info("Generating new image")
-    image_generation_status.set_text("Generating image...")
-    base64_image = await ig.generate_image(prompt)
-    
-    if base64_image:
-        logger.info("Saving generated image")
-        image_generation_status.set_text("Saving image...")
-        image_url = await save_base64_image(base64_image)
-        logger.debug(f"Image saved at: {image_url}")
-        await asyncio.sleep(0.5)
-        interactive_image.set_source(image_url)
-        logger.info("Successfully updated image in UI")
-        image_generation_status.set_text("Not generating image")
-    else:
-        logger.error("Failed to generate image")
-        image_generation_status.set_text("Failed to generate image")
-    
-    image_prompt_display.clear()
+    def show_progress(self, percentage):
+        self.progress_bar.set_value(percentage / 100)
+        self.progress_label.set_text(f"Context Buffer: {percentage}%")
+
+    def show_prompt(self, prompt):
+        self.image_prompt_display.clear()
+        with self.image_prompt_display:
+            ui.label(prompt)
 
+    def set_status(self, text):
+        self.image_generation_status.set_text(text)
 
-# Global variables for UI elements
-context_buffer = MyContextBuffer()
-interactive_image = None
-transcription_display = None
-progress_bar = None
-progress_label = None
-audio_recorder = None
-image_prompt_display = None
-image_generation_status = None
+    async def show_image(self, base64_image, prompt):
+        self.logger.info("Saving generated image")
+        self.set_status("Saving image...")
+        image_url = await save_base64_image(base64_image)
+        self.logger.debug(f"Image saved at: {image_url}")
+        self.interactive_image.set_source(image_url)
+        self.logger.info("Successfully updated image in UI")
+        self.set_status("Not generating image")
+        self.image_prompt_display.clear()
+
+transcriber = None
+transcription_pool = None
+webhook_receiver = None
+image_generator = None
+openai_client = None
+# One session per browser tab, keyed by NiceGUI client id
+sessions = SessionRegistry(idle_seconds=SESSION_IDLE_SECONDS)
+
+def get_transcriber():
+    global transcriber
+    if transcriber is None:
+        transcriber = AudioTranscriber(transcription_pool)
+        # transcriber.provider = "debug"
+    return transcriber
+
+def get_image_generator():
+    """One generator for the app, so RunPodAPI and its job history are shared by all sessions."""
+    global image_generator
+    if image_generator is None:
+        image_generator = ImageGenerator(endpoint_id=RUNPOD_SDXL_ENDPOINT_ID, webhook_receiver=webhook_receiver,
+                                         cache=image_cache)
+    return image_generator
+
+def get_openai_client():
+    global openai_client
+    if openai_client is None:
+        openai_client = create_openai_client()
+    return openai_client
+
+def create_session(client_id, view):
+    transcriber = get_transcriber()
+    return DiscussionSession(
+        client_id,
+        transcriber=transcriber,
+        context_buffer=MyContextBuffer(get_openai_client()),
+        generator=get_image_generator(),
+        view=view,
+        streaming=STREAMING_TRANSCRIPTION and transcriber.provider != "debug",
+        max_concurrent_images=IMAGE_MAX_CONCURRENT
+    )
 
 async def handle_recording_toggle(e):
     logger = logging.getLogger('discussion_show.recording_toggle')
+    session = sessions.get(e.client.id)
+    if session is None:
+        logger.warning("Recording toggled for an expired session, reload the page")
+        return
+    session.touch()
+    session.recording = e.value
     if e.value:  # Switch turned on
         logger.info("Starting recording")
-        await audio_recorder.start_recording()
+        await session.view.audio_recorder.start_recording()
     else:  # Switch turned off
         logger.info("Stopping recording")
-        await audio_recorder.stop_recording()
+        await session.view.audio_recorder.stop_recording()
 
 async def on_audio_ready(e):
     logger = logging.getLogger('discussion_show.audio_handler')
@@ -455,42 +367,23 @@ async def on_audio_ready(e):
     # Ensure the base64 data includes the MIME type
     if not base64_audio.startswith('data:'):
         base64_audio = f'data:{mime_type};base64,{base64_audio}'
-    
+
+    session = sessions.get(e.client.id)
+    if session is None:
+        logger.warning("Audio received for an expired session, reload the page")
+        return
     logger.info("Audio data received, starting transcription")
-    transcriber = AudioTranscriber()
-    
-    my_provider = WHISPER_PROVIDER
-    # my_provider = "debug"
-    transcription = await run.cpu_bound(transcriber.transcribe, my_provider, base64_audio)
-    if transcription:
-        logger.info("Successfully transcribed audio")
-        context_buffer.add_to_context(transcription)
-        
-        # Update progress bar
-        percentage = context_buffer.get_fill_percentage()
-        progress_bar.set_value(percentage / 100)
-        progress_label.set_text(f"Context Buffer: {percentage}%")
-        
-        # Update transcription display with trailing effect
-        transcription_display.clear()
-        with transcription_display:
-            ui.label(transcription).classes('animate-fade-out')
-            
-        if context_buffer.is_full_enough():
-            logger.info("Context buffer full, generating image")
-            image_prompt = await context_buffer.generate_image_prompt()
-            if image_prompt:
-                logger.debug(f"Generated image prompt: {image_prompt}")
-                with image_prompt_display:
-                    ui.label(image_prompt)
-                await update_image(interactive_image, image_prompt)
+    await session.handle_audio(base64_audio)
+
+# Sessions are not dropped on disconnect: NiceGUI reports one for every websocket blip or sleeping
+# laptop, and the tab reconnects with the same client id. Closed tabs go with the idle eviction.
 
 
 @ui.page("/")
 async def main():
-    global interactive_image, transcription_display, progress_bar, progress_label, context_buffer, audio_recorder, image_prompt_display, image_generation_status
     logger = logging.getLogger('discussion_show.ui')
     logger.info("Initializing main UI page")
+    view = PageView()
     # Great for debugging on iOS
     # ui.add_head_html('<script src="https://cdn.jsdelivr.net/gh/c-kick/mobileConsole/hnl.mobileconsole.min.js"></script>')
     
@@ -503,23 +396,24 @@ async def main():
             with ui.row().classes('items-center gap-2'):
                 ui.switch('Record', on_change=handle_recording_toggle).classes('text-lg')
             # Add recorder component
-            audio_recorder = AudioRecorder(on_audio_ready=on_audio_ready)
+            view.audio_recorder = AudioRecorder(on_audio_ready=on_audio_ready)
         
         # Progress bar and label
         with ui.column().classes('w-full max-w-2xl mb-4'):
-            progress_label = ui.label("Context Buffer: 0%").classes('text-sm mb-1')
-            progress_bar = ui.linear_progress(value=0).classes('w-full')
+            view.progress_label = ui.label("Context Buffer: 0%").classes('text-sm mb-1')
+            view.progress_bar = ui.linear_progress(value=0).classes('w-full')
         
         # Transcription display area with fade-out animation
-        transcription_display = ui.column().classes('w-full max-w-2xl mb-4 min-h-[100px] p-4 bg-gray-100 rounded')
+        view.transcription_display = ui.column().classes('w-full max-w-2xl mb-4 min-h-[100px] p-4 bg-gray-100 rounded')
 
-        image_prompt_display = ui.column().classes('w-full max-w-2xl mb-4 p-4 bg-gray-100 rounded')
+        view.image_prompt_display = ui.column().classes('w-full max-w-2xl mb-4 p-4 bg-gray-100 rounded')
 
-        image_generation_status = ui.label("Not generating image").classes('text-sm mb-4')
+        view.image_generation_status = ui.label("Not generating image").classes('text-sm mb-4')
         
         # Image display
-        interactive_image = ui.interactive_image().classes('w-full max-w-2xl')
+        view.interactive_image = ui.interactive_image().classes('w-full max-w-2xl')
     
+    sessions.add(create_session(ui.context.client.id, view))
     logger.info("Main UI page initialized")
 
     ui.add_head_html('''
@@ -534,9 +428,26 @@ async def main():
     </style>
     ''')
 
-def startup():
+async def startup():
+    global webhook_receiver, transcription_pool
     logger = logging.getLogger('discussion_show.startup')
     logger.info("Application starting up")
+    # Workers keep their decoder and HTTP client warm between chunks
+    transcription_pool = TranscriptionWorkerPool({
+        "provider": WHISPER_PROVIDER,
+        "openai_api_key": OPENAI_API_KEY,
+        "runpod_api_key": RUNPOD_API_KEY,
+        "runpod_whisper_endpoint_id": RUNPOD_WHISPER_ENDPOINT_ID,
+        "trim_silence": TRIM_SILENCE,
+        "trim_padding_ms": TRIM_PADDING_MS,
+        "upload_format": WHISPER_UPLOAD_FORMAT,
+    }, workers=TRANSCRIPTION_WORKERS)
+    await transcription_pool.start()
+    sessions.start()
+    if RUNPOD_WEBHOOK_URL:
+        webhook_receiver = WebhookReceiver(host=RUNPOD_WEBHOOK_HOST, port=RUNPOD_WEBHOOK_PORT,
+                                           public_url=RUNPOD_WEBHOOK_URL, secret=RUNPOD_WEBHOOK_SECRET)
+        await webhook_receiver.start()
     loop = asyncio.get_running_loop()
     # These are used for debugging slow async/multiproc
     # loop.set_debug(True)
@@ -544,6 +455,30 @@ def startup():
     logger.info("Event loop configured")
 
 app.on_startup(startup)
+app.on_shutdown(close_http_client)
+
+async def shutdown():
+    await sessions.close()
+    if webhook_receiver is not None:
+        await webhook_receiver.stop()
+    if transcription_pool is not None:
+        transcription_pool.shutdown()
+    if image_cache is not None:
+        image_cache.flush()
+
+app.on_shutdown(shutdown)
+
+@app.get("/metrics")
+def metrics():
+    """Worker pool queue depth and per-stage timings."""
+    result = {}
+    if transcription_pool is not None:
+        result["transcription"] = transcription_pool.metrics.snapshot()
+    result["sessions"] = sessions.snapshot()
+    result["image_store"] = image_store.stats
+    if image_cache is not None:
+        result["image_cache"] = image_cache.snapshot()
+    return result
 
 # Configure static file serving
 app.add_static_files("/static", STATIC_DIR)
@@ -0,0 +1,94 @@
+import unittest
+
+from ds.context_buffer import TranscriptContext, count_tokens
+
+def words(text):
+    return len(text.split())
+
+def line(n, size=5):
+    return " ".join([f"line{n}"] * size)
+
+class TestTranscriptContext(unittest.TestCase):
+    def make(self, **kwargs):
+        return TranscriptContext(**{"full_enough": 10, "budget": 20, "counter": words, **kwargs})
+
+    def test_take_returns_none_when_nothing_is_pending(self):
+        context = self.make()
+        self.assertIsNone(context.take())
+        context.add("  ")
+        self.assertIsNone(context.take())
+        context.add(line(0))
+        self.assertIsNotNone(context.take())
+        self.assertIsNone(context.take())
+
+    def test_take_splits_earlier_and_new_text(self):
+        context = self.make()
+        context.add(line(0))
+        context.add(line(1))
+        self.assertTrue(context.is_full_enough())
+        self.assertEqual(context.fill_percentage, 100)
+        self.assertEqual(context.take(), ("", "", f"{line(0)} {line(1)}"))
+        self.assertFalse(context.is_full_enough())
+        self.assertEqual(context.fill_percentage, 0)
+        context.add(line(2))
+        self.assertEqual(context.fill_percentage, 50)
+        self.assertEqual(context.take(), ("", f"{line(0)} {line(1)}", line(2)))
+
+    def test_overflow_hands_off_the_oldest_consumed_lines(self):
+        context = self.make()
+        for n in range(6):
+            context.add(line(n))
+            if n % 2:
+                context.take()
+        self.assertEqual(context.total_tokens, 30)
+        folded = context.overflow()
+        self.assertEqual([segment.text for segment in folded], [line(0), line(1)])
+        self.assertEqual(context.total_tokens, 20)
+        self.assertEqual([segment.text for segment in context.segments], [line(n) for n in range(2, 6)])
+        self.assertEqual(context.overflow(), [])
+
+    def test_summary_counts_against_the_budget(self):
+        context = self.make()
+        for n in range(4):
+            context.add(line(n))
+        context.take()
+        self.assertEqual(context.overflow(), [])
+        context.set_summary(" ".join(["summary"] * 8))
+        self.assertEqual(context.total_tokens, 28)
+        folded = context.overflow()
+        self.assertEqual([segment.text for segment in folded], [line(0), line(1)])
+        self.assertLessEqual(context.total_tokens, context.budget)
+        self.assertEqual(context.take(), None)
+        context.add(line(4))
+        summary, earlier, new = context.take()
+        self.assertEqual(summary, " ".join(["summary"] * 8))
+        self.assertEqual(earlier, f"{line(2)} {line(3)}")
+        self.assertEqual(new, line(4))
+
+    def test_pending_lines_are_never_handed_off(self):
+        context = self.make()
+        context.add(line(0))
+        context.take()
+        for n in range(1, 6):
+            context.add(line(n))
+        folded = context.overflow()
+        # Only the consumed line may go; the unsent ones stay even though they are over budget
+        self.assertEqual([segment.text for segment in folded], [line(0)])
+        self.assertEqual(context.pending_count, 5)
+        self.assertEqual(context.take()[2], " ".join(line(n) for n in range(1, 6)))
+
+    def test_clear(self):
+        context = self.make()
+        context.add(line(0))
+        context.set_summary("earlier")
+        context.clear()
+        self.assertEqual(context.total_tokens, 0)
+        self.assertIsNone(context.take())
+        self.assertEqual(context.summary, "")
+
+    def test_count_tokens(self):
+        self.assertEqual(count_tokens(""), 0)
+        self.assertGreater(count_tokens("a castle made of marble"), 0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,39 @@
+import io
+import os
+import base64
+import tempfile
+import unittest
+
+from ds.image_payload import ImagePayload
+from ds.image_store import ImageStore
+
+class TestImagePayload(unittest.TestCase):
+    def test_decodes_in_chunks_for_every_padding(self):
+        for size in (1, 2, 3, 196608, 196609, 196610):
+            raw = os.urandom(size)
+            payload = ImagePayload("data:image/jpeg;base64," + base64.b64encode(raw).decode() + "\n")
+            self.assertEqual(payload.mime_type, "image/jpeg")
+            self.assertEqual(payload.decoded_size, size)
+            self.assertEqual(bytes(payload.decode_into()), raw)
+            stream = io.BytesIO()
+            self.assertEqual(payload.write_to(stream), size)
+            self.assertEqual(stream.getvalue(), raw)
+
+    def test_line_wrapped_base64_falls_back_to_one_decode(self):
+        raw = os.urandom(5000)
+        self.assertEqual(bytes(ImagePayload(base64.encodebytes(raw).decode()).decode_into()), raw)
+
+    def test_bare_base64_is_not_copied(self):
+        text = base64.b64encode(b"image").decode()
+        self.assertIs(ImagePayload(text).base64(), text)
+
+    def test_store_streams_payload_under_its_content_hash(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            store = ImageStore(tmp)
+            url = store.save_base64("data:image/png;base64," + base64.b64encode(b"pixels").decode())
+            self.assertEqual(url, store.save(b"pixels"))
+            self.assertEqual(store.stats["deduplicated"], 1)
+            self.assertEqual(len(os.listdir(tmp)), 1)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+import asyncio
+import unittest
+
+from ds.image_scheduler import ImageJobScheduler
+
+class SlowGenerator:
+    """Takes `seconds[prompt]` (0.05 by default) per image and records how many run at once."""
+    def __init__(self, seconds=None):
+        self.seconds = seconds or {}
+        self.started = []
+        self.running = 0
+        self.max_running = 0
+
+    async def generate_image(self, prompt):
+        self.started.append(prompt)
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        try:
+            await asyncio.sleep(self.seconds.get(prompt, 0.05))
+            return f"image of {prompt}"
+        finally:
+            self.running -= 1
+
+class TestImageJobScheduler(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.shown = []
+
+    async def on_image(self, image, prompt):
+        self.shown.append(image)
+
+    async def wait_idle(self, scheduler):
+        while scheduler.busy:
+            await asyncio.sleep(0.01)
+
+    async def test_only_the_newest_queued_prompt_runs(self):
+        generator = SlowGenerator()
+        scheduler = ImageJobScheduler(generator, self.on_image, max_concurrent=1)
+        for n in range(1, 6):
+            scheduler.submit(f"prompt {n}")
+        await self.wait_idle(scheduler)
+        self.assertEqual(generator.started, ["prompt 1", "prompt 5"])
+        self.assertEqual(self.shown, ["image of prompt 1", "image of prompt 5"])
+        self.assertEqual(generator.max_running, 1)
+        self.assertEqual(scheduler.stats["dropped"], 3)
+        self.assertEqual(scheduler.stats["completed"], 2)
+
+    async def test_concurrency_cap_and_superseded_jobs_are_cancelled(self):
+        # Prompt 1 is slow, so prompt 2 finishes first and makes it pointless
+        generator = SlowGenerator({"prompt 1": 0.5})
+        scheduler = ImageJobScheduler(generator, self.on_image, max_concurrent=2)
+        for n in range(1, 6):
+            scheduler.submit(f"prompt {n}")
+        await self.wait_idle(scheduler)
+        self.assertEqual(generator.started, ["prompt 1", "prompt 2", "prompt 5"])
+        self.assertEqual(generator.max_running, 2)
+        self.assertEqual(self.shown, ["image of prompt 2", "image of prompt 5"])
+        self.assertEqual(scheduler.stats, {"submitted": 5, "dropped": 2, "cancelled": 1, "completed": 2, "failed": 0})
+
+    async def test_older_image_is_not_shown_after_a_newer_one(self):
+        generator = SlowGenerator({"prompt 1": 0.1, "prompt 2": 0.02})
+        scheduler = ImageJobScheduler(generator, self.on_image, max_concurrent=2)
+        scheduler.submit("prompt 1")
+        scheduler.submit("prompt 2")
+        await self.wait_idle(scheduler)
+        self.assertEqual(self.shown, ["image of prompt 2"])
+
+    async def test_close_cancels_running_and_queued(self):
+        generator = SlowGenerator({"prompt 1": 10})
+        scheduler = ImageJobScheduler(generator, self.on_image, max_concurrent=1)
+        scheduler.submit("prompt 1")
+        scheduler.submit("prompt 2")
+        await asyncio.sleep(0.01)
+        await scheduler.close()
+        self.assertFalse(scheduler.busy)
+        self.assertEqual(generator.started, ["prompt 1"])
+        self.assertEqual(scheduler.stats["cancelled"], 1)
+        self.assertEqual(self.shown, [])
+
+if __name__ == "__main__":
+    unittest.main()
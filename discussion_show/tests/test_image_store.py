@@ -0,0 +1,78 @@
+import os
+import base64
+import hashlib
+import tempfile
+import unittest
+
+from ds.image_store import ImageStore
+
+def image(n, size=100):
+    return bytes([n]) * size
+
+def name_of(data, extension=".png"):
+    return hashlib.sha256(data).hexdigest()[:32] + extension
+
+class TestImageStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.directory = self.tmp.name
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def files(self):
+        return sorted(name for name in os.listdir(self.directory))
+
+    def test_same_bytes_are_stored_once(self):
+        store = ImageStore(self.directory)
+        url = store.save(image(1))
+        self.assertEqual(url, f"/static/images/{name_of(image(1))}")
+        data_url = "data:image/png;base64," + base64.b64encode(image(1)).decode()
+        self.assertEqual(store.save_base64(data_url), url)
+        self.assertNotEqual(store.save(image(2)), url)
+        self.assertEqual(self.files(), sorted([name_of(image(1)), name_of(image(2))]))
+        self.assertEqual(store.stats, {"saved": 2, "deduplicated": 1, "evicted": 0})
+
+    def test_evicts_least_recently_used_at_count_cap(self):
+        store = ImageStore(self.directory, max_files=2)
+        store.save(image(1))
+        store.save(image(2))
+        # Saving image 1 again makes image 2 the least recently used
+        store.save(image(1))
+        store.save(image(3))
+        self.assertEqual(self.files(), sorted([name_of(image(1)), name_of(image(3))]))
+        self.assertEqual(store.stats["evicted"], 1)
+
+    def test_evicts_least_recently_used_at_byte_cap(self):
+        store = ImageStore(self.directory, max_bytes=250)
+        store.save(image(1))
+        store.save(image(2))
+        store.save(image(3))
+        self.assertEqual(self.files(), sorted([name_of(image(2)), name_of(image(3))]))
+        # An image over the cap on its own is still kept until the next one arrives
+        store.save(image(4, size=400))
+        self.assertEqual(self.files(), [name_of(image(4, size=400))])
+
+    def test_lru_order_survives_a_reload(self):
+        store = ImageStore(self.directory)
+        for n, mtime in ((1, 1000), (2, 2000), (3, 3000)):
+            store.save(image(n))
+            os.utime(os.path.join(self.directory, name_of(image(n))), (mtime, mtime))
+        # A repeat refreshes the file's mtime, which is what the next process sees
+        store.save(image(1))
+
+        reopened = ImageStore(self.directory, max_files=3)
+        self.assertEqual(list(reopened._entries), [name_of(image(n)) for n in (2, 3, 1)])
+        reopened.save(image(4))
+        self.assertEqual(self.files(), sorted(name_of(image(n)) for n in (1, 3, 4)))
+
+    def test_reload_evicts_down_to_the_caps(self):
+        store = ImageStore(self.directory)
+        for n, mtime in ((1, 1000), (2, 2000), (3, 3000)):
+            store.save(image(n))
+            os.utime(os.path.join(self.directory, name_of(image(n))), (mtime, mtime))
+        ImageStore(self.directory, max_files=1)
+        self.assertEqual(self.files(), [name_of(image(3))])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+import time
+import tempfile
+import unittest
+
+from ds.prompt_cache import PromptImageCache
+
+PARAMS = {"endpoint_id": "sdxl", "width": 512, "height": 512}
+PROMPT = "A whimsical marble castle in a bright blue cloudy sky, with banners and birds flying around"
+
+class TestPromptImageCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = PromptImageCache(self.tmp.name)
+        self.cache.put(PROMPT, PARAMS, "data:image/png;base64,AAAA", gpu_seconds=4.0)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_exact_and_near_duplicate_hits(self):
+        self.assertEqual(self.cache.get(PROMPT.upper() + "!", PARAMS), "data:image/png;base64,AAAA")
+        self.assertIsNotNone(self.cache.get(PROMPT.replace("banners", "flags"), PARAMS))
+        self.assertIsNone(self.cache.get("A crowded harbour at night lit by paper lanterns", PARAMS))
+        self.assertIsNone(self.cache.get(PROMPT, {**PARAMS, "width": 1024}))
+        snapshot = self.cache.snapshot()
+        self.assertEqual((snapshot["hits"], snapshot["near_hits"], snapshot["misses"]), (1, 1, 2))
+        self.assertEqual(snapshot["gpu_seconds_saved"], 8.0)
+        self.assertEqual(snapshot["hit_ratio"], 0.5)
+
+    def test_exact_only_when_similarity_disabled(self):
+        self.cache.similarity = None
+        self.assertIsNone(self.cache.get(PROMPT.replace("banners", "flags"), PARAMS))
+
+    def test_persists_expires_and_evicts(self):
+        reopened = PromptImageCache(self.tmp.name, max_entries=2)
+        reopened.put("a harbour with lanterns", PARAMS, "b")
+        self.assertIsNotNone(reopened.get(PROMPT, PARAMS))
+        reopened.put("a forest of glass trees", PARAMS, "c")
+        # The castle was used most recently, so the harbour goes
+        self.assertIsNone(reopened.get("a harbour with lanterns", PARAMS))
+        reopened.ttl_seconds = 0
+        time.sleep(0.01)
+        self.assertIsNone(reopened.get(PROMPT, PARAMS))
+        self.assertEqual(reopened.snapshot()["entries"], 0)
+
+    def test_lru_order_survives_a_restart(self):
+        self.cache.put("a harbour with lanterns", PARAMS, "b")
+        self.assertIsNotNone(self.cache.get(PROMPT, PARAMS))
+        self.cache.flush()
+
+        reopened = PromptImageCache(self.tmp.name, max_entries=2)
+        reopened.put("a forest of glass trees", PARAMS, "c")
+        # The castle was stored first but used last, so the harbour goes
+        self.assertIsNotNone(reopened.get(PROMPT, PARAMS))
+        self.assertIsNone(reopened.get("a harbour with lanterns", PARAMS))
+
+    def test_hits_save_the_index_after_the_interval(self):
+        cache = PromptImageCache(self.tmp.name, save_interval=0)
+        cache.get(PROMPT, PARAMS)
+        used = cache._entries[next(iter(cache._entries))]["last_used"]
+        reopened = PromptImageCache(self.tmp.name)
+        self.assertEqual(reopened._entries[next(iter(reopened._entries))]["last_used"], used)
+
+if __name__ == "__main__":
+    unittest.main()
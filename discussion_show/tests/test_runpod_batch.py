@@ -0,0 +1,54 @@
+import asyncio
+import unittest
+
+import httpx
+
+from ds.fake_runpod import FakeRunPod
+from ds.runpod_api import RunPodAPI
+from ds.runpod_batch import extract_images
+from ds.runpod_jobs import JobDurationHistory, WebhookReceiver
+
+class TestSdxlBatch(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        # Later prompts finish first, so completion order differs from submission order
+        self.server = FakeRunPod(job_seconds=lambda input_data: 0.6 - 0.1 * int(input_data["prompt"][-1]))
+        await self.server.start()
+        self.client = httpx.AsyncClient()
+        self.history = JobDurationHistory()
+
+    async def asyncTearDown(self):
+        await self.client.aclose()
+        await self.server.stop()
+
+    def make_api(self, endpoint_id, **kwargs):
+        return RunPodAPI(endpoint_id=endpoint_id, api_key="test", base_url=self.server.base_url,
+                         client=self.client, history=self.history, **kwargs)
+
+    async def test_results_stream_in_completion_order_across_endpoints(self):
+        # Webhooks report completion as it happens, so the order does not depend on poll timing
+        receiver = WebhookReceiver(host="127.0.0.1", port=0)
+        await receiver.start()
+        self.addAsyncCleanup(receiver.stop)
+        prompts = [f"prompt {i}" for i in range(4)]
+        results = [result async for result in self.make_api("a", webhook_receiver=receiver).run_sdxl_batch(
+            prompts, num_images=2, max_in_flight=4, endpoints=[self.make_api("b", webhook_receiver=receiver)])]
+        self.assertEqual([result.index for result in results], [3, 2, 1, 0])
+        self.assertTrue(all(len(result.images) == 2 for result in results))
+        self.assertEqual({result.endpoint_id for result in results}, {"a", "b"})
+
+    async def test_leaving_early_cancels_remaining_jobs(self):
+        batch = self.make_api("a").run_sdxl_batch([f"prompt {i}" for i in range(4)], max_in_flight=2)
+        async for result in batch:
+            break
+        await batch.aclose()
+        self.assertEqual(len(self.server.jobs), 2)
+        self.assertEqual(sum(job["cancelled"] for job in self.server.jobs.values()), 1)
+
+    def test_extract_images_handles_worker_output_shapes(self):
+        self.assertEqual(extract_images({"image_url": "x"}), ["x"])
+        self.assertEqual(extract_images({"images": ["x", "y"]}), ["x", "y"])
+        self.assertEqual(extract_images([{"image": "x"}, {"image": None}]), ["x"])
+        self.assertEqual(extract_images(None), [])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,153 @@
+import time
+import asyncio
+import unittest
+from unittest import mock
+
+import httpx
+
+from ds.fake_runpod import FakeRunPod
+from ds.local_http import post_json
+from ds.runpod_api import RunPodAPI
+from ds.runpod_jobs import JobDurationHistory, PollSchedule, WebhookReceiver
+
+class TestRunPodJobs(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.server = FakeRunPod(job_seconds=0.4)
+        await self.server.start()
+        self.client = httpx.AsyncClient()
+        self.history = JobDurationHistory()
+
+    async def asyncTearDown(self):
+        await self.client.aclose()
+        await self.server.stop()
+
+    def make_api(self, **kwargs):
+        return RunPodAPI(endpoint_id="sdxl", api_key="test", base_url=self.server.base_url,
+                         client=self.client, history=self.history, **kwargs)
+
+    async def test_polling_returns_output_and_records_duration(self):
+        api = self.make_api()
+        job = await api.submit({"prompt": "a castle", "width": 64, "height": 64})
+        output = await job
+        self.assertTrue(output["image_url"].startswith("data:image/png;base64,"))
+        self.assertEqual(job.status, "COMPLETED")
+        self.assertAlmostEqual(self.history.expected("sdxl"), 0.4, places=2)
+        # A fixed 2 s interval would have needed a full extra interval to notice
+        self.assertLess(time.monotonic() - job.submitted_at, 1.5)
+
+    async def test_history_seeds_first_poll(self):
+        self.history.record("sdxl", 0.4)
+        api = self.make_api()
+        job = await api.submit({"prompt": "a castle", "width": 64, "height": 64})
+        await job
+        self.assertLessEqual(job.polls, 3)
+
+    async def test_webhook_completes_job(self):
+        receiver = WebhookReceiver(host="127.0.0.1", port=0)
+        await receiver.start()
+        try:
+            api = self.make_api(webhook_receiver=receiver)
+            job = await api.submit({"prompt": "a castle", "width": 64, "height": 64})
+            output = await job
+            self.assertIn("image_url", output)
+            self.assertEqual(job.polls, 0)
+        finally:
+            await receiver.stop()
+
+    async def test_timeout_returns_none(self):
+        self.server.job_seconds = 5
+        api = self.make_api()
+        job = await api.submit({"prompt": "slow"}, timeout=0.3)
+        self.assertIsNone(await job)
+        self.assertEqual(job.status, "TIMED_OUT")
+        self.assertTrue(self.server.jobs[job.job_id]["cancelled"])
+
+    async def test_timeout_with_webhook_stops_polling(self):
+        self.server.job_seconds = 5
+        receiver = WebhookReceiver(host="127.0.0.1", port=0)
+        await receiver.start()
+        try:
+            api = self.make_api(webhook_receiver=receiver)
+            job = await api.submit({"prompt": "slow"}, timeout=0.3)
+            self.assertIsNone(await job)
+            await asyncio.sleep(0)
+            # The fallback poller runs on a 5 s schedule, so check that its task is gone
+            pollers = [task for task in asyncio.all_tasks() if task.get_coro().__qualname__ == "RunPodJob._poll"]
+            self.assertEqual(pollers, [])
+            self.assertEqual(receiver._waiting, {})
+            self.assertTrue(self.server.jobs[job.job_id]["cancelled"])
+        finally:
+            await receiver.stop()
+
+    async def test_cancel(self):
+        self.server.job_seconds = 5
+        api = self.make_api()
+        job = await api.submit({"prompt": "never shown"})
+        await job.cancel()
+        self.assertEqual(job.status, "CANCELLED")
+        self.assertTrue(self.server.jobs[job.job_id]["cancelled"])
+
+class TestWebhookReceiver(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.receiver = WebhookReceiver(port=0, secret="s3cret")
+        await self.receiver.start()
+
+    async def asyncTearDown(self):
+        await self.receiver.stop()
+
+    async def test_listens_on_localhost_with_secret_path(self):
+        self.assertEqual(self.receiver.host, "127.0.0.1")
+        self.assertEqual(self.receiver.url, f"http://127.0.0.1:{self.receiver.port}/runpod/webhook/s3cret")
+        self.assertEqual(WebhookReceiver(public_url="https://example.app/runpod/webhook/", secret="x").url,
+                         "https://example.app/runpod/webhook/x")
+        self.assertNotEqual(WebhookReceiver().secret, WebhookReceiver().secret)
+
+    async def test_posts_without_the_secret_are_refused(self):
+        completion = self.receiver.expect("job-1")
+        base = f"http://127.0.0.1:{self.receiver.port}/runpod/webhook"
+        for url in (base, f"{base}/wrong", f"{base}/s3cret/extra"):
+            self.assertEqual(await post_json(url, {"id": "job-1", "status": "COMPLETED"}), 404)
+        self.assertFalse(completion.done())
+        self.assertEqual(self.receiver._early, {})
+        self.assertEqual(await post_json(self.receiver.url, {"id": "job-1", "status": "COMPLETED"}), 200)
+        self.assertEqual((await completion)["status"], "COMPLETED")
+
+    async def test_early_completion_is_claimed(self):
+        self.receiver._resolve({"id": "job-1", "status": "COMPLETED"}, size=10)
+        self.assertEqual((await self.receiver.expect("job-1"))["status"], "COMPLETED")
+        self.assertEqual(self.receiver._early_bytes, 0)
+
+    async def test_early_completions_are_capped_by_bytes(self):
+        with mock.patch("ds.runpod_jobs.MAX_EARLY_BYTES", 250):
+            for n in range(4):
+                self.receiver._resolve({"id": f"job-{n}", "status": "COMPLETED"}, size=100)
+        self.assertEqual(list(self.receiver._early), ["job-2", "job-3"])
+        self.assertEqual(self.receiver._early_bytes, 200)
+
+    async def test_early_completions_expire(self):
+        self.receiver._resolve({"id": "job-1", "status": "COMPLETED"}, size=100)
+        with mock.patch("ds.runpod_jobs.EARLY_COMPLETION_TTL", 0):
+            completion = self.receiver.expect("job-1")
+        self.assertFalse(completion.done())
+        self.assertEqual((self.receiver._early, self.receiver._early_bytes), ({}, 0))
+
+class TestPollSchedule(unittest.TestCase):
+    def test_backoff_is_capped(self):
+        delays = PollSchedule(expected=2.0, jitter=0).delays()
+        self.assertAlmostEqual(next(delays), 1.7)
+        later = [next(delays) for _ in range(20)]
+        # Fast polls cover 1.7 s .. 2.6 s, then the interval grows up to the old fixed 2 s
+        self.assertEqual(later[:4], [0.25, 0.25, 0.25, 0.25])
+        self.assertEqual(later[4], 0.375)
+        self.assertEqual(later[-1], 2.0)
+
+    def test_jitter_never_exceeds_the_old_interval(self):
+        for expected in (None, 2.0):
+            delays = PollSchedule(expected=expected, jitter=0.2).delays()
+            later = [next(delays) for _ in range(200)][1:]
+            self.assertLessEqual(max(later), 2.0)
+            # Still spread out at the cap, so clients that started together do not poll together
+            self.assertGreater(len(set(later[-50:])), 1)
+
+if __name__ == "__main__":
+    unittest.main()
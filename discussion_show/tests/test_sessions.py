@@ -0,0 +1,79 @@
+import time
+import asyncio
+import unittest
+
+from ds.context_buffer import TranscriptContext
+from ds.sessions import DiscussionSession, SessionRegistry, SessionView
+
+class EchoTranscriber:
+    provider = "runpod"
+
+    async def transcribe(self, blob):
+        return blob
+
+    def create_session(self):
+        return None
+
+class PromptBuffer:
+    def __init__(self):
+        self.context = TranscriptContext(full_enough=5)
+
+    def add_to_context(self, text):
+        self.context.add(text)
+
+    def is_full_enough(self):
+        return self.context.is_full_enough()
+
+    def get_fill_percentage(self):
+        return self.context.fill_percentage
+
+    async def generate_image_prompt(self):
+        return self.context.take()[2]
+
+class SlowGenerator:
+    async def generate_image(self, prompt):
+        await asyncio.sleep(0.05)
+        return f"image of {prompt}"
+
+class RecordingView(SessionView):
+    def __init__(self):
+        self.images = []
+        self.progress = []
+
+    def show_progress(self, percentage):
+        self.progress.append(percentage)
+
+    async def show_image(self, base64_image, prompt):
+        self.images.append(base64_image)
+
+def make_session(client_id, view):
+    return DiscussionSession(client_id, EchoTranscriber(), PromptBuffer(), SlowGenerator(), view, streaming=False)
+
+class TestSessions(unittest.IsolatedAsyncioTestCase):
+    async def test_clients_keep_separate_context_and_views(self):
+        registry = SessionRegistry()
+        a, b = RecordingView(), RecordingView()
+        registry.add(make_session("a", a))
+        registry.add(make_session("b", b))
+        await registry.get("a").handle_audio("a castle made of marble with banners")
+        await registry.get("b").handle_audio("short")
+        await asyncio.sleep(0.1)
+        self.assertEqual(a.images, ["image of a castle made of marble with banners"])
+        self.assertEqual(b.images, [])
+        self.assertEqual(a.progress[-1], 0)
+        self.assertGreater(b.progress[-1], 0)
+        await registry.close()
+
+    async def test_idle_sessions_are_evicted_unless_recording(self):
+        registry = SessionRegistry(idle_seconds=10)
+        registry.add(make_session("idle", RecordingView()))
+        registry.add(make_session("recording", RecordingView())).recording = True
+        evicted = await registry.evict_idle(now=time.monotonic() + 11)
+        self.assertEqual(evicted, 1)
+        self.assertIsNone(registry.get("idle"))
+        self.assertIsNotNone(registry.get("recording"))
+        await registry.close()
+        self.assertEqual(registry.snapshot()["active"], 0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+import unittest
+
+from ds.transcription_session import PcmRingBuffer, merge_overlap
+
+class TestMergeOverlap(unittest.TestCase):
+    def test_exact_overlap_is_dropped(self):
+        previous = "the knight rode up to the castle gate".split()
+        self.assertEqual(merge_overlap(previous, "to the castle gate and knocked twice"), "and knocked twice")
+
+    def test_overlap_after_misheard_words(self):
+        previous = "the knight rode up to the castle gate".split()
+        # The window edge cut "up", heard as one or two wrong words before the real overlap
+        self.assertEqual(merge_overlap(previous, "pup to the castle gate and knocked"), "and knocked")
+        self.assertEqual(merge_overlap(previous, "a pup to the castle gate and knocked"), "and knocked")
+        # Three wrong words is more than max_skip
+        self.assertEqual(merge_overlap(previous, "so a pup to the castle gate and knocked"),
+                         "so a pup to the castle gate and knocked")
+
+    def test_overlap_ignores_case_and_punctuation(self):
+        previous = "The knight rode up to the Castle, gate.".split()
+        self.assertEqual(merge_overlap(previous, "castle gate! Then he knocked."), "Then he knocked.")
+
+    def test_no_overlap_keeps_text(self):
+        previous = "the knight rode up to the castle gate".split()
+        self.assertEqual(merge_overlap(previous, "a dragon flew over the hills"), "a dragon flew over the hills")
+        self.assertEqual(merge_overlap([], "a dragon flew"), "a dragon flew")
+
+    def test_single_word_match_is_not_an_overlap(self):
+        previous = "we went to the".split()
+        self.assertEqual(merge_overlap(previous, "the end of the road"), "the end of the road")
+
+    def test_whole_window_repeated(self):
+        previous = "the knight rode up to the castle gate".split()
+        self.assertEqual(merge_overlap(previous, "the castle gate"), "")
+
+class TestPcmRingBuffer(unittest.TestCase):
+    def test_read_before_wrap(self):
+        ring = PcmRingBuffer(8)
+        ring.append(b"abcd")
+        self.assertEqual((ring.start, ring.end), (0, 4))
+        self.assertEqual(ring.read(0, 4), b"abcd")
+        self.assertEqual(ring.read(2, 10), b"cd")
+
+    def test_write_wraps_past_capacity(self):
+        ring = PcmRingBuffer(8)
+        ring.append(b"abcdef")
+        ring.append(b"ghij")
+        # 10 bytes written into 8: the first two are gone and offsets stay absolute
+        self.assertEqual((ring.start, ring.end), (2, 10))
+        self.assertEqual(ring.read(0, 10), b"cdefghij")
+        self.assertEqual(ring.read(6, 10), b"ghij")
+        self.assertEqual(ring.read(4, 8), b"efgh")
+        self.assertEqual(ring.read(0, 2), b"")
+
+    def test_append_larger_than_capacity_keeps_the_tail(self):
+        ring = PcmRingBuffer(8)
+        ring.append(b"ab")
+        ring.append(b"0123456789")
+        self.assertEqual((ring.start, ring.end), (4, 12))
+        self.assertEqual(ring.read(ring.start, ring.end), b"23456789")
+
+    def test_capacity_is_whole_samples(self):
+        self.assertEqual(PcmRingBuffer(9).capacity, 8)
+
+if __name__ == "__main__":
+    unittest.main()
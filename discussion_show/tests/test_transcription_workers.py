@@ -0,0 +1,35 @@
+import unittest
+
+import numpy as np
+
+from ds.transcription_workers import TranscriptionWorkerPool
+
+CONFIG = {
+    "provider": "runpod",
+    "openai_api_key": None,
+    "runpod_api_key": "test",
+    "runpod_whisper_endpoint_id": "whisper",
+    "trim_silence": True,
+    "trim_padding_ms": 200,
+    "upload_format": "ogg",
+}
+
+class TestTranscriptionWorkerPool(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.pool = TranscriptionWorkerPool(CONFIG, workers=2)
+        await self.pool.start()
+
+    async def asyncTearDown(self):
+        self.pool.shutdown()
+
+    async def test_silent_window_is_gated_in_worker(self):
+        silence = np.zeros(16000 * 2, dtype=np.int16).tobytes()
+        self.assertIsNone(await self.pool.transcribe(silence))
+        snapshot = self.pool.metrics.snapshot()
+        self.assertEqual(snapshot["completed"], 1)
+        self.assertEqual(snapshot["queue_depth"], 0)
+        # Stopped at the VAD gate, so nothing was encoded or uploaded
+        self.assertEqual(set(snapshot["stages"]), {"queue", "vad"})
+
+if __name__ == "__main__":
+    unittest.main()
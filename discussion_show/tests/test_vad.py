@@ -0,0 +1,90 @@
+import unittest
+
+import numpy as np
+
+from ds.audio import SAMPLE_RATE
+from ds.vad import VadResult, VoiceActivityDetector
+
+FRAME_MS = 30
+FRAME_SAMPLES = SAMPLE_RATE * FRAME_MS // 1000
+FRAME_BYTES = FRAME_SAMPLES * 2
+
+class CountingVad:
+    """Stands in for webrtcvad: every frame it is asked about is speech."""
+    def __init__(self):
+        self.calls = 0
+
+    def is_speech(self, frame, sample_rate):
+        self.calls += 1
+        return True
+
+def clip(frames, bursts):
+    """`frames` frames of silence with a 440 Hz tone over each (first, last) frame range."""
+    samples = np.zeros(frames * FRAME_SAMPLES, dtype=np.int16)
+    for first, last in bursts:
+        start, end = first * FRAME_SAMPLES, (last + 1) * FRAME_SAMPLES
+        t = np.arange(end - start) / SAMPLE_RATE
+        samples[start:end] = (3000 * np.sin(2 * np.pi * 440 * t)).astype(np.int16)
+    return samples.tobytes()
+
+def frame_range(first, end):
+    return first * FRAME_BYTES, end * FRAME_BYTES
+
+class TestVoiceActivityDetector(unittest.TestCase):
+    def setUp(self):
+        self.detector = VoiceActivityDetector(frame_ms=FRAME_MS)
+        self.vad = self.detector.vad = CountingVad()
+
+    def test_silence_skips_webrtcvad(self):
+        result = self.detector.detect(clip(50, []))
+        self.assertEqual(result.total_frames, 50)
+        self.assertEqual(result.checked_frames, 0)
+        self.assertEqual(self.vad.calls, 0)
+        self.assertFalse(result.has_voice())
+        self.assertEqual(result.speech_segments(90), [])
+
+    def test_tone_burst_is_padded(self):
+        result = self.detector.detect(clip(50, [(10, 19)]))
+        # Only the burst gets past the energy gate
+        self.assertEqual(self.vad.calls, 10)
+        self.assertEqual(result.voice_frames, 10)
+        self.assertEqual(result.speech_segments(), [frame_range(10, 20)])
+        self.assertEqual(result.speech_segments(90), [frame_range(7, 23)])
+        # Padding rounds up to whole frames
+        self.assertEqual(result.speech_segments(40), [frame_range(8, 22)])
+
+    def test_close_bursts_are_merged(self):
+        # With 3 frames of padding each side, a gap of 6 silent frames closes up
+        result = self.detector.detect(clip(50, [(10, 14), (21, 25)]))
+        self.assertEqual(result.speech_segments(90), [frame_range(7, 29)])
+        self.assertEqual(result.speech_segments(), [frame_range(10, 15), frame_range(21, 26)])
+
+    def test_far_bursts_stay_apart(self):
+        # A gap of 7 silent frames leaves one frame between the padded ranges
+        result = self.detector.detect(clip(50, [(10, 14), (22, 26)]))
+        self.assertEqual(result.speech_segments(90), [frame_range(7, 18), frame_range(19, 30)])
+
+    def test_padding_is_clamped_to_the_clip(self):
+        result = self.detector.detect(clip(20, [(0, 1), (18, 19)]))
+        self.assertEqual(result.speech_segments(90), [frame_range(0, 5), frame_range(15, 20)])
+
+    def test_partial_frame_at_the_end_is_dropped(self):
+        pcm = clip(10, [(0, 9)]) + b"\x00" * (FRAME_BYTES - 2)
+        self.assertEqual(self.detector.detect(pcm).total_frames, 10)
+
+class TestVadResult(unittest.TestCase):
+    def test_segments_from_flags(self):
+        flags = np.zeros(12, dtype=bool)
+        flags[[2, 3, 5, 10]] = True
+        result = VadResult(flags, FRAME_MS, SAMPLE_RATE, checked_frames=4)
+        self.assertEqual(result.speech_segments(),
+                         [frame_range(2, 4), frame_range(5, 6), frame_range(10, 11)])
+        self.assertEqual(result.speech_segments(30), [frame_range(1, 7), frame_range(9, 12)])
+
+    def test_real_webrtcvad_ignores_silence(self):
+        result = VoiceActivityDetector().detect(clip(50, []))
+        self.assertEqual(result.voice_frames, 0)
+        self.assertEqual(result.checked_frames, 0)
+
+if __name__ == "__main__":
+    unittest.main()
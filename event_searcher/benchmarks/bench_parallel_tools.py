@@ -0,0 +1,113 @@
+# Wall-clock time of one agent turn whose AI message asks for several tool calls, through a
+# graph shaped like Nexus (chatbot -> action -> chatbot). The tools are fakes with fixed
+# latencies: searches, navigations (one of which hangs), and a blocking sync tool.
+#   sequential        the tool calls awaited one after another
+#   ToolNode          langgraph's prebuilt node, all calls at once and no timeout
+#   ParallelToolNode  per-tool limits and a per-call timeout
+# Needs langgraph and langchain-core only; no API keys or browser.
+#
+# Usage (from event_searcher/): python benchmarks/bench_parallel_tools.py
+
+import os
+import sys
+import time
+import asyncio
+from typing import Annotated, Literal
+from typing_extensions import TypedDict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langchain_core.tools import StructuredTool, Tool
+from langgraph.graph import StateGraph, START, END
+from langgraph.graph.message import add_messages
+from langgraph.prebuilt import ToolNode
+
+from my_utils.parallel_tools import ParallelToolNode
+
+SEARCH_SECONDS = 0.4
+NAVIGATE_SECONDS = 0.6
+HUNG_SECONDS = 5.0
+SYNC_SECONDS = 0.3
+TIMEOUT = 1.5
+LIMITS = {"navigate_browser": 3}
+
+class State(TypedDict):
+    messages: Annotated[list, add_messages]
+
+async def search(query: str) -> str:
+    await asyncio.sleep(SEARCH_SECONDS)
+    return f"results for {query}"
+
+async def navigate(url: str) -> str:
+    await asyncio.sleep(HUNG_SECONDS if "hung" in url else NAVIGATE_SECONDS)
+    return f"text of {url}"
+
+def weather(city: str) -> str:
+    time.sleep(SYNC_SECONDS)
+    return f"sunny in {city}"
+
+TOOLS = [
+    StructuredTool.from_function(coroutine=search, name="google_search", description="search"),
+    StructuredTool.from_function(coroutine=navigate, name="navigate_browser", description="navigate"),
+    Tool(name="weather", func=weather, description="weather"),
+]
+
+def tool_calls(hung):
+    calls = [("google_search", {"query": f"concerts week {i}"}) for i in range(3)]
+    calls += [("navigate_browser", {"url": f"https://events.example/{i}"}) for i in range(5)]
+    calls += [("weather", {"__arg1": "Louisville"})]
+    if hung:
+        calls.append(("navigate_browser", {"url": "https://hung.example/"}))
+    return [{"name": name, "args": args, "id": f"call_{i}"} for i, (name, args) in enumerate(calls)]
+
+class Sequential:
+    def __init__(self, tools):
+        self.tools = {tool.name: tool for tool in tools}
+
+    async def __call__(self, state):
+        messages = []
+        for call in state["messages"][-1].tool_calls:
+            output = await self.tools[call["name"]].ainvoke(call["args"])
+            messages.append(ToolMessage(content=output, name=call["name"], tool_call_id=call["id"]))
+        return {"messages": messages}
+
+def build_graph(action, hung):
+    async def chatbot(state: State):
+        if isinstance(state["messages"][-1], ToolMessage):
+            return {"messages": [AIMessage(content="Here are some events.")]}
+        return {"messages": [AIMessage(content="", tool_calls=tool_calls(hung))]}
+
+    def should_continue(state: State) -> Literal["action", "__end__"]:
+        return "action" if state["messages"][-1].tool_calls else "__end__"
+
+    graph_builder = StateGraph(State)
+    graph_builder.add_node("chatbot", chatbot)
+    graph_builder.add_node("action", action)
+    graph_builder.add_edge(START, "chatbot")
+    graph_builder.add_conditional_edges("chatbot", should_continue)
+    graph_builder.add_edge("action", "chatbot")
+    return graph_builder.compile()
+
+async def run(name, action, hung):
+    graph = build_graph(action, hung)
+    started = time.perf_counter()
+    result = await graph.ainvoke({"messages": [HumanMessage(content="What is on this week?")]})
+    seconds = time.perf_counter() - started
+    tool_messages = [m for m in result["messages"] if isinstance(m, ToolMessage)]
+    ordered = [m.tool_call_id for m in tool_messages] == [c["id"] for c in tool_calls(hung)]
+    errors = sum(m.status == "error" for m in tool_messages)
+    print(f"{name:<18} {seconds:>7.2f}s {len(tool_messages):>6} {errors:>7} {'yes' if ordered else 'no':>8}")
+
+async def main():
+    for hung in (False, True):
+        count = len(tool_calls(hung))
+        print(f"\n{count} tool calls{' (one hangs for %.0fs)' % HUNG_SECONDS if hung else ''}, "
+              f"navigate limit {LIMITS['navigate_browser']}, timeout {TIMEOUT}s")
+        print(f"{'executor':<18} {'wall':>8} {'calls':>6} {'errors':>7} {'ordered':>8}")
+        await run("sequential", Sequential(TOOLS), hung)
+        await run("ToolNode", ToolNode(TOOLS), hung)
+        await run("ParallelToolNode", ParallelToolNode(TOOLS, limits=LIMITS, timeout=TIMEOUT), hung)
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,4 +1,4 @@
-from nicegui import ui
+from nicegui import app, ui
 
 import os
 from dotenv import load_dotenv
@@ -28,35 +28,34 @@ from langgraph.graph.message import add_messages
 
 from langchain_community.utilities import GoogleSerperAPIWrapper
 from langchain.agents import Tool
-from langgraph.prebuilt import ToolNode
 
 from langgraph.checkpoint.aiosqlite import AsyncSqliteSaver
 
 from langchain_core.messages import AIMessage
 from langchain_core.messages import ToolMessage
 
-from langchain_community.agent_toolkits import PlayWrightBrowserToolkit
-
-from langchain_community.tools.playwright.utils import (
-    create_async_playwright_browser,
-)
-
-from langchain_community.tools.playwright.navigate import NavigateTool
-
 import asyncio
-import nest_asyncio
 
 class State(TypedDict):
     messages: Annotated[list, add_messages]
 
 from langchain_openai import ChatOpenAI 
 
-from my_utils.navigate import NexusNavigateTool
+from my_utils.browser_pool import BrowserPool, DEFAULT_BLOCKED_RESOURCES
+from my_utils.pooled_tools import get_pooled_tools
+from my_utils.parallel_tools import ParallelToolNode
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.messages import SystemMessage
 from langchain_core.prompts import HumanMessagePromptTemplate
 import uuid
 
+# One browser for the whole server: every page load builds a Nexus, but they all lease pages from this pool.
+# BROWSER_BLOCK_RESOURCES is a comma separated list of Playwright resource types; empty blocks nothing.
+browser_pool = BrowserPool(
+    size=int(os.environ.get('BROWSER_POOL_SIZE', '4')),
+    blocked_resources=os.environ.get('BROWSER_BLOCK_RESOURCES', ','.join(DEFAULT_BLOCKED_RESOURCES)).split(','),
+)
+
 class Nexus:
     def __init__(self, config: Config):
         self.config = config
@@ -71,7 +70,12 @@ class Nexus:
             model=self.config.openai_model_name,
         ).bind_tools(self.tools)
 
-        tool_node = ToolNode(self.tools)
+        # The tool calls of one message run concurrently; navigations are capped at the browser pool size
+        tool_node = ParallelToolNode(
+            self.tools,
+            limits={tool.name: browser_pool.size for tool in self.tools if tool.name != "google_search"},
+            timeout=float(os.environ.get('TOOL_CALL_TIMEOUT', '30')),
+        )
 
         graph_builder = StateGraph(State)
 
@@ -135,22 +139,9 @@ class Nexus:
         return {"messages": [await chain.ainvoke(input={"message": state["messages"][-1].content})]}
 
     def setup_playwright(self):
-        # use create_async_playwright_browser
-        # to create a browser instance
-        nest_asyncio.apply()
-        async_browser = create_async_playwright_browser()
-        # create a new instance of the NexusNavigateTool
-        # and pass the browser instance to it
-        navigate = NexusNavigateTool.from_browser(async_browser=async_browser)
-
-        toolkit = PlayWrightBrowserToolkit.from_browser(async_browser=async_browser)
-        tools = toolkit.get_tools()
-
-        # Filter out tool with object type NavigateTool
-        tools = [tool for tool in tools if not isinstance(tool, NavigateTool)]
-        tools.append(navigate)
-
-        return tools
+        # Each tool call leases its own page from the shared pool,
+        # so the tool calls of one turn navigate in parallel
+        return get_pooled_tools(browser_pool)
 
     def should_continue(self, state: State) -> Literal["action", "__end__"]:
         """Return the next node to execute."""
@@ -259,5 +250,6 @@ def main():
     # The agent will ask the user for their preferences and
     # then find events that match those preferences.
 
-ui.run(loop="asyncio") # playwright needs asyncio and nest_asyncio.apply()
+app.on_shutdown(browser_pool.close)
+ui.run(loop="asyncio") # playwright needs asyncio
 # ui.run()
\ No newline at end of file
@@ -0,0 +1,165 @@
+# A pool of warm Playwright browser contexts shared by every chat session.
+# Each tool call leases a fresh page in one of the contexts and gives it back when done,
+# so tool calls never fight over a shared "current page" and navigations can run in parallel.
+
+import time
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import Optional, Sequence
+
+# Requests of these types are aborted: the agent only reads the text and links of a page
+DEFAULT_BLOCKED_RESOURCES = ("image", "font", "media")
+
+logger = logging.getLogger(__name__)
+
+class _PooledContext:
+    def __init__(self, context):
+        self.context = context
+        self.uses = 0
+        self.last_used = time.monotonic()
+
+class BrowserPool:
+    """A fixed number of browser contexts in one Chromium, leased out a page at a time.
+
+    Contexts are created when the pool starts (on the first lease), so a tool call
+    only pays for a new page. A context is replaced with a clean one after
+    `max_uses` leases or once it has sat idle for `idle_seconds`, which drops the
+    cookies, cache and memory it has built up. With `size` contexts, at most
+    `size` pages are open at once; further leases wait for one to come back.
+    """
+    def __init__(self, size: int = 4, blocked_resources: Optional[Sequence[str]] = DEFAULT_BLOCKED_RESOURCES,
+                 max_uses: int = 50, idle_seconds: float = 300, headless: bool = True):
+        self.size = size
+        self.blocked_resources = frozenset(kind for kind in blocked_resources or () if kind)
+        self.max_uses = max_uses
+        self.idle_seconds = idle_seconds
+        self.headless = headless
+        self.stats = {"leases": 0, "recycled": 0, "relaunched": 0, "blocked": 0, "waits": 0}
+        self._playwright = None
+        self._browser = None
+        self._idle: Optional[asyncio.Queue] = None
+        self._start_lock = asyncio.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @property
+    def started(self):
+        return self._browser is not None
+
+    @property
+    def loop(self) -> Optional[asyncio.AbstractEventLoop]:
+        """The event loop the pool was started on; its browser and queue only work there."""
+        return self._loop
+
+    async def start(self):
+        async with self._start_lock:
+            if self.started:
+                return
+            self._loop = asyncio.get_running_loop()
+            self._playwright = await self._start_playwright()
+            self._browser = await self._playwright.chromium.launch(headless=self.headless)
+            self._idle = asyncio.Queue()
+            contexts = await asyncio.gather(*[self._new_context() for _ in range(self.size)])
+            for context in contexts:
+                self._idle.put_nowait(context)
+            logger.info(f"Browser pool ready with {self.size} contexts")
+
+    async def _start_playwright(self):
+        from playwright.async_api import async_playwright
+        return await async_playwright().start()
+
+    async def close(self):
+        if not self.started:
+            return
+        while not self._idle.empty():
+            pooled = self._idle.get_nowait()
+            if pooled.context is not None:
+                await pooled.context.close()
+        await self._browser.close()
+        await self._playwright.stop()
+        self._browser = self._playwright = self._idle = self._loop = None
+
+    async def _block(self, route):
+        if route.request.resource_type in self.blocked_resources:
+            self.stats["blocked"] += 1
+            await route.abort()
+        else:
+            await route.continue_()
+
+    async def _new_context(self) -> _PooledContext:
+        context = await self._browser.new_context()
+        if self.blocked_resources:
+            await context.route("**/*", self._block)
+        return _PooledContext(context)
+
+    async def _ensure_browser(self):
+        async with self._start_lock:
+            if self._browser.is_connected():
+                return
+            # Chromium crashed or was killed; the contexts still queued fail on their next lease and get replaced
+            self.stats["relaunched"] += 1
+            logger.warning("Browser disconnected, launching a new one")
+            self._browser = await self._playwright.chromium.launch(headless=self.headless)
+
+    async def _replace(self, pooled: _PooledContext) -> _PooledContext:
+        """A clean context in place of this one; an empty slot if none could be made, retried on its next lease."""
+        self.stats["recycled"] += 1
+        if pooled.context is not None:
+            try:
+                await pooled.context.close()
+            except Exception as e:
+                logger.debug(f"Closing a browser context failed: {e}")
+        try:
+            await self._ensure_browser()
+            return await self._new_context()
+        except Exception as e:
+            logger.error(f"Creating a browser context failed: {e}")
+            return _PooledContext(None)
+
+    async def _open_page(self, pooled: _PooledContext):
+        if pooled.context is None:
+            raise RuntimeError("No browser context available")
+        return await pooled.context.new_page()
+
+    @asynccontextmanager
+    async def lease(self):
+        """A new page in a pooled context, closed again when the block exits."""
+        if not self.started:
+            await self.start()
+        if self._idle.empty():
+            self.stats["waits"] += 1
+        pooled = await self._idle.get()
+        page = None
+        healthy = True
+        try:
+            if pooled.context is None or time.monotonic() - pooled.last_used > self.idle_seconds:
+                pooled = await self._replace(pooled)
+            try:
+                page = await self._open_page(pooled)
+            except Exception:
+                # A dead context or browser: one more try on a fresh context
+                pooled = await self._replace(pooled)
+                page = await self._open_page(pooled)
+            self.stats["leases"] += 1
+            yield page
+        except BaseException:
+            # The page or the context may be left in a bad state; do not hand it out again
+            healthy = False
+            raise
+        finally:
+            pooled.uses += 1
+            pooled.last_used = time.monotonic()
+            try:
+                if page is not None:
+                    await page.close()
+            except Exception:
+                healthy = False
+            try:
+                if not healthy or pooled.uses >= self.max_uses:
+                    pooled = await self._replace(pooled)
+            finally:
+                # _replace never raises, so this is a working context or an empty slot, never a closed one
+                self._idle.put_nowait(pooled)
+
+    def snapshot(self):
+        return {**self.stats, "size": self.size, "idle": self._idle.qsize() if self._idle is not None else 0}
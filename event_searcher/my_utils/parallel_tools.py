@@ -0,0 +1,63 @@
+# A graph node that runs the tool calls of one AI message concurrently.
+# Each tool has its own concurrency limit (e.g. no more navigations than the browser pool has
+# contexts), and every call gets a timeout so one hung site cannot hold up the whole turn.
+# Results come back as ToolMessages in the order of the tool calls, whatever order they finish in.
+
+import time
+import asyncio
+import logging
+from typing import Dict, Optional, Sequence
+
+from langchain_core.messages import AIMessage, ToolMessage
+from langchain_core.tools import BaseTool
+
+logger = logging.getLogger(__name__)
+
+class ParallelToolNode:
+    def __init__(self, tools: Sequence[BaseTool], limits: Optional[Dict[str, int]] = None,
+                 default_limit: int = 4, timeout: float = 30.0):
+        self.tools = {tool.name: tool for tool in tools}
+        self.limits = limits or {}
+        self.default_limit = default_limit
+        self.timeout = timeout
+        # Created on first use, so they belong to the running event loop
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    def _semaphore(self, name) -> asyncio.Semaphore:
+        if name not in self._semaphores:
+            self._semaphores[name] = asyncio.Semaphore(self.limits.get(name, self.default_limit))
+        return self._semaphores[name]
+
+    async def _invoke(self, tool, call, config):
+        async with self._semaphore(tool.name):
+            started = time.perf_counter()
+            output = await tool.ainvoke(call["args"], config)
+            logger.debug(f"Tool call {tool.name} took {time.perf_counter() - started:.2f}s")
+            return output
+
+    async def _run_one(self, call, config) -> ToolMessage:
+        name = call["name"]
+        tool = self.tools.get(name)
+        if tool is None:
+            return ToolMessage(content=f"Error: {name} is not a valid tool, try one of [{', '.join(self.tools)}].",
+                               name=name, tool_call_id=call["id"], status="error")
+        try:
+            # The timeout covers waiting for a slot too, so calls queued behind a hung one are bounded as well
+            output = await asyncio.wait_for(self._invoke(tool, call, config), self.timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Tool call {name} timed out after {self.timeout}s")
+            return ToolMessage(content=f"Error: {name} did not finish within {self.timeout} seconds.",
+                               name=name, tool_call_id=call["id"], status="error")
+        except Exception as e:
+            logger.warning(f"Tool call {name} failed: {e}")
+            return ToolMessage(content=f"Error: {e!r}\n Please fix your mistakes.",
+                               name=name, tool_call_id=call["id"], status="error")
+        return ToolMessage(content=output if isinstance(output, str) else str(output),
+                           name=name, tool_call_id=call["id"])
+
+    async def __call__(self, state, config=None):
+        message = state["messages"][-1]
+        if not isinstance(message, AIMessage):
+            raise ValueError("ParallelToolNode expects the last message to be an AIMessage with tool calls")
+        results = await asyncio.gather(*(self._run_one(call, config) for call in message.tool_calls))
+        return {"messages": list(results)}
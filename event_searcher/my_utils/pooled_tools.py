@@ -0,0 +1,77 @@
+# Browser tools that lease their own page from a BrowserPool for every call.
+# The PlayWrightBrowserToolkit tools all act on one shared "current page", so two tool calls
+# (or two chat sessions) at once would navigate over each other. These tools take the URL
+# as an argument instead, and return what the agent needs from the page in one step.
+# Failures are returned as text, not raised, so the agent can try another site.
+
+import json
+import asyncio
+import logging
+from typing import Optional, Type
+
+from pydantic import BaseModel, Field
+from langchain_core.tools import BaseTool
+from langchain_core.callbacks import AsyncCallbackManagerForToolRun
+
+from my_utils.browser_pool import BrowserPool
+
+logger = logging.getLogger(__name__)
+
+class UrlInput(BaseModel):
+    url: str = Field(..., description="url to open")
+
+class PooledBrowserTool(BaseTool):
+    pool: BrowserPool
+    # Milliseconds; waits for the DOM only, since blocked images and fonts never finish loading
+    timeout: float = 20000
+
+    async def _read(self, page) -> str:
+        raise NotImplementedError
+
+    async def _arun(self, url: str, run_manager: Optional[AsyncCallbackManagerForToolRun] = None) -> str:
+        try:
+            async with self.pool.lease() as page:
+                response = await page.goto(url, timeout=self.timeout, wait_until="domcontentloaded")
+                status = response.status if response else "unknown"
+                return f"Navigating to {url} returned status code {status}\n\n{await self._read(page)}"
+        except Exception as e:
+            logger.warning(f"{self.name} could not open {url}: {e}")
+            return f"There was a problem navigating to {url}. The site is inaccessible: {e}"
+
+    def _run(self, url: str, run_manager=None) -> str:
+        """For sync callers in another thread: the page is leased on the pool's own event loop."""
+        loop = self.pool.loop
+        if loop is None or not loop.is_running():
+            raise RuntimeError(f"{self.name} needs a started BrowserPool on a running event loop; use ainvoke")
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            # Blocking here would stop the loop the lease has to run on
+            raise RuntimeError(f"{self.name} cannot run synchronously on the pool's event loop; use ainvoke")
+        return asyncio.run_coroutine_threadsafe(self._arun(url), loop).result()
+
+class PooledNavigateTool(PooledBrowserTool):
+    name: str = "navigate_browser"
+    description: str = "Navigate a browser to the specified URL and return the visible text of the page"
+    args_schema: Type[BaseModel] = UrlInput
+    max_chars: int = 8000
+
+    async def _read(self, page) -> str:
+        text = await page.inner_text("body")
+        return text[:self.max_chars]
+
+class PooledExtractHyperlinksTool(PooledBrowserTool):
+    name: str = "extract_hyperlinks"
+    description: str = "Open the specified URL and return the text and address of every hyperlink on the page"
+    args_schema: Type[BaseModel] = UrlInput
+    max_links: int = 200
+
+    async def _read(self, page) -> str:
+        links = await page.eval_on_selector_all(
+            "a[href]", "elements => elements.map(a => ({text: a.innerText.trim(), href: a.href}))")
+        return json.dumps(links[:self.max_links])
+
+def get_pooled_tools(pool: BrowserPool):
+    return [PooledNavigateTool(pool=pool), PooledExtractHyperlinksTool(pool=pool)]
@@ -0,0 +1,166 @@
+import asyncio
+import unittest
+import threading
+
+from my_utils.browser_pool import BrowserPool
+from my_utils.pooled_tools import PooledNavigateTool
+
+class FakeResponse:
+    status = 200
+
+class FakePage:
+    async def goto(self, url, timeout=None, wait_until=None):
+        if "down" in url:
+            raise RuntimeError("net::ERR_NAME_NOT_RESOLVED")
+        return FakeResponse()
+
+    async def inner_text(self, selector):
+        return "Concerts this week"
+
+    async def close(self):
+        pass
+
+class FakeContext:
+    def __init__(self, browser):
+        self.browser = browser
+        self.closed = False
+
+    async def new_page(self):
+        if self.closed or not self.browser.connected:
+            raise RuntimeError("Target closed")
+        return FakePage()
+
+    async def route(self, pattern, handler):
+        pass
+
+    async def close(self):
+        self.closed = True
+
+class FakeBrowser:
+    def __init__(self):
+        self.connected = True
+        self.fail_new_context = False
+        self.contexts = []
+
+    def is_connected(self):
+        return self.connected
+
+    async def new_context(self):
+        if self.fail_new_context or not self.connected:
+            raise RuntimeError("Browser has been closed")
+        context = FakeContext(self)
+        self.contexts.append(context)
+        return context
+
+    async def close(self):
+        self.connected = False
+
+class FakeChromium:
+    def __init__(self):
+        self.browsers = []
+
+    async def launch(self, headless=True):
+        self.browsers.append(FakeBrowser())
+        return self.browsers[-1]
+
+class FakePlaywright:
+    def __init__(self):
+        self.chromium = FakeChromium()
+
+    async def stop(self):
+        pass
+
+class FakeBrowserPool(BrowserPool):
+    async def _start_playwright(self):
+        self.fake = FakePlaywright()
+        return self.fake
+
+class TestBrowserPool(unittest.IsolatedAsyncioTestCase):
+    async def asyncTearDown(self):
+        await self.pool.close()
+
+    async def test_leases_wait_for_a_free_context(self):
+        self.pool = FakeBrowserPool(size=2)
+        running = peak = 0
+
+        async def visit():
+            nonlocal running, peak
+            async with self.pool.lease():
+                running += 1
+                peak = max(peak, running)
+                await asyncio.sleep(0.02)
+                running -= 1
+
+        await asyncio.gather(*[visit() for _ in range(6)])
+        self.assertEqual(peak, 2)
+        self.assertEqual(self.pool.stats["leases"], 6)
+        self.assertEqual(self.pool.snapshot()["idle"], 2)
+
+    async def test_failed_lease_recycles_its_context(self):
+        self.pool = FakeBrowserPool(size=1)
+        with self.assertRaises(ValueError):
+            async with self.pool.lease():
+                raise ValueError("page crashed")
+        async with self.pool.lease():
+            pass
+        self.assertEqual(self.pool.stats["recycled"], 1)
+
+    async def test_failed_recycle_never_requeues_a_closed_context(self):
+        self.pool = FakeBrowserPool(size=1, max_uses=1)
+        async with self.pool.lease():
+            browser = self.pool.fake.chromium.browsers[-1]
+            browser.fail_new_context = True
+        # The slot is empty now; the next lease makes a context once that works again
+        browser.fail_new_context = False
+        async with self.pool.lease() as page:
+            self.assertIsInstance(page, FakePage)
+        self.assertFalse(browser.contexts[-1].closed)
+
+    async def test_crashed_browser_is_relaunched(self):
+        self.pool = FakeBrowserPool(size=2)
+        async with self.pool.lease():
+            pass
+        self.pool.fake.chromium.browsers[-1].connected = False
+        async with self.pool.lease() as page:
+            self.assertIsInstance(page, FakePage)
+        self.assertEqual(self.pool.stats["relaunched"], 1)
+        self.assertEqual(len(self.pool.fake.chromium.browsers), 2)
+
+class TestPooledTools(unittest.TestCase):
+    def setUp(self):
+        self.pool = FakeBrowserPool(size=1)
+        self.tool = PooledNavigateTool(pool=self.pool)
+
+    def test_failures_are_logged_and_returned_as_text(self):
+        async def visit():
+            try:
+                ok = await self.tool.ainvoke({"url": "https://ok.example/"})
+                return ok, await self.tool.ainvoke({"url": "https://down.example/"})
+            finally:
+                await self.pool.close()
+
+        with self.assertLogs("my_utils.pooled_tools", level="WARNING") as logs:
+            ok, down = asyncio.run(visit())
+        self.assertEqual(ok, "Navigating to https://ok.example/ returned status code 200\n\nConcerts this week")
+        self.assertIn("There was a problem navigating to https://down.example/", down)
+        self.assertIn("ERR_NAME_NOT_RESOLVED", logs.output[0])
+
+    def test_sync_call_runs_on_the_pool_loop(self):
+        with self.assertRaises(RuntimeError):
+            self.tool.invoke({"url": "https://ok.example/"})
+
+        loop = asyncio.new_event_loop()
+        thread = threading.Thread(target=loop.run_forever)
+        thread.start()
+        try:
+            asyncio.run_coroutine_threadsafe(self.pool.start(), loop).result()
+            self.assertIn("Concerts this week", self.tool.invoke({"url": "https://ok.example/"}))
+            self.assertEqual(self.pool.stats["leases"], 1)
+            asyncio.run_coroutine_threadsafe(self.pool.close(), loop).result()
+        finally:
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join()
+            loop.close()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+import time
+import asyncio
+import unittest
+
+from langchain_core.messages import AIMessage
+from langchain_core.tools import StructuredTool
+
+from my_utils.parallel_tools import ParallelToolNode
+
+def fake_tool(name, seconds, tracker=None, fail=False):
+    async def run(query: str) -> str:
+        if tracker is not None:
+            tracker["running"] += 1
+            tracker["peak"] = max(tracker["peak"], tracker["running"])
+        try:
+            await asyncio.sleep(seconds)
+            if fail:
+                raise ValueError(f"{name} broke")
+            return f"{name}: {query}"
+        finally:
+            if tracker is not None:
+                tracker["running"] -= 1
+    return StructuredTool.from_function(coroutine=run, name=name, description=name)
+
+def message(*names):
+    return {"messages": [AIMessage(content="", tool_calls=[
+        {"name": name, "args": {"query": str(i)}, "id": f"call_{i}"} for i, name in enumerate(names)])]}
+
+class TestParallelToolNode(unittest.IsolatedAsyncioTestCase):
+    async def test_calls_run_concurrently_in_call_order(self):
+        node = ParallelToolNode([fake_tool("slow", 0.2), fake_tool("fast", 0.01)])
+        started = time.perf_counter()
+        result = await node(message("slow", "fast", "slow", "fast"))
+        self.assertLess(time.perf_counter() - started, 0.35)
+        self.assertEqual([m.tool_call_id for m in result["messages"]], ["call_0", "call_1", "call_2", "call_3"])
+        self.assertEqual(result["messages"][0].content, "slow: 0")
+
+    async def test_per_tool_limit(self):
+        tracker = {"running": 0, "peak": 0}
+        node = ParallelToolNode([fake_tool("navigate", 0.05, tracker)], limits={"navigate": 2})
+        result = await node(message(*["navigate"] * 6))
+        self.assertEqual(tracker["peak"], 2)
+        self.assertEqual(len(result["messages"]), 6)
+
+    async def test_timeout_bounds_queued_calls(self):
+        # One slot and hung calls: every call's timeout runs from the start of the turn, so the calls queued
+        # behind the first give up with it instead of each waiting out a full timeout of their own
+        node = ParallelToolNode([fake_tool("navigate", 5)], limits={"navigate": 1}, timeout=0.2)
+        started = time.perf_counter()
+        result = await node(message("navigate", "navigate", "navigate"))
+        self.assertLess(time.perf_counter() - started, 0.4)
+        self.assertEqual([m.status for m in result["messages"]], ["error", "error", "error"])
+        self.assertIn("did not finish", result["messages"][2].content)
+
+    async def test_errors_stay_with_their_call(self):
+        node = ParallelToolNode([fake_tool("search", 0.01), fake_tool("broken", 0.01, fail=True)])
+        result = await node(message("broken", "search", "missing"))
+        statuses = [m.status for m in result["messages"]]
+        self.assertEqual(statuses, ["error", "success", "error"])
+        self.assertIn("broken broke", result["messages"][0].content)
+        self.assertIn("not a valid tool", result["messages"][2].content)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -40,9 +40,13 @@ class RunPodAPI:
 
     def decode_image(self, json_data):
         try:
-            base64_image = json_data["output"]["image_url"]
-            base64_image = base64_image.replace("data:image/png;base64,", "")
-            return base64_image
+            image_url = json_data["output"]["image_url"]
+            # Cut the data URL header by index: one slice of the payload, whatever the
+            # MIME type, instead of replace() scanning and rebuilding the whole string.
+            # With no comma in the header, find() gives -1 and the string is kept whole, as replace() did.
+            if image_url.startswith("data:"):
+                return image_url[image_url.find(",", 0, 256) + 1:]
+            return image_url
         except KeyError as e:
             print(f"Error in JSON structure: {e}")
             return None
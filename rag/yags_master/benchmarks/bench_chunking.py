@@ -0,0 +1,111 @@
+# Chunks and retrieval context per query: the Markdown of a synthetic .yags rulebook split by
+# SentenceSplitter (as SimpleDirectoryReader documents are) vs SectionChunker on the XML.
+# Every rule section has its own vocabulary and a varying number of paragraphs, and each
+# query names one section. Retrieval is BM25, so the numbers depend only on the chunking:
+#   spanning  chunks holding text from more than one section
+#   hit@1     the best chunk belongs to the queried section
+#   k         chunks needed before every paragraph of the section has been retrieved
+#   context   tokens the LLM sees for those k chunks, metadata included
+#   own       the share of those tokens that come from the queried section
+#
+# Usage (from rag/yags_master/): python benchmarks/bench_chunking.py [sect1 count]
+
+import os
+import re
+import sys
+import time
+import random
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from llama_index.core import Document
+from llama_index.core.node_parser import SentenceSplitter
+from llama_index.core.schema import MetadataMode
+from llama_index.core.utils import get_tokenizer
+from ym.bm25 import BM25Index
+from ym.chunking import SectionChunker
+from ym.parsers import StreamingMarkdownConverter
+
+SECT1 = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+SECT2 = 6
+MAX_K = 30
+COMMON = ("the character rolls dice against a target number and adds the attribute and skill "
+          "level to the result when the game master asks for a check during play").split()
+MARKER = re.compile(r"\bmark(\d+)x(\d+)x(\d+)\b")
+
+def write_book(path, rng):
+    """Write the rulebook; returns {section: paragraph count}."""
+    sections = {}
+    with open(path, "w") as f:
+        f.write('<?xml version="1.0"?>\n<article xmlns="http://yagsbook.sourceforge.net/xml">\n')
+        f.write("<header><title>Synthetic Rules</title><tagline>For benchmarking</tagline>"
+                "<summary>Many sections of rules.</summary></header>\n<body>\n")
+        for i in range(SECT1):
+            f.write(f"<sect1><title>Chapter {i}</title>\n")
+            for j in range(SECT2):
+                paragraphs = rng.randint(1, 9)
+                sections[(i, j)] = paragraphs
+                f.write(f"<sect2><title>Rule {i}.{j}</title>\n")
+                for n in range(paragraphs):
+                    words = rng.sample(COMMON, 12) + [f"topic{i}x{j}"] * 3 + [f"mark{i}x{j}x{n}"]
+                    rng.shuffle(words)
+                    f.write(f"<para>{' '.join(words)}. {' '.join(rng.sample(COMMON, 20))}.</para>\n")
+                f.write("</sect2>\n")
+            f.write("</sect1>\n")
+        f.write("</body>\n</article>\n")
+    return sections
+
+def markers(text):
+    return {tuple(map(int, match)) for match in MARKER.findall(text)}
+
+def evaluate(name, nodes, sections, tokenizer, seconds):
+    texts = {node.node_id: node.get_content(metadata_mode=MetadataMode.LLM) for node in nodes}
+    found = {node_id: markers(text) for node_id, text in texts.items()}
+    tokens = {node_id: len(tokenizer(text)) for node_id, text in texts.items()}
+    spanning = sum(len({marker[:2] for marker in chunk}) > 1 for chunk in found.values())
+    index = BM25Index()
+    index.add(nodes)
+
+    hits, needed, context, purity = 0, [], [], []
+    for (i, j), paragraphs in sections.items():
+        results = [node_id for node_id, _ in index.search(f"topic{i}x{j}", top_k=MAX_K)]
+        hits += bool(results) and any(marker[:2] == (i, j) for marker in found[results[0]])
+        wanted = {(i, j, n) for n in range(paragraphs)}
+        for k, node_id in enumerate(results, 1):
+            wanted -= found[node_id]
+            if not wanted:
+                break
+        needed.append(k)
+        context.append(sum(tokens[node_id] for node_id in results[:k]))
+        own = sum(sum(marker[:2] == (i, j) for marker in found[node_id]) / max(len(found[node_id]), 1) * tokens[node_id]
+                  for node_id in results[:k])
+        purity.append(own / context[-1])
+    print(f"{name:<24} {len(nodes):>6} {np.mean(list(tokens.values())):>7.0f} {spanning / len(nodes):>9.0%} "
+          f"{hits / len(sections):>6.0%} {np.mean(needed):>5.2f} {np.mean(context):>8.0f} {np.mean(purity):>6.0%} "
+          f"{seconds * 1000:>8.1f}")
+
+def main():
+    rng = random.Random(7)
+    tokenizer = get_tokenizer()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "rules.yags")
+        sections = write_book(path, rng)
+        print(f"{len(sections)} rule sections, {sum(sections.values())} paragraphs\n")
+        print(f"{'chunking':<24} {'chunks':>6} {'tokens':>7} {'spanning':>9} {'hit@1':>6} {'k':>5} "
+              f"{'context':>8} {'own':>6} {'chunk ms':>8}")
+
+        for chunk_size, overlap in ((1024, 200), (384, 64)):
+            started = time.perf_counter()
+            document = Document(text=StreamingMarkdownConverter(path).to_markdown(), id_=path)
+            nodes = SentenceSplitter(chunk_size=chunk_size, chunk_overlap=overlap).get_nodes_from_documents([document])
+            evaluate(f"markdown + split {chunk_size}", nodes, sections, tokenizer, time.perf_counter() - started)
+
+        for budget in (384, 192):
+            started = time.perf_counter()
+            nodes = SectionChunker(budget).chunk_file(path)
+            evaluate(f"sections {budget}", nodes, sections, tokenizer, time.perf_counter() - started)
+
+if __name__ == "__main__":
+    main()
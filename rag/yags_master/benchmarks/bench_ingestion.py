@@ -0,0 +1,62 @@
+# Index a folder of synthetic rulebook files with a fake embedding API that charges a
+# fixed round-trip latency per request: VectorStoreIndex.from_documents (serial loading,
+# serial embedding batches) vs EmbeddingPipeline (process-pool parsing, concurrent batches).
+#
+# Usage (from rag/yags_master/): python benchmarks/bench_ingestion.py
+
+import os
+import sys
+import time
+import random
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from llama_index.core import Settings, SimpleDirectoryReader, VectorStoreIndex
+from ym.fake_embedding import FakeEmbedding
+from ym.ingestion import EmbeddingPipeline
+
+FILES = 80
+PARAGRAPHS = 30
+CHUNK_SIZE = 256
+WORDS = ("skill attribute difficulty task roll dice target success failure combat wound "
+         "armour weapon damage initiative spell magic advantage character experience").split()
+
+def write_corpus(directory):
+    rng = random.Random(7)
+    for i in range(FILES):
+        with open(os.path.join(directory, f"chapter{i:02d}.md"), "w") as f:
+            f.write(f"# Chapter {i}\n\n")
+            for _ in range(PARAGRAPHS):
+                sentences = (" ".join(rng.choices(WORDS, k=rng.randint(8, 20))).capitalize() + "."
+                             for _ in range(rng.randint(3, 6)))
+                f.write(" ".join(sentences) + "\n\n")
+
+def fake_model(failure_rate=0.0):
+    return FakeEmbedding(latency=0.05, per_text=0.001, failure_rate=failure_rate, embed_batch_size=10)
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        write_corpus(directory)
+        paths = sorted(os.path.join(directory, name) for name in os.listdir(directory))
+
+        Settings.chunk_size = CHUNK_SIZE
+        Settings.embed_model = model = fake_model()
+        started = time.perf_counter()
+        documents = SimpleDirectoryReader(directory).load_data()
+        index = VectorStoreIndex.from_documents(documents)
+        elapsed = time.perf_counter() - started
+        print(f"{'from_documents (serial)':<36} {elapsed:6.2f} s   {len(index.docstore.docs)} chunks   {model.calls} calls")
+
+        for label, failure_rate in (("EmbeddingPipeline", 0.0), ("EmbeddingPipeline, 10% failures", 0.1)):
+            model = fake_model(failure_rate)
+            pipeline = EmbeddingPipeline(embed_model=model, workers=4, batch_size=32, max_concurrency=8, retry_delay=0.05)
+            started = time.perf_counter()
+            result = pipeline.run(paths=paths)
+            index = VectorStoreIndex(result.nodes)
+            elapsed = time.perf_counter() - started
+            print(f"{label:<36} {elapsed:6.2f} s   {len(index.docstore.docs)} chunks   {model.calls} calls")
+            print(f"    {result.stats}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+# Convert a synthetic .yags rulebook to Markdown: XMLToMarkdownParser (ET.parse of the whole
+# tree) vs StreamingMarkdownConverter (iterparse, elements cleared as they are converted).
+# Peak memory is what Python allocates during a second, traced conversion (tracemalloc).
+#
+# Usage (from rag/yags_master/): python benchmarks/bench_parsers.py [sect1 count]
+
+import io
+import os
+import sys
+import time
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ym.parsers import StreamingMarkdownConverter, XMLToMarkdownParser
+
+SECT1 = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+SECT2 = 8
+PARAS = 12
+
+def write_book(path):
+    with open(path, "w") as f:
+        f.write('<?xml version="1.0"?>\n<article xmlns="http://yagsbook.sourceforge.net/xml">\n')
+        f.write("<header><title>Synthetic Rules</title><tagline>For benchmarking</tagline>"
+                "<summary>Many sections of rules.</summary></header>\n<body>\n")
+        for i in range(SECT1):
+            f.write(f"<sect1><title>Chapter {i}</title>\n")
+            for p in range(PARAS // 2):
+                f.write(f"<para>Chapter {i} rule {p}: roll <e>skill</e> plus attribute against the "
+                        f"difficulty, and a <e>critical</e> success doubles the effect.</para>\n")
+            for j in range(SECT2):
+                f.write(f"<sect2><title>Section {i}.{j}</title>\n")
+                for p in range(PARAS):
+                    f.write(f"<para>Section {i}.{j} paragraph {p} explains how wounds, fatigue and "
+                            f"<e>stun</e> interact during a combat round.</para>\n")
+                f.write("</sect2>\n")
+            f.write("</sect1>\n")
+        f.write("</body>\n</article>\n")
+
+def measure(label, convert):
+    # Timed without tracemalloc, which slows allocation-heavy code unevenly
+    started = time.perf_counter()
+    result = convert()
+    elapsed = time.perf_counter() - started
+    tracemalloc.start()
+    convert()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<34} {elapsed * 1000:8.0f} ms   peak {peak / 2**20:7.1f} MiB")
+    return result
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "book.yags")
+        write_book(path)
+        print(f"{os.path.getsize(path) / 2**20:.1f} MiB of XML, {SECT1} chapters")
+        expected = measure("XMLToMarkdownParser", lambda: XMLToMarkdownParser(path).to_markdown())
+        streamed = measure("StreamingMarkdownConverter", lambda: StreamingMarkdownConverter(path).to_markdown())
+        with open(os.path.join(directory, "book.md"), "w") as sink:
+            measure("StreamingMarkdownConverter to file",
+                    lambda: (sink.seek(0), StreamingMarkdownConverter(path).write_to(sink)))
+        sections = sum(1 for _ in StreamingMarkdownConverter(path).sections())
+        print(f"identical output: {expected == streamed}, {sections} sections")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+# Recall@k and per-query latency of the YagsMaster retrievers over a fixed question set.
+# The corpus is synthetic rulebook sections that share most of their vocabulary; each
+# question names the terms of exactly one section, which is the expected answer.
+# Embeddings come from FakeEmbedding (hashed words), so the dense numbers show the
+# plumbing, not the quality of a real model.
+#
+# Usage (from rag/yags_master/): python benchmarks/bench_retrieval.py
+
+import os
+import sys
+import time
+import random
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from llama_index.core import Settings
+from ym.fake_embedding import FakeEmbedding
+from ym.indexing import IncrementalIndexer
+from ym.ingestion import EmbeddingPipeline
+from ym.retrieval import HybridRetriever, RetrievalConfig, create_reranker
+
+RECALL_AT = (1, 3, 5)
+COMMON = ("the character rolls dice against a target number and adds the attribute and skill "
+          "level to the result when the game master asks for a check during play").split()
+SECTIONS = {
+    "difficulty": ("difficulty", "easy", "hard", "tricky", "target"),
+    "athletics": ("athletics", "climbing", "swimming", "jumping", "running"),
+    "brawl": ("brawl", "punch", "kick", "grapple", "unarmed"),
+    "initiative": ("initiative", "order", "round", "speed", "react"),
+    "wounds": ("wounds", "stun", "lethal", "bleeding", "unconscious"),
+    "healing": ("healing", "medicine", "recovery", "bandage", "rest"),
+    "armour": ("armour", "soak", "padded", "chain", "plate"),
+    "fatigue": ("fatigue", "exhaustion", "sleep", "march", "stamina"),
+    "magic": ("magic", "spell", "mana", "ritual", "casting"),
+    "stealth": ("stealth", "hide", "sneak", "shadow", "silent"),
+    "perception": ("perception", "notice", "search", "awareness", "spot"),
+    "advantages": ("advantages", "ambidextrous", "lucky", "tough", "wealthy"),
+    "disadvantages": ("disadvantages", "clumsy", "greedy", "phobia", "unlucky"),
+    "experience": ("experience", "improvement", "advance", "training", "points"),
+    "ranged": ("ranged", "bow", "crossbow", "aim", "range"),
+    "languages": ("languages", "literacy", "dialect", "script", "fluent"),
+}
+QUESTIONS = [
+    ("How hard is a tricky task and what is its target?", "difficulty"),
+    ("Which skill covers climbing and swimming?", "athletics"),
+    ("How do I grapple or punch someone unarmed?", "brawl"),
+    ("Who acts first each round, what decides initiative order?", "initiative"),
+    ("When does a character fall unconscious from lethal wounds?", "wounds"),
+    ("How long is recovery with a bandage and rest?", "healing"),
+    ("How much damage does plate armour soak?", "armour"),
+    ("What happens after a long march without sleep?", "fatigue"),
+    ("How much mana does casting a ritual spell cost?", "magic"),
+    ("Can I sneak and hide in shadow?", "stealth"),
+    ("How do I notice or spot something with a search?", "perception"),
+    ("What does the lucky advantage do?", "advantages"),
+    ("Is clumsy or greedy a disadvantage?", "disadvantages"),
+    ("How many experience points does training cost?", "experience"),
+    ("What is the range of a crossbow and how do I aim?", "ranged"),
+    ("Do characters need literacy to read a script?", "languages"),
+]
+
+def write_corpus(directory):
+    rng = random.Random(3)
+    for name, terms in SECTIONS.items():
+        with open(os.path.join(directory, f"{name}.md"), "w") as f:
+            f.write(f"# {name.capitalize()}\n\n")
+            for _ in range(12):
+                words = rng.choices(COMMON, k=40) + rng.choices(terms, k=3)
+                rng.shuffle(words)
+                f.write(" ".join(words).capitalize() + ".\n\n")
+
+def evaluate(label, retriever, reranker=None):
+    hits = {k: 0 for k in RECALL_AT}
+    latencies = []
+    for question, expected in QUESTIONS:
+        started = time.perf_counter()
+        results = retriever.retrieve(question)
+        if reranker is not None:
+            results = reranker.postprocess_nodes(results, query_str=question)
+        latencies.append((time.perf_counter() - started) * 1000)
+        files = [result.node.metadata.get("file_name") for result in results]
+        for k in RECALL_AT:
+            hits[k] += f"{expected}.md" in files[:k]
+    recall = "   ".join(f"recall@{k} {hits[k] / len(QUESTIONS):.2f}" for k in RECALL_AT)
+    print(f"{label:<24} {recall}   p50 {np.percentile(latencies, 50):6.2f} ms   p95 {np.percentile(latencies, 95):6.2f} ms")
+
+def main():
+    Settings.embed_model = FakeEmbedding(latency=0.0, per_text=0.0)
+    Settings.chunk_size = 128
+    Settings.chunk_overlap = 16
+    with tempfile.TemporaryDirectory() as root:
+        corpus, persist_dir = os.path.join(root, "corpus"), os.path.join(root, "index")
+        os.makedirs(corpus)
+        write_corpus(corpus)
+        indexer = IncrementalIndexer(corpus, persist_dir, pipeline=EmbeddingPipeline(workers=2))
+        index, _ = indexer.sync()
+        keyword_index = indexer.keyword_index
+        print(f"{len(SECTIONS)} sections, {len(keyword_index)} chunks, {len(QUESTIONS)} questions")
+
+        evaluate("vector only", HybridRetriever(index, None, RetrievalConfig(keyword_top_k=0, fusion_top_k=10)))
+        evaluate("BM25 only", HybridRetriever(index, keyword_index, RetrievalConfig(vector_top_k=0, fusion_top_k=10)))
+        for top_k in (5, 10, 20):
+            config = RetrievalConfig(vector_top_k=top_k, keyword_top_k=top_k, fusion_top_k=10)
+            evaluate(f"hybrid, {top_k} per side", HybridRetriever(index, keyword_index, config))
+        try:
+            config = RetrievalConfig(rerank_model="cross-encoder/ms-marco-MiniLM-L-6-v2", rerank_top_k=5)
+            evaluate("hybrid + rerank", HybridRetriever(index, keyword_index, config), create_reranker(config))
+        except ImportError:
+            print("hybrid + rerank          skipped, sentence-transformers is not installed")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+# Cold start and query latency for a persisted index of synthetic embedded chunks:
+# the default JSON storage (SimpleVectorStore plus docstore) vs MmapVectorStore as
+# float32 and int8. Load memory is the growth in resident memory across the load
+# (Linux /proc), before any query has paged in the mapped arrays.
+#
+# Usage (from rag/yags_master/): python benchmarks/bench_vector_store.py
+
+import os
+import sys
+import time
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from llama_index.core import Settings, StorageContext, VectorStoreIndex, load_index_from_storage
+from llama_index.core.schema import NodeRelationship, RelatedNodeInfo, TextNode
+from llama_index.core.vector_stores.types import VectorStoreQuery
+from ym.fake_embedding import FakeEmbedding
+from ym.vector_store import MmapVectorStore
+
+CHUNKS = 5000
+DIM = 768
+QUERIES = 20
+
+def make_nodes():
+    rng = np.random.default_rng(7)
+    vectors = rng.standard_normal((CHUNKS, DIM), dtype=np.float32)
+    nodes = []
+    for i, vector in enumerate(vectors):
+        node = TextNode(text=f"Chunk {i} of the rulebook. " * 20, embedding=vector.tolist(),
+                        metadata={"file_name": f"chapter{i // 100:03d}.md"})
+        node.relationships[NodeRelationship.SOURCE] = RelatedNodeInfo(node_id=f"chapter{i // 100:03d}.md")
+        nodes.append(node)
+    return nodes, vectors
+
+def directory_size(path):
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names)
+
+def resident_bytes():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+def bench(label, persist_dir, vector_store, queries):
+    before = resident_bytes()
+    started = time.perf_counter()
+    store = MmapVectorStore.from_persist_dir(persist_dir) if vector_store else None
+    index = load_index_from_storage(StorageContext.from_defaults(persist_dir=persist_dir, vector_store=store))
+    load_seconds = time.perf_counter() - started
+    grown = resident_bytes() - before
+    started = time.perf_counter()
+    for query in queries:
+        index.vector_store.query(VectorStoreQuery(query_embedding=query.tolist(), similarity_top_k=5))
+    query_ms = (time.perf_counter() - started) / len(queries) * 1000
+    print(f"{label:<22} on disk {directory_size(persist_dir) / 2**20:7.1f} MiB   load {load_seconds * 1000:8.0f} ms   "
+          f"memory +{grown / 2**20:6.1f} MiB   query {query_ms:6.1f} ms")
+
+def main():
+    Settings.embed_model = FakeEmbedding(embed_dim=DIM)
+    nodes, vectors = make_nodes()
+    queries = vectors[:QUERIES] + 0.1
+    with tempfile.TemporaryDirectory() as root:
+        json_dir, f32_dir, i8_dir = (os.path.join(root, name) for name in ("json", "float32", "int8"))
+        VectorStoreIndex(nodes).storage_context.persist(json_dir)
+        for persist_dir, dtype in ((f32_dir, "float32"), (i8_dir, "int8")):
+            storage_context = StorageContext.from_defaults(vector_store=MmapVectorStore(dtype=dtype))
+            VectorStoreIndex(nodes, storage_context=storage_context).storage_context.persist(persist_dir)
+        print(f"{CHUNKS} chunks x {DIM} dimensions")
+        bench("JSON (default)", json_dir, False, queries)
+        bench("MmapVectorStore f32", f32_dir, True, queries)
+        bench("MmapVectorStore int8", i8_dir, True, queries)
+
+if __name__ == "__main__":
+    main()
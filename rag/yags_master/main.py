@@ -1,79 +1,214 @@
 # This is a retrieval augmented generation implementation of a YAGS game master.
 # YAGS is a free and open source tabletop roleplaying game system that is designed to be simple and easy to learn.
 
+import os
+import json
+import asyncio
 from dotenv import load_dotenv
 load_dotenv()
 
-# We are going to take the YagsRPG XML, convert it to Markdown then parse that into a vectorstore.
-# from ym.parsers import XMLToMarkdownParser
-# 
-# xml_file_path = "datalake/yags/src/core/character.yags"
-# 
-# parser = XMLToMarkdownParser(xml_file_path)
-# markdown_output = parser.to_markdown()
-# 
-# print(markdown_output)
+# The YAGS XML sources are chunked by section as they are indexed; PDFs (e.g. datalake/yags/release/subset) also load
+SOURCE_PATH = os.getenv("YAGS_SOURCE_PATH", "datalake/yags/src")
+SOURCE_EXTENSIONS = [ext for ext in os.getenv("YAGS_SOURCE_EXTENSIONS", ".yags,.pdf").split(",") if ext]
+# Token budget of one section chunk; a longer section is split between paragraphs
+SECTION_TOKENS = int(os.getenv("YAGS_SECTION_TOKENS", "384"))
+# "int8" quarters the size of the mapped embeddings at a small cost in ranking precision
+VECTOR_DTYPE = os.getenv("YAGS_VECTOR_DTYPE", "float32")
+# Candidates kept at each retrieval stage; 0 turns the dense or keyword side off
+VECTOR_TOP_K = int(os.getenv("YAGS_VECTOR_TOP_K", "10"))
+KEYWORD_TOP_K = int(os.getenv("YAGS_KEYWORD_TOP_K", "10"))
+FUSION_TOP_K = int(os.getenv("YAGS_FUSION_TOP_K", "8"))
+# A sentence-transformers cross-encoder, e.g. cross-encoder/ms-marco-MiniLM-L-6-v2; empty disables reranking
+RERANK_MODEL = os.getenv("YAGS_RERANK_MODEL", "")
+RERANK_TOP_K = int(os.getenv("YAGS_RERANK_TOP_K", "4"))
+# Answers to repeated questions, kept until they expire or the rulebooks are re-indexed
+ANSWER_CACHE = os.getenv("YAGS_ANSWER_CACHE", "1") == "1"
+ANSWER_CACHE_TTL_HOURS = float(os.getenv("YAGS_ANSWER_CACHE_TTL_HOURS", "168"))
+# Cosine similarity a differently worded question needs to reuse an answer; empty (the default) allows exact
+# matches only, since questions that differ in one key term ("a Wizard" vs "a Cleric") can score above 0.95
+ANSWER_CACHE_SIMILARITY = os.getenv("YAGS_ANSWER_CACHE_SIMILARITY", "")
+ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("YAGS_ANSWER_CACHE_MAX_ENTRIES", "2000"))
+
+# We are going to take the YagsRPG XML and index it section by section (ym.chunking), with no Markdown in between.
+# For reading, the whole source tree converts with: python -m ym.convert --src datalake/yags/src --out datalake/yags/markdown
+# and YagsPipeline.load_converted reads the section chunks it writes.
 
 from llama_index.core.agent import ReActAgent
 from llama_index.llms.openai import OpenAI
 from llama_index.core.tools import FunctionTool
 
-from llama_index.core import SimpleDirectoryReader, VectorStoreIndex, Settings
+from llama_index.core import Document, SimpleDirectoryReader, StorageContext, VectorStoreIndex, Settings
+from llama_index.core.base.response.schema import Response
+from llama_index.core.query_engine import RetrieverQueryEngine
 
-from llama_index.core import StorageContext, load_index_from_storage
+from ym.answer_cache import AnswerCache
+from ym.bm25 import BM25Index
+from ym.indexing import IncrementalIndexer
+from ym.latency import LatencyTracker
+from ym.ingestion import EmbeddingPipeline
+from ym.retrieval import HybridRetriever, RetrievalConfig, create_reranker
+from ym.vector_store import MmapVectorStore
 
 class YagsPipeline:
+    def __init__(self, vector_dtype=VECTOR_DTYPE, retrieval=None, section_tokens=SECTION_TOKENS):
+        self.vector_dtype = vector_dtype
+        self.section_tokens = section_tokens
+        self.retrieval = retrieval or RetrievalConfig(VECTOR_TOP_K, KEYWORD_TOP_K, FUSION_TOP_K, RERANK_MODEL or None, RERANK_TOP_K)
+        # Keyword index and content version of the index last created, loaded or updated
+        self.keyword_index = None
+        self.index_version = None
+
     def load_documents(self, directory_path):
         documents = SimpleDirectoryReader(directory_path).load_data()
         return documents
+
+    def load_converted(self, directory_path):
+        """One Document per section from the JSONL files ym.convert writes, with heading metadata."""
+        documents = []
+        for root, _, names in os.walk(directory_path):
+            for name in sorted(names):
+                if not name.endswith(".jsonl"):
+                    continue
+                with open(os.path.join(root, name)) as f:
+                    for line in f:
+                        chunk = json.loads(line)
+                        documents.append(Document(id_=chunk["id"], text=chunk["text"], metadata=chunk["metadata"]))
+        return documents
     
-    def create_index(self, documents):
-        index = VectorStoreIndex.from_documents(documents)
+    def create_index(self, documents, pipeline=None):
+        # Chunks are embedded in concurrent batches; the index stores the embedded nodes as they are
+        result = (pipeline or EmbeddingPipeline(section_tokens=self.section_tokens)).run(documents=documents)
+        print(f"Embedded {result.stats}")
+        storage_context = StorageContext.from_defaults(vector_store=MmapVectorStore(dtype=self.vector_dtype))
+        index = VectorStoreIndex(result.nodes, storage_context=storage_context)
+        self.keyword_index = BM25Index()
+        self.keyword_index.add(result.nodes)
         return index
     
     def store_indexed_data(self, index, path):
         index.storage_context.persist(persist_dir=path)
+        if self.keyword_index is not None:
+            self.keyword_index.persist(path)
         return True
 
     def load_indexed_data(self, path):
-        try:
-            storage_context = StorageContext.from_defaults(persist_dir=path)
-            index = load_index_from_storage(storage_context)
-        except:
-            return None
-        
+        """None when nothing has been persisted at path yet; IndexLoadError when it cannot be loaded."""
+        index = IncrementalIndexer(None, path, vector_dtype=self.vector_dtype).load_index()
+        self.keyword_index = BM25Index.from_persist_dir(path) if index is not None else None
         return index
 
-    def create_query_engine(self, index):
-        query_engine = index.as_query_engine()
+    def update_index(self, directory_path, path, extensions=SOURCE_EXTENSIONS):
+        """Re-embed only new or changed files and drop removed ones; returns (index, IndexUpdate).
+
+        The directory is searched recursively for files with one of `extensions`.
+        """
+        indexer = IncrementalIndexer(directory_path, path, recursive=True, vector_dtype=self.vector_dtype,
+                                     pipeline=EmbeddingPipeline(section_tokens=self.section_tokens),
+                                     extensions=extensions)
+        index, update = indexer.sync()
+        self.keyword_index = indexer.keyword_index
+        self.index_version = indexer.index_version
+        return index, update
+
+    def create_query_engine(self, index, streaming=False):
+        # Dense and BM25 candidates fused by rank, then optionally reranked by a local cross-encoder
+        retriever = HybridRetriever(index, self.keyword_index, self.retrieval)
+        reranker = create_reranker(self.retrieval)
+        query_engine = RetrieverQueryEngine.from_args(retriever, node_postprocessors=[reranker] if reranker else [],
+                                                      streaming=streaming)
         return query_engine
     
 class YagsMaster():
     def __init__(self, yags_path, yags_indexed_path):
         Settings.llm = OpenAI(model="gpt-3.5-turbo", temperature=0)
         pipeline = YagsPipeline()
-        index = pipeline.load_indexed_data(yags_indexed_path)
+        # A broken index raises IndexLoadError here instead of silently re-embedding everything
+        index, update = pipeline.update_index(yags_path, yags_indexed_path)
+        print(f"Indexed data loaded: {update}")
+
+        # Streams tokens; send_message collects them into a whole answer
+        self.query_engine = pipeline.create_query_engine(index, streaming=True)
+        self.latency = LatencyTracker()
+        self.answer_cache = None
+        if ANSWER_CACHE:
+            self.answer_cache = AnswerCache(yags_indexed_path, pipeline.index_version,
+                                            ttl_seconds=ANSWER_CACHE_TTL_HOURS * 3600,
+                                            similarity=float(ANSWER_CACHE_SIMILARITY) if ANSWER_CACHE_SIMILARITY else None,
+                                            max_entries=ANSWER_CACHE_MAX_ENTRIES)
 
-        if index:
-            print("Indexed data loaded")
-        else:
-            documents = pipeline.load_documents(yags_path)
-            index = pipeline.create_index(documents)
-            pipeline.store_indexed_data(index, yags_indexed_path)
+    def _remember(self, message, answer):
+        if self.answer_cache is not None and answer.strip():
+            self.answer_cache.put(message, answer)
+            self.answer_cache.save()
 
-        self.query_engine = pipeline.create_query_engine(index)
-        pass
+    async def _aremember(self, message, answer):
+        if self.answer_cache is not None and answer.strip():
+            await self.answer_cache.aput(message, answer)
+            await asyncio.to_thread(self.answer_cache.save)
+
+    def stream_message(self, message):
+        """Yield the answer as the LLM generates it; a cached answer comes as one chunk.
+
+        The generator's return value is the complete Response.
+        """
+        timer = self.latency.start()
+        cached = self.answer_cache.get(message) if self.answer_cache is not None else None
+        if cached is not None:
+            timer.token()
+            timer.finish(cached=True)
+            yield cached.response
+            return cached
+        streaming = self.query_engine.query(message)
+        parts = []
+        for token in streaming.response_gen:
+            timer.token()
+            parts.append(token)
+            yield token
+        timer.finish()
+        self._remember(message, "".join(parts))
+        return Response("".join(parts), streaming.source_nodes, streaming.metadata)
+
+    async def astream_message(self, message):
+        """stream_message for use inside an event loop, e.g. from a web server."""
+        timer = self.latency.start()
+        cached = await self.answer_cache.aget(message) if self.answer_cache is not None else None
+        if cached is not None:
+            timer.token()
+            timer.finish(cached=True)
+            yield cached.response
+            return
+        streaming = await self.query_engine.aquery(message)
+        parts = []
+        async for token in streaming.async_response_gen():
+            timer.token()
+            parts.append(token)
+            yield token
+        timer.finish()
+        await self._aremember(message, "".join(parts))
 
     def send_message(self, message):
-        response = self.query_engine.query(message)
-        return response
-
-yagsmaster = YagsMaster("datalake/yags/release/subset", "datalake_indexed/yags")
-response = yagsmaster.send_message("Explain skill difficulties and tasks and how to determine if you succeed or fail.")
-print(response)
-
-# Infinite question loop
-while True:
-    question = input("You: ")
-    response = yagsmaster.send_message(question)
-    print(response)
\ No newline at end of file
+        stream = self.stream_message(message)
+        while True:
+            try:
+                next(stream)
+            except StopIteration as done:
+                return done.value
+
+    def stats(self):
+        cache = str(self.answer_cache) if self.answer_cache is not None else "Answer cache disabled"
+        return f"{cache}\n{self.latency}"
+
+# Guarded so the ingestion worker processes can import this module
+if __name__ == "__main__":
+    yagsmaster = YagsMaster(SOURCE_PATH, "datalake_indexed/yags")
+    question = "Explain skill difficulties and tasks and how to determine if you succeed or fail."
+
+    # Infinite question loop; answers print as they are generated
+    while True:
+        for token in yagsmaster.stream_message(question):
+            print(token, end="", flush=True)
+        print()
+        question = input("You: ")
+        while question.strip() == "/stats":
+            print(yagsmaster.stats())
+            question = input("You: ")
\ No newline at end of file
@@ -0,0 +1,75 @@
+import asyncio
+import tempfile
+import unittest
+
+from ym.answer_cache import AnswerCache
+from ym.fake_embedding import FakeEmbedding
+
+class TestAnswerCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.embed_model = FakeEmbedding(latency=0, per_text=0)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def make_cache(self, index_version="v1", **kwargs):
+        return AnswerCache(self.directory.name, index_version, embed_model=self.embed_model, **kwargs)
+
+    def test_exact_hit_after_reload(self):
+        cache = self.make_cache()
+        cache.put("How do skill checks work?", "Roll against the difficulty.")
+        cache.save()
+
+        reloaded = self.make_cache()
+        hit = reloaded.get("how do skill checks work")
+        self.assertIsNotNone(hit)
+        self.assertEqual(hit.response, "Roll against the difficulty.")
+        self.assertEqual(hit.metadata["cache"], "exact")
+
+    def test_put_after_reload_does_not_duplicate(self):
+        cache = self.make_cache()
+        cache.put("How do skill checks work?", "Roll against the difficulty.")
+        cache.save()
+
+        reloaded = self.make_cache()
+        reloaded.put("How do skill checks work?", "Roll against the difficulty.")
+        reloaded.save()
+        self.assertEqual(self.make_cache().snapshot()["entries"], 1)
+
+    def test_other_index_version_starts_empty(self):
+        cache = self.make_cache()
+        cache.put("How do skill checks work?", "Roll against the difficulty.")
+        cache.save()
+        self.assertIsNone(self.make_cache(index_version="v2").get("How do skill checks work?"))
+
+    def test_semantic_hit(self):
+        cache = self.make_cache(similarity=0.8)
+        cache.put("how much damage does plate armour soak", "Plate soaks 6.")
+        hit = cache.get("How much damage does plate armour soak in combat?")
+        self.assertIsNotNone(hit)
+        self.assertEqual(hit.metadata["cache"], "semantic")
+
+    def test_questions_about_different_entities_do_not_collide(self):
+        wizard = "Can a Wizard cast Fireball in combat while wearing armour and holding a shield in one hand"
+        cleric = wizard.replace("Wizard", "Cleric")
+        # The two questions score 0.969 here, over the old 0.92 default, as such a pair does with real embeddings
+        for cache in (self.make_cache(), self.make_cache(similarity=0.97)):
+            cache.put(wizard, "Yes, at a penalty.")
+            self.assertIsNone(cache.get(cleric))
+            self.assertEqual(cache.get(wizard).response, "Yes, at a penalty.")
+
+    def test_semantic_hits_are_off_by_default(self):
+        cache = self.make_cache()
+        cache.put("how much damage does plate armour soak", "Plate soaks 6.")
+        self.assertIsNone(cache.get("How much damage does plate armour soak in combat?"))
+
+    def test_aput_round_trip(self):
+        cache = self.make_cache()
+        asyncio.run(cache.aput("What does the lucky advantage do?", "Reroll once per session."))
+        cache.save()
+        hit = self.make_cache().get("what does the lucky advantage do")
+        self.assertEqual(hit.response, "Reroll once per session.")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+import os
+import tempfile
+import unittest
+
+from llama_index.core.schema import MetadataMode
+
+from ym.chunking import SectionChunker
+from ym.parsers import MarkdownSection
+
+RULES = """<?xml version="1.0"?>
+<article xmlns="http://yagsbook.sourceforge.net/xml">
+<header><title>Combat</title><tagline>Fighting rules</tagline><summary>How fights work.</summary></header>
+<body>
+<sect1><title>Rounds</title>
+<sect2><title>Initiative</title>
+<para>Roll initiative first.</para>
+<sect3><title>Ties</title><para>Ties act at once.</para></sect3>
+<para>Trailing initiative text.</para>
+</sect2>
+</sect1>
+</body>
+</article>
+"""
+
+class TestSectionChunker(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "combat.yags")
+        with open(self.path, "w") as f:
+            f.write(RULES)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_chunks_follow_sections(self):
+        nodes = SectionChunker(384).chunk_file(self.path, source="combat.yags")
+        texts = [node.text for node in nodes]
+        self.assertEqual(texts, [
+            "# Combat\n\n**Fighting rules**\n\nHow fights work.",
+            "### Initiative\n\nRoll initiative first.",
+            "#### Ties\n\nTies act at once.",
+            "### Initiative\n\nTrailing initiative text.",
+        ])
+        # "Rounds" has no text of its own and gives no chunk
+        self.assertEqual(nodes[2].metadata["heading_path"], "Rounds > Initiative > Ties")
+        self.assertTrue(all(node.ref_doc_id == "combat.yags" for node in nodes))
+        self.assertEqual(len({node.node_id for node in nodes}), len(nodes))
+
+    def test_parent_headings_reach_the_embedding(self):
+        node = SectionChunker(384).chunk_file(self.path)[2]
+        embedded = node.get_content(metadata_mode=MetadataMode.EMBED)
+        self.assertIn("heading_path: Rounds > Initiative > Ties", embedded)
+        self.assertNotIn("section_level", embedded)
+
+    def test_markdown_only_section_is_chunked(self):
+        section = MarkdownSection(["Rounds"], 2, "## Rounds\n\nFirst block.\n\nSecond block.\n\n")
+        self.assertEqual(list(SectionChunker(384).chunk_section(section)),
+                         ["## Rounds\n\nFirst block.\n\nSecond block."])
+
+    def test_budget_splits_between_paragraphs(self):
+        paragraphs = [f"Paragraph {i} " + "word " * 40 for i in range(6)]
+        section = MarkdownSection(["Rules"], 2, "", paragraphs)
+        chunker = SectionChunker(120)
+        chunks = list(chunker.chunk_section(section))
+        self.assertGreater(len(chunks), 1)
+        self.assertTrue(all(chunker._count(chunk) <= 120 for chunk in chunks))
+        self.assertTrue(all(chunk.startswith("## Rules\n\n") for chunk in chunks))
+        self.assertEqual(sum(chunk.count("Paragraph") for chunk in chunks), 6)
+
+    def test_long_paragraph_splits_at_sentences(self):
+        paragraph = " ".join(f"Sentence {i} has a few more words in it." for i in range(40))
+        section = MarkdownSection(["Rules", "A rather long section title"], 3, "", [paragraph])
+        chunker = SectionChunker(100)
+        chunks = list(chunker.chunk_section(section))
+        self.assertGreater(len(chunks), 1)
+        self.assertTrue(all(chunker._count(chunk) <= 100 for chunk in chunks))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+import os
+import json
+import tempfile
+import unittest
+
+from ym.convert import convert_tree, output_paths
+
+BOOK = """<?xml version="1.0"?>
+<article xmlns="http://yagsbook.sourceforge.net/xml">
+<header><title>{title}</title><tagline>Rules</tagline><summary>Summary.</summary></header>
+<body>
+<sect1><title>Chapter</title>
+<sect2><title>Rule</title><para>Rule text.</para></sect2>
+<para>Trailing chapter text.</para>
+</sect1>
+</body>
+</article>
+"""
+
+class TestConvertTree(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.src = os.path.join(self.directory.name, "src")
+        self.out = os.path.join(self.directory.name, "out")
+        os.makedirs(os.path.join(self.src, "core"))
+        for name in ("core/combat.yags", "magic.yags"):
+            with open(os.path.join(self.src, name), "w") as f:
+                f.write(BOOK.format(title=name))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_markdown_and_jsonl_hold_the_same_sections(self):
+        report = convert_tree(self.src, self.out, workers=1)
+        self.assertEqual(sorted(report.converted), ["core/combat.yags", "magic.yags"])
+        markdown_path, chunks_path = output_paths(self.out, "core/combat.yags")
+        with open(markdown_path) as f:
+            markdown = f.read()
+        with open(chunks_path) as f:
+            chunks = [json.loads(line) for line in f]
+        self.assertEqual("\n\n".join(chunk["text"] for chunk in chunks), markdown.strip())
+        self.assertIn("Trailing chapter text.", [chunk["text"] for chunk in chunks])
+        self.assertEqual(chunks[0]["metadata"]["source"], "core/combat.yags")
+
+    def test_unchanged_files_are_skipped(self):
+        convert_tree(self.src, self.out, workers=1)
+        report = convert_tree(self.src, self.out, workers=1)
+        self.assertEqual((report.converted, report.unchanged), ([], 2))
+
+    def test_force_still_removes_outputs_of_deleted_sources(self):
+        convert_tree(self.src, self.out, workers=1)
+        os.remove(os.path.join(self.src, "magic.yags"))
+        report = convert_tree(self.src, self.out, workers=1, force=True)
+        self.assertEqual(report.converted, ["core/combat.yags"])
+        self.assertEqual(report.removed, ["magic.yags"])
+        self.assertFalse(any(os.path.exists(path) for path in output_paths(self.out, "magic.yags")))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+import asyncio
+import unittest
+
+from llama_index.core import Document
+
+from ym.fake_embedding import FakeEmbedding
+from ym.ingestion import EmbeddingPipeline
+
+def documents(count):
+    return [Document(text=f"Rule {n}: the character rolls against target number {n}.", id_=f"doc{n}")
+            for n in range(count)]
+
+class TestEmbeddingPipeline(unittest.TestCase):
+    def setUp(self):
+        self.model = FakeEmbedding(latency=0, per_text=0, embed_batch_size=10)
+
+    def make_pipeline(self):
+        return EmbeddingPipeline(embed_model=self.model, batch_size=32, chunk_size=256, chunk_overlap=0)
+
+    def test_batches_go_through_whole(self):
+        result = self.make_pipeline().run(documents=documents(40))
+        self.assertEqual(result.stats.chunks, 40)
+        self.assertTrue(all(node.embedding is not None for node in result.nodes))
+        # One call per pipeline batch of 32, not one per model batch of 10
+        self.assertEqual(self.model.calls, 2)
+
+    def test_model_batch_size_is_left_as_it_was(self):
+        pipeline = self.make_pipeline()
+        self.assertEqual(self.model.embed_batch_size, 10)
+        pipeline.run(documents=documents(5))
+        self.assertEqual(self.model.embed_batch_size, 10)
+
+    def test_model_batch_size_is_restored_after_a_failure(self):
+        self.model.failure_rate = 1.0
+        pipeline = EmbeddingPipeline(embed_model=self.model, batch_size=32, max_retries=0, chunk_size=256, chunk_overlap=0)
+        with self.assertRaises(RuntimeError):
+            pipeline.run(documents=documents(5))
+        self.assertEqual(self.model.embed_batch_size, 10)
+
+    def test_run_inside_an_event_loop_points_to_arun(self):
+        pipeline = self.make_pipeline()
+
+        async def ingest():
+            with self.assertRaisesRegex(RuntimeError, "arun"):
+                pipeline.run(documents=documents(1))
+            return await pipeline.arun(documents=documents(1))
+
+        self.assertEqual(asyncio.run(ingest()).stats.chunks, 1)
+
+if __name__ == "__main__":
+    unittest.main()
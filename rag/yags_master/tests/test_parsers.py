@@ -0,0 +1,68 @@
+import os
+import tempfile
+import unittest
+
+from ym.parsers import StreamingMarkdownConverter, XMLToMarkdownParser
+
+NESTED = """<?xml version="1.0"?>
+<article xmlns="http://yagsbook.sourceforge.net/xml">
+<header><title>Combat</title><tagline>Fighting rules</tagline><summary>How fights work.</summary></header>
+<body>
+<sect1><title>Rounds</title>
+<para>A round is <e>five</e> seconds long.</para>
+<sect2><title>Initiative</title>
+<para>Roll initiative first.</para>
+<sect3><title>Ties</title><para>Ties act at once.</para></sect3>
+<para>Trailing initiative text.</para>
+</sect2>
+<para>Trailing rule text.</para>
+</sect1>
+<sect1><title>Wounds</title><para>Wounds hurt.</para></sect1>
+</body>
+</article>
+"""
+
+class TestStreamingMarkdownConverter(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "combat.yags")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, xml):
+        with open(self.path, "w") as f:
+            f.write(xml)
+
+    def test_same_markdown_without_trailing_paragraphs(self):
+        self.write(NESTED.replace("<para>Trailing initiative text.</para>\n", "")
+                         .replace("<para>Trailing rule text.</para>\n", ""))
+        self.assertEqual(StreamingMarkdownConverter(self.path).to_markdown(),
+                         XMLToMarkdownParser(self.path).to_markdown())
+
+    def test_trailing_paragraphs_keep_their_text(self):
+        self.write(NESTED)
+        streamed = StreamingMarkdownConverter(self.path).to_markdown()
+        parsed = XMLToMarkdownParser(self.path).to_markdown()
+        # Trailing paragraphs are streamed after the subsections rather than ahead of them
+        self.assertEqual(sorted(streamed.split("\n\n")), sorted(parsed.split("\n\n")))
+
+    def test_trailing_paragraphs_are_section_content(self):
+        self.write(NESTED)
+        trailing = [section for section in StreamingMarkdownConverter(self.path).sections()
+                    if "Trailing" in section.markdown]
+        self.assertEqual([section.paragraphs for section in trailing],
+                         [["Trailing initiative text."], ["Trailing rule text."]])
+        self.assertEqual([section.heading_path for section in trailing],
+                         [["Rounds", "Initiative"], ["Rounds"]])
+
+    def test_header_and_emphasis(self):
+        self.write(NESTED)
+        sections = list(StreamingMarkdownConverter(self.path).sections())
+        self.assertEqual(sections[0].level, 1)
+        self.assertEqual(sections[0].title, "Combat")
+        self.assertEqual(sections[1].paragraphs, ["A round is *five* seconds long."])
+        self.assertEqual(sections[1].metadata["heading_path"], "Rounds")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+import asyncio
+import unittest
+
+from llama_index.core import StorageContext, VectorStoreIndex
+from llama_index.core.schema import TextNode
+
+from ym.bm25 import BM25Index
+from ym.fake_embedding import FakeEmbedding
+from ym.retrieval import HybridRetriever, RetrievalConfig
+from ym.vector_store import MmapVectorStore
+
+TEXTS = {
+    "armour": "plate armour soaks damage from every hit",
+    "stealth": "sneak and hide in shadow to avoid notice",
+    "healing": "rest and a bandage speed recovery from wounds",
+    "magic": "casting a ritual spell costs mana",
+}
+
+class SlowQueryEmbedding(FakeEmbedding):
+    """Query embeddings that take a network round trip, async ones included."""
+    async def _aget_query_embedding(self, query):
+        await asyncio.sleep(0.05)
+        return self._vector(query)
+
+class TestHybridRetriever(unittest.TestCase):
+    def setUp(self):
+        self.embed_model = SlowQueryEmbedding(latency=0, per_text=0)
+        nodes = [TextNode(id_=name, text=text) for name, text in TEXTS.items()]
+        for node in nodes:
+            node.embedding = self.embed_model.get_text_embedding(node.text)
+        storage_context = StorageContext.from_defaults(vector_store=MmapVectorStore())
+        self.index = VectorStoreIndex(nodes, storage_context=storage_context, embed_model=self.embed_model)
+        self.keyword_index = BM25Index()
+        self.keyword_index.add(nodes)
+
+    def make_retriever(self, **config):
+        return HybridRetriever(self.index, self.keyword_index, RetrievalConfig(**config))
+
+    def test_best_match_first(self):
+        results = self.make_retriever().retrieve("how much does plate armour soak")
+        self.assertEqual(results[0].node.node_id, "armour")
+
+    def test_keyword_only(self):
+        results = self.make_retriever(vector_top_k=0).retrieve("ritual spell mana")
+        self.assertEqual([result.node.node_id for result in results], ["magic"])
+
+    def test_aretrieve_matches_retrieve_without_blocking_the_loop(self):
+        retriever = self.make_retriever()
+        question = "hide in shadow"
+
+        async def run():
+            ticks = 0
+
+            async def ticker():
+                nonlocal ticks
+                while True:
+                    await asyncio.sleep(0.005)
+                    ticks += 1
+
+            task = asyncio.create_task(ticker())
+            results = await retriever.aretrieve(question)
+            task.cancel()
+            return results, ticks
+
+        results, ticks = asyncio.run(run())
+        self.assertEqual([r.node.node_id for r in results], [r.node.node_id for r in retriever.retrieve(question)])
+        # The 50 ms query embedding was awaited, so the loop kept running meanwhile
+        self.assertGreater(ticks, 3)
+
+if __name__ == "__main__":
+    unittest.main()
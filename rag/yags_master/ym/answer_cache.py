@@ -0,0 +1,189 @@
+import os
+import re
+import json
+import time
+import tempfile
+from typing import Dict, List, Optional
+
+import numpy as np
+from llama_index.core import Settings
+from llama_index.core.base.response.schema import Response
+
+CACHE_NAME = "answer_cache.json"
+EMBEDDINGS_NAME = "answer_cache.npy"
+CACHE_VERSION = 1
+_NON_WORD = re.compile(r"[^\w\s]+")
+
+def normalize_question(question: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace, so retyped questions share a key."""
+    return " ".join(_NON_WORD.sub(" ", question.lower()).split())
+
+class AnswerCache:
+    """Two-level cache from player questions to query engine answers.
+
+    Level one is an exact match on the normalized question. Level two, off unless
+    `similarity` is set, embeds the question and returns the answer of the closest
+    cached question once cosine similarity reaches `similarity`. Rules questions
+    that differ in one term score high, so keep it at 0.97 or more. Entries expire
+    after `ttl_seconds`, and every entry belongs to the index version it was
+    answered from, so re-indexing the rulebooks invalidates the lot. Kept on disk
+    next to the index: answers as JSON and question embeddings as one .npy array.
+    """
+    def __init__(self, directory, index_version, embed_model=None, ttl_seconds=7 * 24 * 3600,
+                 similarity: Optional[float] = None, max_entries=2000):
+        self.directory = directory
+        self.index_version = index_version
+        self.embed_model = embed_model or Settings.embed_model
+        self.ttl_seconds = ttl_seconds
+        self.similarity = similarity
+        self.max_entries = max_entries
+        self.stats = {"lookups": 0, "exact_hits": 0, "semantic_hits": 0, "misses": 0, "expired": 0, "evicted": 0}
+        self._entries: List[Dict] = []
+        self._by_question: Dict[str, int] = {}
+        self._embeddings = np.zeros((0, 0), dtype=np.float32)
+        # The embedding of the last missed question, which put() usually stores next
+        self._last_miss = None
+        self._load()
+
+    @property
+    def hit_rate(self):
+        hits = self.stats["exact_hits"] + self.stats["semantic_hits"]
+        return hits / self.stats["lookups"] if self.stats["lookups"] else 0.0
+
+    def snapshot(self):
+        return {**self.stats, "entries": len(self._entries), "hit_rate": round(self.hit_rate, 3)}
+
+    def __str__(self):
+        return (f"{self.stats['lookups']} lookups, {self.stats['exact_hits']} exact and "
+                f"{self.stats['semantic_hits']} semantic hits ({self.hit_rate:.0%}), {len(self._entries)} cached")
+
+    def _load(self):
+        try:
+            with open(os.path.join(self.directory, CACHE_NAME)) as f:
+                data = json.load(f)
+            embeddings = np.load(os.path.join(self.directory, EMBEDDINGS_NAME))
+        except (FileNotFoundError, ValueError):
+            return
+        if data.get("version") != CACHE_VERSION or data.get("index_version") != self.index_version:
+            # Answered from another index; nothing in it can be trusted
+            return
+        if len(embeddings) != len(data["entries"]):
+            return
+        self._entries = data["entries"]
+        self._embeddings = embeddings
+        self._reindex()
+        self._expire()
+
+    def save(self):
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=".answers-", suffix=".npy")
+        with os.fdopen(fd, "wb") as f:
+            np.save(f, self._embeddings)
+        os.replace(tmp_path, os.path.join(self.directory, EMBEDDINGS_NAME))
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=".answers-")
+        with os.fdopen(fd, "w") as f:
+            json.dump({"version": CACHE_VERSION, "index_version": self.index_version, "entries": self._entries}, f)
+        os.replace(tmp_path, os.path.join(self.directory, CACHE_NAME))
+
+    def _reindex(self):
+        self._by_question = {entry["question"]: i for i, entry in enumerate(self._entries)}
+
+    def _keep(self, rows):
+        self._entries = [self._entries[row] for row in rows]
+        self._embeddings = self._embeddings[rows] if len(rows) else np.zeros((0, self._embeddings.shape[1]), np.float32)
+        self._reindex()
+
+    def _expire(self):
+        now = time.time()
+        live = [row for row, entry in enumerate(self._entries) if now - entry["created"] < self.ttl_seconds]
+        if len(live) < len(self._entries):
+            self.stats["expired"] += len(self._entries) - len(live)
+            self._keep(live)
+
+    @staticmethod
+    def _unit(embedding):
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _embed(self, normalized):
+        return self._unit(self.embed_model.get_query_embedding(normalized))
+
+    def _hit(self, row, kind):
+        entry = self._entries[row]
+        entry["hits"] += 1
+        entry["used"] = time.time()
+        self.stats[kind] += 1
+        return Response(response=entry["answer"], metadata={"cache": kind.split("_")[0], "question": entry["question"]})
+
+    def _exact(self, question):
+        self.stats["lookups"] += 1
+        self._expire()
+        normalized = normalize_question(question)
+        row = self._by_question.get(normalized)
+        return normalized, (self._hit(row, "exact_hits") if row is not None else None)
+
+    def _wants_semantic(self):
+        return self.similarity is not None and len(self._entries) > 0
+
+    def _semantic(self, normalized, vector):
+        if vector is not None:
+            scores = self._embeddings @ vector
+            row = int(np.argmax(scores))
+            if scores[row] >= self.similarity:
+                return self._hit(row, "semantic_hits")
+            self._last_miss = (normalized, vector)
+        self.stats["misses"] += 1
+        return None
+
+    def get(self, question: str) -> Optional[Response]:
+        """The cached answer as a Response (metadata["cache"] is "exact" or "semantic"), or None."""
+        normalized, hit = self._exact(question)
+        if hit is not None:
+            return hit
+        return self._semantic(normalized, self._embed(normalized) if self._wants_semantic() else None)
+
+    async def aget(self, question: str) -> Optional[Response]:
+        """get() with the question embedded asynchronously, for use inside an event loop."""
+        normalized, hit = self._exact(question)
+        if hit is not None:
+            return hit
+        vector = None
+        if self._wants_semantic():
+            vector = self._unit(await self.embed_model.aget_query_embedding(normalized))
+        return self._semantic(normalized, vector)
+
+    def put(self, question: str, answer: str):
+        normalized = normalize_question(question)
+        self._store(normalized, answer, None if self._has_vector(normalized) else self._embed(normalized))
+
+    async def aput(self, question: str, answer: str):
+        """put() with the question embedded asynchronously, for use inside an event loop."""
+        normalized = normalize_question(question)
+        vector = None
+        if not self._has_vector(normalized):
+            vector = self._unit(await self.embed_model.aget_query_embedding(normalized))
+        self._store(normalized, answer, vector)
+
+    def _has_vector(self, normalized):
+        """Whether storing this question needs no new embedding: cached already, or just missed."""
+        return normalized in self._by_question or (self._last_miss is not None and self._last_miss[0] == normalized)
+
+    def _store(self, normalized, answer, vector):
+        if normalized in self._by_question:
+            return
+        # Embedded even with semantic lookup off, so turning it on later finds these entries
+        if vector is None:
+            vector = self._last_miss[1]
+        self._last_miss = None
+        now = time.time()
+        self._entries.append({"question": normalized, "answer": answer, "created": now, "used": now, "hits": 0})
+        self._embeddings = (np.vstack([self._embeddings, vector[None, :]]) if len(self._embeddings)
+                            else vector[None, :].astype(np.float32))
+        if len(self._entries) > self.max_entries:
+            # Least recently used first
+            rows = sorted(range(len(self._entries)), key=lambda row: self._entries[row]["used"])
+            self.stats["evicted"] += len(rows) - self.max_entries
+            self._keep(sorted(rows[len(rows) - self.max_entries:]))
+        else:
+            self._by_question[normalized] = len(self._entries) - 1
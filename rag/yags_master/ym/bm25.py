@@ -0,0 +1,112 @@
+import os
+import re
+import json
+import math
+import heapq
+import tempfile
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from llama_index.core.schema import BaseNode, MetadataMode
+
+BM25_NAME = "bm25.json"
+BM25_VERSION = 1
+_WORD = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset(
+    "a an and are as at be by can do does for from how i if in is it of on or so that the their them "
+    "there these they this to was what when where which who why will with you your".split())
+
+def tokenize(text: str) -> List[str]:
+    return [word for word in _WORD.findall(text.lower()) if word not in STOPWORDS]
+
+class BM25Index:
+    """Inverted index over node text, scored with Okapi BM25.
+
+    Built alongside the vector index at ingest time and persisted next to it.
+    Postings map each term to {node_id: term frequency}, so nodes can be added
+    and the nodes of a document removed without rebuilding.
+    """
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, Dict[str, int]] = {}
+        self.lengths: Dict[str, int] = {}
+        self.ref_doc_ids: Dict[str, str] = {}
+        self._total_length = 0
+
+    def __len__(self):
+        return len(self.lengths)
+
+    @property
+    def average_length(self):
+        return self._total_length / len(self.lengths) if self.lengths else 0.0
+
+    def add(self, nodes: Iterable[BaseNode]):
+        for node in nodes:
+            if node.node_id in self.lengths:
+                self.delete_nodes([node.node_id])
+            terms = tokenize(node.get_content(metadata_mode=MetadataMode.NONE))
+            for term, count in Counter(terms).items():
+                self.postings.setdefault(term, {})[node.node_id] = count
+            self.lengths[node.node_id] = len(terms)
+            self.ref_doc_ids[node.node_id] = node.ref_doc_id or "None"
+            self._total_length += len(terms)
+
+    def delete_nodes(self, node_ids: Iterable[str]):
+        node_ids = set(node_ids) & self.lengths.keys()
+        if not node_ids:
+            return
+        for term in list(self.postings):
+            postings = self.postings[term]
+            for node_id in node_ids & postings.keys():
+                del postings[node_id]
+            if not postings:
+                del self.postings[term]
+        for node_id in node_ids:
+            self._total_length -= self.lengths.pop(node_id)
+            del self.ref_doc_ids[node_id]
+
+    def delete(self, ref_doc_id: str):
+        self.delete_nodes([node_id for node_id, doc_id in self.ref_doc_ids.items() if doc_id == ref_doc_id])
+
+    def search(self, query: str, top_k: int = 10) -> List[Tuple[str, float]]:
+        """Best (node_id, score) pairs for the query, highest first."""
+        count = len(self.lengths)
+        if not count:
+            return []
+        average_length = self.average_length or 1.0
+        scores: Dict[str, float] = {}
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for node_id, frequency in postings.items():
+                norm = self.k1 * (1 - self.b + self.b * self.lengths[node_id] / average_length)
+                scores[node_id] = scores.get(node_id, 0.0) + idf * frequency * (self.k1 + 1) / (frequency + norm)
+        return heapq.nlargest(top_k, scores.items(), key=lambda item: item[1])
+
+    @classmethod
+    def from_persist_dir(cls, persist_dir: str) -> Optional["BM25Index"]:
+        """None when no keyword index was persisted there yet."""
+        try:
+            with open(os.path.join(persist_dir, BM25_NAME)) as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return None
+        if data.get("version") != BM25_VERSION:
+            raise ValueError(f"Keyword index in {persist_dir} has version {data.get('version')}, expected {BM25_VERSION}")
+        index = cls(k1=data["k1"], b=data["b"])
+        index.postings = data["postings"]
+        index.lengths = data["lengths"]
+        index.ref_doc_ids = data["ref_doc_ids"]
+        index._total_length = sum(index.lengths.values())
+        return index
+
+    def persist(self, persist_dir: str):
+        os.makedirs(persist_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=persist_dir, prefix=".bm25-")
+        with os.fdopen(fd, "w") as f:
+            json.dump({"version": BM25_VERSION, "k1": self.k1, "b": self.b, "postings": self.postings,
+                       "lengths": self.lengths, "ref_doc_ids": self.ref_doc_ids}, f, separators=(",", ":"))
+        os.replace(tmp_path, os.path.join(persist_dir, BM25_NAME))
@@ -0,0 +1,72 @@
+from typing import Iterable, Iterator, List
+
+from llama_index.core.node_parser import SentenceSplitter
+from llama_index.core.schema import NodeRelationship, RelatedNodeInfo, TextNode
+from llama_index.core.utils import get_tokenizer
+
+from .parsers import MarkdownSection, StreamingMarkdownConverter
+
+# Kept out of the embedding and the LLM prompt: the text starts with the section title, and heading_path ends with it
+HIDDEN_METADATA = ["section_title", "section_level", "source", "chunk"]
+
+class SectionChunker:
+    """Chunks a .yags document along its sect1/sect2/sect3 structure.
+
+    Each section's paragraphs are packed into chunks of at most `max_tokens`,
+    and no chunk spans two sections. A paragraph too long on its own is split at
+    sentence boundaries. Every chunk carries the titles of the sections above
+    it, and its text starts with its own heading, so a chunk stays readable
+    without its neighbours.
+    """
+    def __init__(self, max_tokens=384):
+        self.max_tokens = max_tokens
+        self.tokenizer = get_tokenizer()
+        # Sentence splitters by budget, which is max_tokens less the heading
+        self._splitters = {}
+
+    def _count(self, text):
+        return len(self.tokenizer(text))
+
+    def _pieces(self, paragraph, budget):
+        if self._count(paragraph) <= budget:
+            return [paragraph]
+        if budget not in self._splitters:
+            self._splitters[budget] = SentenceSplitter(chunk_size=budget, chunk_overlap=0)
+        return self._splitters[budget].split_text(paragraph)
+
+    def chunk_section(self, section: MarkdownSection) -> Iterator[str]:
+        """The texts of the chunks of one section."""
+        heading = f"{'#' * section.level} {section.title}".rstrip()
+        # Sections whose content is only in their Markdown, like the document header, are split into its blocks
+        paragraphs = section.paragraphs or [block.strip() for block in section.markdown.split("\n\n")
+                                            if block.strip() and block.strip() != heading]
+        if not paragraphs:
+            # A heading whose content is all in subsections
+            return
+        budget = self.max_tokens - self._count(heading)
+        current: List[str] = []
+        used = 0
+        for paragraph in paragraphs:
+            for piece in self._pieces(paragraph, budget):
+                tokens = self._count(piece)
+                if current and used + tokens > budget:
+                    yield "\n\n".join([heading] + current)
+                    current, used = [], 0
+                current.append(piece)
+                used += tokens
+        if current:
+            yield "\n\n".join([heading] + current)
+
+    def chunk_sections(self, sections: Iterable[MarkdownSection], source: str) -> Iterator[TextNode]:
+        for index, section in enumerate(sections):
+            for number, text in enumerate(self.chunk_section(section)):
+                node = TextNode(id_=f"{source}#{index}.{number}", text=text,
+                                metadata={**section.metadata, "source": source, "chunk": number},
+                                excluded_embed_metadata_keys=HIDDEN_METADATA,
+                                excluded_llm_metadata_keys=HIDDEN_METADATA)
+                node.relationships[NodeRelationship.SOURCE] = RelatedNodeInfo(node_id=source)
+                yield node
+
+    def chunk_file(self, path: str, source: str = None) -> List[TextNode]:
+        """Chunks of a .yags file, streamed from the XML; their ref_doc_id is `source` (the path by default)."""
+        return list(self.chunk_sections(StreamingMarkdownConverter(path).sections(), source or path))
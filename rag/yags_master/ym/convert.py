@@ -0,0 +1,145 @@
+"""Convert the YAGS XML source tree to Markdown and JSONL section chunks.
+
+Usage (from rag/yags_master/): python -m ym.convert [--src datalake/yags/src] [--out datalake/yags/markdown]
+
+Every .yags file becomes a .md file and a .jsonl file at the same relative
+path under --out. Each JSONL line is one section: {"id", "text", "metadata"}.
+YagsPipeline.load_converted reads these without parsing the XML again. Files
+whose content hash matches the manifest from the last run are skipped.
+"""
+import os
+import json
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import List
+
+from .indexing import Manifest, file_sha256
+from .parsers import StreamingMarkdownConverter
+
+MANIFEST_NAME = "convert_manifest.json"
+SOURCE_SUFFIX = ".yags"
+
+def list_yags_files(src_dir):
+    files = []
+    for root, dirs, names in os.walk(src_dir):
+        dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+        files.extend(os.path.relpath(os.path.join(root, name), src_dir) for name in names if name.endswith(SOURCE_SUFFIX))
+    return sorted(files)
+
+def output_paths(out_dir, relative_path):
+    base = os.path.join(out_dir, relative_path[:-len(SOURCE_SUFFIX)])
+    return f"{base}.md", f"{base}.jsonl"
+
+def convert_file(src_dir, out_dir, relative_path):
+    """Write the Markdown and JSONL for one file. Runs in a worker process; returns (path, sections, seconds)."""
+    started = time.perf_counter()
+    markdown_path, chunks_path = output_paths(out_dir, relative_path)
+    os.makedirs(os.path.dirname(markdown_path), exist_ok=True)
+    sections = 0
+    try:
+        with open(markdown_path + ".tmp", "w") as markdown, open(chunks_path + ".tmp", "w") as chunks:
+            for section in StreamingMarkdownConverter(os.path.join(src_dir, relative_path)).sections():
+                # The same sections go to both outputs
+                text = section.markdown.strip()
+                if not text:
+                    continue
+                markdown.write(section.markdown)
+                metadata = {**section.metadata, "source": relative_path}
+                chunks.write(json.dumps({"id": f"{relative_path}#{sections}", "text": text,
+                                         "metadata": metadata}) + "\n")
+                sections += 1
+    except BaseException:
+        for path in (markdown_path + ".tmp", chunks_path + ".tmp"):
+            if os.path.exists(path):
+                os.remove(path)
+        raise
+    os.replace(markdown_path + ".tmp", markdown_path)
+    os.replace(chunks_path + ".tmp", chunks_path)
+    return relative_path, sections, time.perf_counter() - started
+
+@dataclass
+class ConversionReport:
+    converted: List[str] = field(default_factory=list)
+    failed: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    unchanged: int = 0
+    sections: int = 0
+    bytes: int = 0
+    seconds: float = 0.0
+
+    def __str__(self):
+        rate = len(self.converted) / self.seconds if self.seconds else 0.0
+        throughput = self.bytes / 2**20 / self.seconds if self.seconds else 0.0
+        return (f"{len(self.converted)} converted ({self.sections} sections), {self.unchanged} unchanged, "
+                f"{len(self.removed)} removed, {len(self.failed)} failed in {self.seconds:.2f}s "
+                f"({rate:.1f} files/s, {throughput:.2f} MB/s)")
+
+def convert_tree(src_dir, out_dir, workers=None, force=False):
+    """Convert every new or changed .yags file under src_dir in a process pool; returns a ConversionReport."""
+    started = time.perf_counter()
+    report = ConversionReport()
+    manifest_path = os.path.join(out_dir, MANIFEST_NAME)
+    # Loaded even with force, so outputs of deleted sources are still found and removed
+    manifest = Manifest.load(manifest_path) or Manifest(manifest_path)
+
+    current = list_yags_files(src_dir)
+    pending = {}
+    for relative_path in current:
+        path = os.path.join(src_dir, relative_path)
+        stat = os.stat(path)
+        entry = None if force else manifest.files.get(relative_path)
+        outputs_exist = all(os.path.exists(p) for p in output_paths(out_dir, relative_path))
+        if entry and outputs_exist and entry["size"] == stat.st_size and entry["mtime"] == stat.st_mtime:
+            report.unchanged += 1
+            continue
+        sha256 = file_sha256(path)
+        if entry and outputs_exist and entry["sha256"] == sha256:
+            manifest.files[relative_path] = {**entry, "mtime": stat.st_mtime, "size": stat.st_size}
+            report.unchanged += 1
+            continue
+        pending[relative_path] = {"sha256": sha256, "mtime": stat.st_mtime, "size": stat.st_size}
+
+    if pending:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(convert_file, src_dir, out_dir, relative_path): relative_path
+                       for relative_path in pending}
+            for future in as_completed(futures):
+                relative_path = futures[future]
+                try:
+                    _, sections, _ = future.result()
+                except Exception as e:
+                    print(f"Failed to convert {relative_path}: {e}")
+                    report.failed.append(relative_path)
+                    manifest.files.pop(relative_path, None)
+                    continue
+                manifest.files[relative_path] = {**pending[relative_path], "sections": sections}
+                report.converted.append(relative_path)
+                report.sections += sections
+                report.bytes += pending[relative_path]["size"]
+
+    for relative_path in sorted(set(manifest.files) - set(current)):
+        manifest.files.pop(relative_path)
+        for path in output_paths(out_dir, relative_path):
+            if os.path.exists(path):
+                os.remove(path)
+        report.removed.append(relative_path)
+
+    manifest.save()
+    report.seconds = time.perf_counter() - started
+    return report
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert YAGS XML sources to Markdown and JSONL section chunks.")
+    parser.add_argument("--src", default="datalake/yags/src", help="directory searched for .yags files")
+    parser.add_argument("--out", default="datalake/yags/markdown", help="directory for the .md and .jsonl output")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: one per CPU)")
+    parser.add_argument("--force", action="store_true", help="convert every file, ignoring the manifest")
+    args = parser.parse_args(argv)
+    report = convert_tree(args.src, args.out, workers=args.workers, force=args.force)
+    print(report)
+    return 1 if report.failed else 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
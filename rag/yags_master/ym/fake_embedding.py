@@ -0,0 +1,63 @@
+import time
+import asyncio
+import hashlib
+import random
+from typing import Any, List
+
+import numpy as np
+from llama_index.core.embeddings import BaseEmbedding
+
+class FakeEmbedding(BaseEmbedding):
+    """Local stand-in for a remote embedding API, for tests and benchmarks.
+
+    Vectors are deterministic per text (hashed words), so retrieval over them is
+    meaningful. Every call costs `latency` seconds plus `per_text` per input, like
+    a network round trip, and fails with probability `failure_rate` to exercise retries.
+    """
+    embed_dim: int = 64
+    latency: float = 0.05
+    per_text: float = 0.001
+    failure_rate: float = 0.0
+    calls: int = 0
+
+    def __init__(self, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "FakeEmbedding"
+
+    def _vector(self, text: str) -> List[float]:
+        vector = np.zeros(self.embed_dim, dtype=np.float32)
+        for word in text.lower().split():
+            digest = hashlib.blake2b(word.encode(), digest_size=4).digest()
+            vector[int.from_bytes(digest, "little") % self.embed_dim] += 1.0
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def _maybe_fail(self) -> None:
+        self.calls += 1
+        if self.failure_rate and random.random() < self.failure_rate:
+            raise ConnectionError("fake embedding API unavailable")
+
+    def _get_text_embeddings(self, texts: List[str]) -> List[List[float]]:
+        time.sleep(self.latency + self.per_text * len(texts))
+        self._maybe_fail()
+        return [self._vector(text) for text in texts]
+
+    async def _aget_text_embeddings(self, texts: List[str]) -> List[List[float]]:
+        await asyncio.sleep(self.latency + self.per_text * len(texts))
+        self._maybe_fail()
+        return [self._vector(text) for text in texts]
+
+    def _get_text_embedding(self, text: str) -> List[float]:
+        return self._get_text_embeddings([text])[0]
+
+    async def _aget_text_embedding(self, text: str) -> List[float]:
+        return (await self._aget_text_embeddings([text]))[0]
+
+    def _get_query_embedding(self, query: str) -> List[float]:
+        return self._vector(query)
+
+    async def _aget_query_embedding(self, query: str) -> List[float]:
+        return self._vector(query)
@@ -0,0 +1,224 @@
+import os
+import json
+import hashlib
+import tempfile
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from llama_index.core import StorageContext, VectorStoreIndex, load_index_from_storage
+
+from .bm25 import BM25Index
+from .ingestion import EmbeddingPipeline
+from .vector_store import MmapVectorStore, has_mmap_store
+
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+# What the default JSON storage wrote before the memory-mapped store
+LEGACY_VECTOR_STORE_NAME = "default__vector_store.json"
+
+class IndexLoadError(Exception):
+    """A persisted index exists but could not be loaded; rebuilding would hide the cause."""
+
+def file_sha256(path, block_size=1024 * 1024):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def list_source_files(directory_path, recursive=False, extensions=None):
+    """The files SimpleDirectoryReader would load from the directory, relative to it.
+
+    With `extensions` (e.g. (".yags", ".pdf")) only files ending in one of them are listed.
+    """
+    files = []
+    suffixes = tuple(extensions) if extensions else ("",)
+    for root, dirs, names in os.walk(directory_path):
+        dirs[:] = [d for d in dirs if not d.startswith(".")] if recursive else []
+        for name in names:
+            if not name.startswith(".") and name.endswith(suffixes):
+                files.append(os.path.relpath(os.path.join(root, name), directory_path))
+    return sorted(files)
+
+@dataclass
+class IndexUpdate:
+    added: List[str] = field(default_factory=list)
+    changed: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    unchanged: int = 0
+    rebuilt: bool = False
+
+    @property
+    def modified(self):
+        return bool(self.added or self.changed or self.removed or self.rebuilt)
+
+    def __str__(self):
+        prefix = "Rebuilt index: " if self.rebuilt else ""
+        return (f"{prefix}{len(self.added)} added, {len(self.changed)} changed, "
+                f"{len(self.removed)} removed, {self.unchanged} unchanged")
+
+class Manifest:
+    """What was indexed from each source file: content hash, mtime, size and the document ids it produced."""
+    def __init__(self, path, files=None):
+        self.path = path
+        self.files: Dict[str, Dict] = files or {}
+
+    @classmethod
+    def load(cls, path):
+        """Returns None when there is no manifest yet; a corrupt one raises IndexLoadError."""
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return None
+        except ValueError as e:
+            raise IndexLoadError(f"Manifest {path} is not valid JSON: {e}") from e
+        if data.get("version") != MANIFEST_VERSION:
+            raise IndexLoadError(f"Manifest {path} has version {data.get('version')}, expected {MANIFEST_VERSION}")
+        return cls(path, data["files"])
+
+    @property
+    def version(self):
+        """Changes whenever the indexed content does; caches of answers key on it."""
+        digest = hashlib.sha256()
+        for path in sorted(self.files):
+            digest.update(f"{path}\0{self.files[path]['sha256']}\n".encode())
+        return digest.hexdigest()[:16]
+
+    def save(self):
+        directory = os.path.dirname(self.path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".manifest-")
+        with os.fdopen(fd, "w") as f:
+            json.dump({"version": MANIFEST_VERSION, "files": self.files}, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+class IncrementalIndexer:
+    """Keeps a persisted VectorStoreIndex in step with a directory, re-embedding only what changed.
+
+    Files whose size and mtime match the manifest are skipped without being read;
+    the rest are hashed, and only new content is loaded and embedded. Documents
+    of deleted files are removed from the index. New content goes through one
+    EmbeddingPipeline run, so parsing and embedding are batched across files.
+    Embeddings live in a MmapVectorStore of `vector_dtype` ("float32" or "int8"),
+    and a BM25Index over the same nodes is kept in step for keyword retrieval.
+    """
+    def __init__(self, directory_path, persist_dir, recursive=False, pipeline: Optional[EmbeddingPipeline] = None,
+                 vector_dtype="float32", extensions=None):
+        self.directory_path = directory_path
+        self.persist_dir = persist_dir
+        self.recursive = recursive
+        self.extensions = extensions
+        self.pipeline = pipeline
+        self.vector_dtype = vector_dtype
+        self.keyword_index: Optional[BM25Index] = None
+        self.index_version: Optional[str] = None
+        self.manifest_path = os.path.join(persist_dir, MANIFEST_NAME)
+
+    def has_persisted_index(self):
+        return os.path.exists(os.path.join(self.persist_dir, "docstore.json"))
+
+    def load_index(self):
+        """Load the persisted index; None if nothing was persisted yet, IndexLoadError if it is broken."""
+        if not self.has_persisted_index():
+            return None
+        try:
+            # Indexes from before the memory-mapped store load with the default JSON one
+            vector_store = (MmapVectorStore.from_persist_dir(self.persist_dir, self.vector_dtype)
+                            if has_mmap_store(self.persist_dir) else None)
+            storage_context = StorageContext.from_defaults(persist_dir=self.persist_dir, vector_store=vector_store)
+            return load_index_from_storage(storage_context)
+        except Exception as e:
+            raise IndexLoadError(f"Could not load index from {self.persist_dir}: {e}") from e
+
+    def new_index(self, nodes=()):
+        storage_context = StorageContext.from_defaults(vector_store=MmapVectorStore(dtype=self.vector_dtype))
+        return VectorStoreIndex(list(nodes), storage_context=storage_context)
+
+    def _entry(self, stat, sha256, doc_ids):
+        return {"sha256": sha256, "mtime": stat.st_mtime, "size": stat.st_size, "doc_ids": doc_ids}
+
+    def _insert(self, index, relative_paths):
+        """Parse, chunk and embed the files, add them to the index; returns their doc ids by path."""
+        pipeline = self.pipeline or EmbeddingPipeline()
+        paths = [os.path.join(self.directory_path, relative_path) for relative_path in relative_paths]
+        result = pipeline.run(paths=paths)
+        print(f"Embedded {result.stats}")
+        # The nodes carry their embeddings, so the index stores them as they are
+        index.insert_nodes(result.nodes)
+        self.keyword_index.add(result.nodes)
+        return {relative_path: result.doc_ids[path] for relative_path, path in zip(relative_paths, paths)}
+
+    def _delete(self, index, doc_ids):
+        for doc_id in doc_ids:
+            index.delete_ref_doc(doc_id, delete_from_docstore=True)
+            self.keyword_index.delete(doc_id)
+
+    def sync(self, index: Optional[VectorStoreIndex] = None):
+        """Bring the index up to date with the directory and persist it; returns (index, IndexUpdate).
+
+        The matching keyword index is left in `keyword_index`, and the manifest's
+        content version in `index_version`.
+        """
+        update = IndexUpdate()
+        index = index if index is not None else self.load_index()
+        manifest = Manifest.load(self.manifest_path) if index is not None else None
+        if index is not None and manifest is None:
+            # An index persisted before manifests existed: no way to tell what is in it
+            index = None
+        if index is not None and not isinstance(index.vector_store, MmapVectorStore):
+            # Re-embed a JSON-format index once into the memory-mapped store
+            index = None
+        if index is None:
+            index = self.new_index()
+            manifest = Manifest(self.manifest_path)
+            update.rebuilt = True
+            legacy_path = os.path.join(self.persist_dir, LEGACY_VECTOR_STORE_NAME)
+            if os.path.exists(legacy_path):
+                os.remove(legacy_path)
+        keyword_built = False
+        self.keyword_index = None if update.rebuilt else BM25Index.from_persist_dir(self.persist_dir)
+        if self.keyword_index is None:
+            # New index, or one persisted before keyword search: index what it already holds
+            self.keyword_index = BM25Index()
+            self.keyword_index.add(index.vector_store.get_nodes())
+            keyword_built = True
+
+        current = list_source_files(self.directory_path, self.recursive, self.extensions)
+        pending = {}
+        for relative_path in current:
+            stat = os.stat(os.path.join(self.directory_path, relative_path))
+            entry = manifest.files.get(relative_path)
+            if entry and entry["size"] == stat.st_size and entry["mtime"] == stat.st_mtime:
+                update.unchanged += 1
+                continue
+            sha256 = file_sha256(os.path.join(self.directory_path, relative_path))
+            if entry and entry["sha256"] == sha256:
+                # Touched but not edited
+                manifest.files[relative_path] = self._entry(stat, sha256, entry["doc_ids"])
+                update.unchanged += 1
+                continue
+            if entry:
+                self._delete(index, entry["doc_ids"])
+                update.changed.append(relative_path)
+            else:
+                update.added.append(relative_path)
+            pending[relative_path] = (stat, sha256)
+
+        if pending:
+            doc_ids = self._insert(index, list(pending))
+            for relative_path, (stat, sha256) in pending.items():
+                manifest.files[relative_path] = self._entry(stat, sha256, doc_ids[relative_path])
+
+        for relative_path in sorted(set(manifest.files) - set(current)):
+            self._delete(index, manifest.files.pop(relative_path)["doc_ids"])
+            update.removed.append(relative_path)
+
+        if update.modified:
+            index.storage_context.persist(persist_dir=self.persist_dir)
+        if update.modified or keyword_built:
+            self.keyword_index.persist(self.persist_dir)
+        # Saved even when nothing was re-embedded, so refreshed mtimes skip hashing next time
+        manifest.save()
+        self.index_version = manifest.version
+        return index, update
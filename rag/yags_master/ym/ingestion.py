@@ -0,0 +1,174 @@
+import os
+import time
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence
+
+from llama_index.core import Settings, SimpleDirectoryReader
+from llama_index.core.node_parser import SentenceSplitter
+from llama_index.core.schema import MetadataMode
+from llama_index.core.utils import get_tokenizer
+
+from .chunking import SectionChunker
+
+DEFAULT_WORKERS = min(4, os.cpu_count() or 1)
+DEFAULT_SECTION_TOKENS = 384
+
+def load_and_split(path, chunk_size, chunk_overlap, section_tokens=DEFAULT_SECTION_TOKENS):
+    """Read one file and chunk it. Runs in a worker process; returns (path, doc ids, nodes, seconds).
+
+    .yags files are chunked by section straight from the XML; anything else goes
+    through SimpleDirectoryReader and the sentence splitter.
+    """
+    started = time.perf_counter()
+    if path.endswith(".yags"):
+        nodes = SectionChunker(section_tokens).chunk_file(path)
+        return path, [path], nodes, time.perf_counter() - started
+    documents = SimpleDirectoryReader(input_files=[path], filename_as_id=True).load_data()
+    nodes = SentenceSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap).get_nodes_from_documents(documents)
+    return path, [document.doc_id for document in documents], nodes, time.perf_counter() - started
+
+@dataclass
+class StageStats:
+    seconds: float = 0.0
+
+    def rate(self, count):
+        return count / self.seconds if self.seconds else 0.0
+
+@dataclass
+class IngestionStats:
+    documents: int = 0
+    chunks: int = 0
+    tokens: int = 0
+    batches: int = 0
+    retries: int = 0
+    parse: StageStats = field(default_factory=StageStats)
+    embed: StageStats = field(default_factory=StageStats)
+    wall_seconds: float = 0.0
+
+    def __str__(self):
+        return (f"{self.documents} documents, {self.chunks} chunks, {self.tokens} tokens in {self.wall_seconds:.2f}s "
+                f"({self.documents / self.wall_seconds if self.wall_seconds else 0:.1f} docs/s, "
+                f"{self.chunks / self.wall_seconds if self.wall_seconds else 0:.1f} chunks/s, "
+                f"{self.tokens / self.wall_seconds if self.wall_seconds else 0:.0f} tokens/s); "
+                f"parse {self.parse.rate(self.documents):.1f} docs/s per worker, "
+                f"embed {self.embed.rate(self.chunks):.1f} chunks/s, {self.embed.rate(self.tokens):.0f} tokens/s per in-flight batch "
+                f"over {self.batches} batches, {self.retries} retries")
+
+@dataclass
+class IngestionResult:
+    nodes: List = field(default_factory=list)
+    doc_ids: Dict[str, List[str]] = field(default_factory=dict)
+    stats: IngestionStats = field(default_factory=IngestionStats)
+
+class EmbeddingPipeline:
+    """Load, chunk and embed documents with every stage kept busy.
+
+    Files are read and split in a process pool. Their chunks stream into
+    fixed-size embedding batches as each file finishes, and up to
+    `max_concurrency` batches are in flight at once. A failed batch is retried
+    with exponential backoff. The returned nodes already carry their embeddings,
+    so VectorStoreIndex stores them without calling the model again.
+    """
+    def __init__(self, embed_model=None, workers=DEFAULT_WORKERS, batch_size=64, max_concurrency=4,
+                 max_retries=3, retry_delay=0.5, chunk_size=None, chunk_overlap=None,
+                 section_tokens=DEFAULT_SECTION_TOKENS):
+        self.embed_model = embed_model or Settings.embed_model
+        self.workers = workers
+        self.batch_size = batch_size
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.chunk_size = chunk_size or Settings.chunk_size
+        self.chunk_overlap = chunk_overlap if chunk_overlap is not None else Settings.chunk_overlap
+        # Token budget of a section chunk from a .yags file
+        self.section_tokens = section_tokens
+        self.tokenizer = get_tokenizer()
+
+    async def _embed_batch(self, nodes, semaphore, stats):
+        texts = [node.get_content(metadata_mode=MetadataMode.EMBED) for node in nodes]
+        async with semaphore:
+            for attempt in range(self.max_retries + 1):
+                started = time.perf_counter()
+                try:
+                    embeddings = await self.embed_model.aget_text_embedding_batch(texts)
+                    break
+                except Exception as e:
+                    if attempt == self.max_retries:
+                        raise RuntimeError(f"Embedding batch of {len(texts)} failed after {attempt + 1} attempts: {e}") from e
+                    stats.retries += 1
+                    await asyncio.sleep(self.retry_delay * 2 ** attempt)
+            stats.embed.seconds += time.perf_counter() - started
+        for node, embedding in zip(nodes, embeddings):
+            node.embedding = embedding
+        stats.batches += 1
+
+    def _count(self, nodes, stats):
+        tokens = sum(len(self.tokenizer(node.get_content(metadata_mode=MetadataMode.EMBED))) for node in nodes)
+        stats.chunks += len(nodes)
+        stats.tokens += tokens
+
+    async def arun(self, paths: Optional[Sequence[str]] = None, documents: Optional[Sequence] = None) -> IngestionResult:
+        """Ingest files by path (parsed in worker processes) and/or already loaded documents."""
+        result = IngestionResult()
+        stats = result.stats
+        started = time.perf_counter()
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        tasks, pending = [], []
+        # The model splits its input by its own batch size; let our batches through whole, for this run only,
+        # since the model is usually the shared Settings.embed_model that queries embed with too
+        embed_batch_size = self.embed_model.embed_batch_size
+        self.embed_model.embed_batch_size = max(embed_batch_size, self.batch_size)
+
+        def add_nodes(nodes):
+            self._count(nodes, stats)
+            result.nodes.extend(nodes)
+            pending.extend(nodes)
+            while len(pending) >= self.batch_size:
+                batch = pending[:self.batch_size]
+                del pending[:self.batch_size]
+                tasks.append(asyncio.ensure_future(self._embed_batch(batch, semaphore, stats)))
+
+        try:
+            if documents:
+                parse_started = time.perf_counter()
+                splitter = SentenceSplitter(chunk_size=self.chunk_size, chunk_overlap=self.chunk_overlap)
+                nodes = splitter.get_nodes_from_documents(documents)
+                stats.parse.seconds += time.perf_counter() - parse_started
+                stats.documents += len(documents)
+                add_nodes(nodes)
+
+            if paths:
+                loop = asyncio.get_running_loop()
+                with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                    futures = [loop.run_in_executor(executor, load_and_split, path, self.chunk_size,
+                                                   self.chunk_overlap, self.section_tokens)
+                               for path in paths]
+                    for next_done in asyncio.as_completed(futures):
+                        path, doc_ids, nodes, seconds = await next_done
+                        result.doc_ids[path] = doc_ids
+                        stats.documents += len(doc_ids)
+                        stats.parse.seconds += seconds
+                        add_nodes(nodes)
+
+            if pending:
+                tasks.append(asyncio.ensure_future(self._embed_batch(list(pending), semaphore, stats)))
+            await asyncio.gather(*tasks)
+        except BaseException:
+            # A file that failed to parse or a batch out of retries: stop the other batches
+            for task in tasks:
+                task.cancel()
+            raise
+        finally:
+            self.embed_model.embed_batch_size = embed_batch_size
+        stats.wall_seconds = time.perf_counter() - started
+        return result
+
+    def run(self, paths=None, documents=None) -> IngestionResult:
+        """Blocking arun, for code outside an event loop; async callers await arun instead."""
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self.arun(paths=paths, documents=documents))
+        raise RuntimeError("EmbeddingPipeline.run() cannot be called from a running event loop; await arun() instead")
@@ -0,0 +1,57 @@
+import time
+from collections import deque
+from typing import Deque, NamedTuple, Optional
+
+import numpy as np
+
+class QueryLatency(NamedTuple):
+    first_token: float
+    total: float
+    cached: bool
+
+class QueryTimer:
+    """Times one answer: call token() for every chunk produced, then finish()."""
+    def __init__(self, tracker: "LatencyTracker"):
+        self.tracker = tracker
+        self.started = time.perf_counter()
+        self.first_token: Optional[float] = None
+
+    def token(self):
+        if self.first_token is None:
+            self.first_token = time.perf_counter() - self.started
+
+    def finish(self, cached=False) -> QueryLatency:
+        total = time.perf_counter() - self.started
+        latency = QueryLatency(self.first_token if self.first_token is not None else total, total, cached)
+        self.tracker.samples.append(latency)
+        return latency
+
+class LatencyTracker:
+    """Time to first token and total latency over the most recent answers.
+
+    Time to first token is what a player waits before text starts appearing, so
+    it is reported apart from the time the whole answer takes.
+    """
+    def __init__(self, window=500):
+        self.samples: Deque[QueryLatency] = deque(maxlen=window)
+
+    def start(self) -> QueryTimer:
+        return QueryTimer(self)
+
+    def snapshot(self):
+        if not self.samples:
+            return {"answers": 0}
+        first = np.array([sample.first_token for sample in self.samples]) * 1000
+        total = np.array([sample.total for sample in self.samples]) * 1000
+        return {"answers": len(self.samples), "cached": sum(sample.cached for sample in self.samples),
+                "first_token_p50_ms": round(float(np.percentile(first, 50)), 1),
+                "first_token_p95_ms": round(float(np.percentile(first, 95)), 1),
+                "total_p50_ms": round(float(np.percentile(total, 50)), 1),
+                "total_p95_ms": round(float(np.percentile(total, 95)), 1)}
+
+    def __str__(self):
+        stats = self.snapshot()
+        if not stats["answers"]:
+            return "No answers yet"
+        return (f"{stats['answers']} answers ({stats['cached']} cached): first token p50 {stats['first_token_p50_ms']} ms, "
+                f"p95 {stats['first_token_p95_ms']} ms; total p50 {stats['total_p50_ms']} ms, p95 {stats['total_p95_ms']} ms")
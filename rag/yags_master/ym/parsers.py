@@ -1,52 +1,68 @@
 import xml.etree.ElementTree as ET
+from dataclasses import dataclass, field
+from typing import IO, Iterator, List
+
+YAGS_NS = 'http://yagsbook.sourceforge.net/xml'
+
+def _local(tag):
+    return tag.split('}')[-1]
+
+def _inline_text(element, parts):
+    """Append the text of an element and its nested tags to parts, with <e> as *emphasis*."""
+    if element.text:
+        parts.append(element.text)
+    for child in element:
+        emphasis = _local(child.tag) == "e"
+        if emphasis:
+            parts.append("*")
+        _inline_text(child, parts)
+        if emphasis:
+            parts.append("*")
+        if child.tail:
+            parts.append(child.tail)
+    return parts
 
 class XMLToMarkdownParser:
     def __init__(self, xml_file_path):
         self.tree = ET.parse(xml_file_path)
         self.root = self.tree.getroot()
-        self.ns = {'y': 'http://yagsbook.sourceforge.net/xml'}  # Namespace for elements
+        self.ns = {'y': YAGS_NS}  # Namespace for elements
+
+    def _child_text(self, element, tag):
+        child = element.find(tag, self.ns)
+        return child.text if child is not None and child.text else ''
 
     def parse_header(self):
         header = self.root.find('y:header', self.ns)
         if header is None:
             return ''
-        
-        title = header.find('y:title', self.ns).text if header.find('y:title', self.ns) is not None else ''
-        tagline = header.find('y:tagline', self.ns).text if header.find('y:tagline', self.ns) is not None else ''
-        summary = header.find('y:summary', self.ns).text if header.find('y:summary', self.ns) is not None else ''
-        
+
+        title = self._child_text(header, 'y:title')
+        tagline = self._child_text(header, 'y:tagline')
+        summary = self._child_text(header, 'y:summary')
+
         markdown_header = f"# {title}\n\n**{tagline}**\n\n{summary.strip()}\n\n"
         return markdown_header
 
     def get_text_with_nested_tags(self, element):
         """Recursively extract text from an element, including nested tags like <e>."""
-        text = element.text or ""
-        for child in element:
-            # Wrap specific tags like <e> with asterisks or other markdown formatting as needed
-            if child.tag.endswith("e"):
-                text += f"*{self.get_text_with_nested_tags(child)}*"
-            else:
-                text += self.get_text_with_nested_tags(child)
-            text += child.tail or ""
-        return text
+        return "".join(_inline_text(element, []))
 
-    def parse_body_sections(self, parent, level=2):
-        """Parse body sections by checking for specific sect tags like sect1, sect2, sect3."""
-        sections_markdown = ''
-        
+    def _body_parts(self, parent, level, parts):
         for section in parent:
-            tag = section.tag.split('}')[-1]  # Get tag name without namespace
+            tag = _local(section.tag)  # Get tag name without namespace
             if tag.startswith("sect"):
-                title = section.find('y:title', self.ns).text if section.find('y:title', self.ns) is not None else ''
-                sections_markdown += f"{'#' * level} {title}\n\n"
+                parts.append(f"{'#' * level} {self._child_text(section, 'y:title')}\n\n")
                 for para in section.findall('y:para', self.ns):
-                    content = self.get_text_with_nested_tags(para)
-                    sections_markdown += f"{content.strip() if content else ''}\n\n"
+                    parts.append(f"{self.get_text_with_nested_tags(para).strip()}\n\n")
 
-                # Recursive call for nested sect tags within the current section
-                sections_markdown += self.parse_body_sections(section, level=level + 1)
+                # Nested sect tags within the current section
+                self._body_parts(section, level + 1, parts)
+        return parts
 
-        return sections_markdown
+    def parse_body_sections(self, parent, level=2):
+        """Parse body sections by checking for specific sect tags like sect1, sect2, sect3."""
+        return "".join(self._body_parts(parent, level, []))
 
     def to_markdown(self):
         # Start with the header
@@ -59,7 +75,118 @@ class XMLToMarkdownParser:
 
         return markdown
 
-# Example usage:
-# parser = XMLToMarkdownParser('path/to/character.yags')
-# markdown_output = parser.to_markdown()
-# print(markdown_output)
\ No newline at end of file
+@dataclass
+class MarkdownSection:
+    """The Markdown of one section, without its subsections, and the titles leading to it."""
+    heading_path: List[str]
+    level: int
+    markdown: str
+    paragraphs: List[str] = field(default_factory=list)
+
+    @property
+    def title(self):
+        return self.heading_path[-1] if self.heading_path else ''
+
+    @property
+    def metadata(self):
+        return {"heading_path": " > ".join(self.heading_path), "section_title": self.title, "section_level": self.level}
+
+class _OpenSection:
+    __slots__ = ("level", "title", "paragraphs", "flushed")
+
+    def __init__(self, level):
+        self.level = level
+        self.title = None
+        self.paragraphs = []
+        self.flushed = False
+
+class StreamingMarkdownConverter:
+    """Converts a .yags document to the Markdown XMLToMarkdownParser produces, in one streaming pass.
+
+    The document is read with iterparse, and every paragraph and section is
+    cleared and detached once it has been converted, so memory depends on
+    nesting depth rather than file size. sections() yields each section as soon
+    as its own content is complete, that is, when its first subsection starts
+    or when it ends. The header comes first as a level 1 section.
+    """
+    def __init__(self, source):
+        self.source = source
+
+    def sections(self) -> Iterator[MarkdownSection]:
+        stack: List[_OpenSection] = []
+        # (element, local tag) of every open element, to find and detach from the parent
+        open_elements = []
+        names = {}
+        in_body = False
+        header = {}
+        for event, element in ET.iterparse(self.source, events=("start", "end")):
+            tag = names.get(element.tag)
+            if tag is None:
+                tag = names[element.tag] = _local(element.tag)
+            if event == "start":
+                open_elements.append((element, tag))
+                if tag == "body":
+                    in_body = True
+                elif in_body and tag[:4] == "sect":
+                    if stack and not stack[-1].flushed:
+                        yield self._flush(stack)
+                    stack.append(_OpenSection(len(stack) + 2))
+                continue
+
+            open_elements.pop()
+            if tag == "e" or not open_elements:
+                continue
+            parent, parent_tag = open_elements[-1]
+            if not in_body:
+                if parent_tag == "header" and tag in ("title", "tagline", "summary"):
+                    header.setdefault(tag, element.text or '')
+                elif tag == "header":
+                    title = header.get("title", '')
+                    markdown = f"# {title}\n\n**{header.get('tagline', '')}**\n\n{header.get('summary', '').strip()}\n\n"
+                    yield MarkdownSection([title], 1, markdown)
+                    element.clear()
+                continue
+
+            in_section = stack and parent_tag[:4] == "sect"
+            if tag == "para" and in_section:
+                section = stack[-1]
+                text = "".join(_inline_text(element, [])).strip()
+                if section.flushed:
+                    # A paragraph after a subsection: XMLToMarkdownParser puts it with its own section's
+                    # paragraphs, ahead of the subsections, which a stream cannot do. Emit it in place.
+                    yield MarkdownSection(self._path(stack), section.level, f"{text}\n\n", [text])
+                else:
+                    section.paragraphs.append(text)
+            elif tag == "title" and in_section:
+                if stack[-1].title is None:
+                    stack[-1].title = element.text or ''
+            elif tag[:4] == "sect" and stack:
+                if not stack[-1].flushed:
+                    yield self._flush(stack)
+                stack.pop()
+            elif tag == "body":
+                in_body = False
+            else:
+                continue
+            element.clear()
+            parent.remove(element)
+
+    def _path(self, stack):
+        return [section.title or '' for section in stack]
+
+    def _flush(self, stack) -> MarkdownSection:
+        section = stack[-1]
+        section.flushed = True
+        parts = [f"{'#' * section.level} {section.title or ''}\n\n"]
+        parts.extend(f"{paragraph}\n\n" for paragraph in section.paragraphs)
+        return MarkdownSection(self._path(stack), section.level, "".join(parts), section.paragraphs)
+
+    def write_to(self, sink: IO[str]) -> int:
+        """Write the Markdown to a text file object section by section; returns the characters written."""
+        written = 0
+        for section in self.sections():
+            written += sink.write(section.markdown)
+        return written
+
+    def to_markdown(self):
+        return "".join(section.markdown for section in self.sections())
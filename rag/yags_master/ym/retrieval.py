@@ -0,0 +1,76 @@
+import asyncio
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from llama_index.core.base.base_retriever import BaseRetriever
+from llama_index.core.schema import NodeWithScore, QueryBundle
+
+from .bm25 import BM25Index
+
+# Reciprocal rank fusion constant; 60 is the usual choice and damps the head of each list
+RRF_K = 60
+
+@dataclass
+class RetrievalConfig:
+    """How many candidates each stage passes on; smaller is faster, larger finds more."""
+    vector_top_k: int = 10
+    keyword_top_k: int = 10
+    fusion_top_k: int = 8
+    rerank_model: Optional[str] = None
+    rerank_top_k: int = 4
+
+class HybridRetriever(BaseRetriever):
+    """Dense and BM25 retrieval fused by reciprocal rank.
+
+    Each list contributes 1 / (RRF_K + rank) per node, so a node found by both
+    rises above one found by either alone, and scores on different scales never
+    need to be compared. Either side can be switched off with a top_k of 0.
+    """
+    def __init__(self, index, keyword_index: Optional[BM25Index], config: Optional[RetrievalConfig] = None):
+        super().__init__()
+        self.index = index
+        self.keyword_index = keyword_index
+        self.config = config = config or RetrievalConfig()
+        self.vector_retriever = index.as_retriever(similarity_top_k=config.vector_top_k) if config.vector_top_k else None
+
+    def _fetch(self, node_ids: List[str]) -> Dict[str, NodeWithScore]:
+        vector_store = self.index.vector_store
+        nodes = (vector_store.get_nodes(node_ids=node_ids) if vector_store.stores_text
+                 else self.index.docstore.get_nodes(node_ids))
+        return {node.node_id: NodeWithScore(node=node) for node in nodes}
+
+    def _retrieve(self, query_bundle: QueryBundle) -> List[NodeWithScore]:
+        ranked_lists = []
+        found: Dict[str, NodeWithScore] = {}
+        if self.vector_retriever is not None:
+            dense = self.vector_retriever.retrieve(query_bundle)
+            found.update((result.node.node_id, result) for result in dense)
+            ranked_lists.append([result.node.node_id for result in dense])
+        if self.keyword_index is not None and self.config.keyword_top_k:
+            keyword = self.keyword_index.search(query_bundle.query_str, self.config.keyword_top_k)
+            missing = [node_id for node_id, _ in keyword if node_id not in found]
+            if missing:
+                found.update(self._fetch(missing))
+            ranked_lists.append([node_id for node_id, _ in keyword if node_id in found])
+
+        fused: Dict[str, float] = {}
+        for ranked in ranked_lists:
+            for rank, node_id in enumerate(ranked):
+                fused[node_id] = fused.get(node_id, 0.0) + 1.0 / (RRF_K + rank + 1)
+        best = sorted(fused, key=fused.get, reverse=True)[:self.config.fusion_top_k]
+        return [NodeWithScore(node=found[node_id].node, score=fused[node_id]) for node_id in best]
+
+    async def _aretrieve(self, query_bundle: QueryBundle) -> List[NodeWithScore]:
+        # The query embedding is the network call, so it is awaited; the vector scan and BM25
+        # search are local CPU work and go to a thread, keeping the event loop free either way
+        if self.vector_retriever is not None and query_bundle.embedding is None and query_bundle.embedding_strs:
+            embed_model = self.vector_retriever._embed_model
+            query_bundle.embedding = await embed_model.aget_agg_embedding_from_queries(query_bundle.embedding_strs)
+        return await asyncio.to_thread(self._retrieve, query_bundle)
+
+def create_reranker(config: RetrievalConfig):
+    """A local cross-encoder postprocessor, or None when reranking is off. Needs sentence-transformers."""
+    if not config.rerank_model:
+        return None
+    from llama_index.core.postprocessor import SentenceTransformerRerank
+    return SentenceTransformerRerank(model=config.rerank_model, top_n=config.rerank_top_k)
@@ -0,0 +1,281 @@
+import os
+import json
+import shutil
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+from llama_index.core.bridge.pydantic import PrivateAttr
+from llama_index.core.schema import BaseNode
+from llama_index.core.vector_stores.types import BasePydanticVectorStore, VectorStoreQuery, VectorStoreQueryResult
+from llama_index.core.vector_stores.utils import build_metadata_filter_fn, metadata_dict_to_node
+
+STORE_DIR = "vectors"
+HEADER_NAME = "header.json"
+VECTORS_NAME = "vectors.bin"
+SCALES_NAME = "scales.bin"
+RECORDS_NAME = "nodes.bin"
+OFFSETS_NAME = "nodes.idx"
+STORE_VERSION = 1
+DTYPES = ("float32", "int8")
+# Rows scored per step, so a query never materializes the whole store as float32
+SEARCH_BLOCK = 65536
+
+def store_path(persist_dir):
+    return os.path.join(persist_dir, STORE_DIR)
+
+def has_mmap_store(persist_dir):
+    return os.path.exists(os.path.join(store_path(persist_dir), HEADER_NAME))
+
+def _normalize(vectors):
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+def _quantize(vectors):
+    """Symmetric per-row int8: each row keeps its own scale."""
+    scales = np.abs(vectors).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    return np.round(vectors / scales[:, None]).astype(np.int8), scales.astype(np.float32)
+
+class MmapVectorStore(BasePydanticVectorStore):
+    """Vector store that keeps embeddings in a memory-mapped array instead of JSON.
+
+    On disk it is a directory with a small JSON header (dimension, dtype and
+    node/document ids), the unit-normalized embeddings as one raw float32 or int8
+    array, and the nodes as JSON records addressed by an offset table. Loading
+    reads the header and maps the rest, and a query scores the mapped array
+    directly. Only the top-k records are ever parsed.
+
+    Added nodes are kept in memory and deletions are kept as a mask until
+    persist() writes a compacted copy.
+    """
+    stores_text: bool = True
+    is_embedding_query: bool = True
+    dtype: str = "float32"
+
+    _ids: List[str] = PrivateAttr(default_factory=list)
+    _ref_doc_ids: List[str] = PrivateAttr(default_factory=list)
+    _vectors: Optional[np.ndarray] = PrivateAttr(default=None)
+    _scales: Optional[np.ndarray] = PrivateAttr(default=None)
+    _records: Optional[np.memmap] = PrivateAttr(default=None)
+    _offsets: Optional[np.ndarray] = PrivateAttr(default=None)
+    _deleted: Optional[np.ndarray] = PrivateAttr(default=None)
+    _new_nodes: List[BaseNode] = PrivateAttr(default_factory=list)
+    _new_vectors: List[np.ndarray] = PrivateAttr(default_factory=list)
+
+    def __init__(self, dtype: str = "float32", **kwargs: Any) -> None:
+        if dtype not in DTYPES:
+            raise ValueError(f"dtype must be one of {DTYPES}, not {dtype!r}")
+        super().__init__(dtype=dtype, **kwargs)
+        self._deleted = np.zeros(0, dtype=bool)
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "MmapVectorStore"
+
+    @classmethod
+    def from_persist_dir(cls, persist_dir: str, dtype: Optional[str] = None) -> "MmapVectorStore":
+        """Map a persisted store; reads only the header, the offset table and the scales.
+
+        A `dtype` other than the persisted one takes effect at the next persist().
+        """
+        directory = store_path(persist_dir)
+        with open(os.path.join(directory, HEADER_NAME)) as f:
+            header = json.load(f)
+        if header.get("version") != STORE_VERSION:
+            raise ValueError(f"Vector store {directory} has version {header.get('version')}, expected {STORE_VERSION}")
+        store = cls(dtype=dtype or header["dtype"])
+        store._map(directory, header)
+        return store
+
+    def _map(self, directory, header):
+        count, dim = header["count"], header["dim"]
+        self._ids = header["ids"]
+        self._ref_doc_ids = header["ref_doc_ids"]
+        self._deleted = np.zeros(count, dtype=bool)
+        self._new_nodes, self._new_vectors = [], []
+        if count == 0:
+            self._vectors = self._scales = self._records = self._offsets = None
+            return
+        self._vectors = np.memmap(os.path.join(directory, VECTORS_NAME), dtype=header["dtype"], mode="r", shape=(count, dim))
+        self._scales = np.fromfile(os.path.join(directory, SCALES_NAME), dtype=np.float32) if header["dtype"] == "int8" else None
+        self._offsets = np.fromfile(os.path.join(directory, OFFSETS_NAME), dtype=np.uint64)
+        self._records = np.memmap(os.path.join(directory, RECORDS_NAME), dtype=np.uint8, mode="r")
+
+    @property
+    def client(self) -> Any:
+        return None
+
+    @property
+    def mapped_count(self) -> int:
+        return 0 if self._vectors is None else len(self._vectors)
+
+    @property
+    def count(self) -> int:
+        # Not __len__: StorageContext tests the store for truth, and an empty one must not read as missing
+        return self.mapped_count - int(self._deleted.sum()) + len(self._new_nodes)
+
+    def _record(self, row: int) -> Dict[str, Any]:
+        start, end = int(self._offsets[row]), int(self._offsets[row + 1])
+        return json.loads(self._records[start:end].tobytes())
+
+    def _node(self, row: int) -> BaseNode:
+        if row < self.mapped_count:
+            return metadata_dict_to_node(self._record(row))
+        return self._new_nodes[row - self.mapped_count]
+
+    def add(self, nodes: Sequence[BaseNode], **add_kwargs: Any) -> List[str]:
+        if not nodes:
+            return []
+        vectors = _normalize(np.asarray([node.get_embedding() for node in nodes], dtype=np.float32))
+        for node, vector in zip(nodes, vectors):
+            node = node.model_copy()
+            node.embedding = None
+            self._new_nodes.append(node)
+            self._new_vectors.append(vector)
+            self._ids.append(node.node_id)
+            self._ref_doc_ids.append(node.ref_doc_id or "None")
+        return [node.node_id for node in nodes]
+
+    def _drop_rows(self, rows):
+        keep_new = [True] * len(self._new_nodes)
+        for row in rows:
+            if row < self.mapped_count:
+                self._deleted[row] = True
+            else:
+                keep_new[row - self.mapped_count] = False
+        if not all(keep_new):
+            kept = [row for row in range(self.mapped_count)] + \
+                   [self.mapped_count + i for i, keep in enumerate(keep_new) if keep]
+            self._ids = [self._ids[row] for row in kept]
+            self._ref_doc_ids = [self._ref_doc_ids[row] for row in kept]
+            self._new_nodes = [node for node, keep in zip(self._new_nodes, keep_new) if keep]
+            self._new_vectors = [vector for vector, keep in zip(self._new_vectors, keep_new) if keep]
+
+    def delete(self, ref_doc_id: str, **delete_kwargs: Any) -> None:
+        self._drop_rows([row for row, doc_id in enumerate(self._ref_doc_ids) if doc_id == ref_doc_id])
+
+    def delete_nodes(self, node_ids: Optional[List[str]] = None, filters=None, **delete_kwargs: Any) -> None:
+        if filters is not None:
+            raise NotImplementedError("MmapVectorStore deletes by node id only")
+        wanted = set(node_ids or [])
+        self._drop_rows([row for row, node_id in enumerate(self._ids) if node_id in wanted])
+
+    def get_nodes(self, node_ids: Optional[List[str]] = None, filters=None) -> List[BaseNode]:
+        wanted = None if node_ids is None else set(node_ids)
+        rows = [row for row, node_id in enumerate(self._ids)
+                if (wanted is None or node_id in wanted) and not self._is_deleted(row)]
+        nodes = [self._node(row) for row in rows]
+        if filters is not None:
+            by_id = {node.node_id: node for node in nodes}
+            matches = build_metadata_filter_fn(lambda node_id: by_id[node_id].metadata, filters)
+            nodes = [node for node in nodes if matches(node.node_id)]
+        return nodes
+
+    def _is_deleted(self, row):
+        return row < self.mapped_count and self._deleted[row]
+
+    def _scores(self, query_vector: np.ndarray) -> np.ndarray:
+        parts = []
+        if self._vectors is not None:
+            for start in range(0, self.mapped_count, SEARCH_BLOCK):
+                block = self._vectors[start:start + SEARCH_BLOCK]
+                if self._scales is not None:
+                    parts.append((block @ query_vector) * self._scales[start:start + SEARCH_BLOCK])
+                else:
+                    parts.append(block @ query_vector)
+        if self._new_vectors:
+            parts.append(np.asarray(self._new_vectors) @ query_vector)
+        scores = np.concatenate(parts) if parts else np.zeros(0, dtype=np.float32)
+        scores[:self.mapped_count][self._deleted] = -np.inf
+        return scores
+
+    def query(self, query: VectorStoreQuery, **kwargs: Any) -> VectorStoreQueryResult:
+        """Exact cosine search over the mapped array; filters are applied after scoring."""
+        if query.query_embedding is None:
+            raise ValueError("MmapVectorStore needs a query embedding")
+        query_vector = _normalize(np.asarray([query.query_embedding], dtype=np.float32))[0]
+        scores = self._scores(query_vector)
+        if query.node_ids is not None or query.doc_ids is not None:
+            node_ids = set(query.node_ids or self._ids)
+            doc_ids = set(query.doc_ids or self._ref_doc_ids)
+            for row, (node_id, doc_id) in enumerate(zip(self._ids, self._ref_doc_ids)):
+                if node_id not in node_ids or doc_id not in doc_ids:
+                    scores[row] = -np.inf
+        top_k = query.similarity_top_k
+        candidates = np.argsort(-scores)
+        nodes, similarities, ids = [], [], []
+        loaded = {}
+        matches = build_metadata_filter_fn(lambda node_id: loaded[node_id].metadata, query.filters)
+        for row in candidates:
+            if len(nodes) >= top_k or scores[row] == -np.inf:
+                break
+            node = self._node(int(row))
+            loaded[node.node_id] = node
+            if not matches(node.node_id):
+                continue
+            nodes.append(node)
+            similarities.append(float(scores[row]))
+            ids.append(node.node_id)
+        return VectorStoreQueryResult(nodes=nodes, similarities=similarities, ids=ids)
+
+    def persist(self, persist_path: str, fs=None) -> None:
+        """Write a compacted copy next to the storage context's files and remap it.
+
+        StorageContext passes the path of the JSON file a SimpleVectorStore would
+        write; the store goes into a directory beside it instead.
+        """
+        persist_dir = os.path.dirname(persist_path) or "."
+        directory = store_path(persist_dir)
+        tmp_directory = f"{directory}.tmp"
+        shutil.rmtree(tmp_directory, ignore_errors=True)
+        os.makedirs(tmp_directory)
+
+        keep = [row for row in range(self.mapped_count) if not self._deleted[row]]
+        rows = keep + list(range(self.mapped_count, self.mapped_count + len(self._new_nodes)))
+        dim = (self._vectors.shape[1] if self._vectors is not None
+               else len(self._new_vectors[0]) if self._new_vectors else 0)
+        vectors = np.memmap(os.path.join(tmp_directory, VECTORS_NAME), dtype=np.float32, mode="w+",
+                            shape=(len(rows), dim)) if rows and self.dtype == "float32" else None
+        quantized, scales = [], []
+        offsets = [0]
+        with open(os.path.join(tmp_directory, RECORDS_NAME), "wb") as records:
+            for i, row in enumerate(rows):
+                if row < self.mapped_count:
+                    record = self._records[int(self._offsets[row]):int(self._offsets[row + 1])].tobytes()
+                    vector = self._vectors[row]
+                    if self._scales is not None:
+                        vector = vector.astype(np.float32) * self._scales[row]
+                else:
+                    node = self._new_nodes[row - self.mapped_count]
+                    record = json.dumps({"_node_type": node.class_name(),
+                                         "_node_content": node.model_dump_json()}).encode()
+                    vector = self._new_vectors[row - self.mapped_count]
+                if vectors is not None:
+                    vectors[i] = vector
+                else:
+                    quantized.append(vector)
+                records.write(record)
+                offsets.append(offsets[-1] + len(record))
+        if vectors is not None:
+            vectors.flush()
+            del vectors
+        elif rows:
+            values, row_scales = _quantize(np.asarray(quantized, dtype=np.float32))
+            values.tofile(os.path.join(tmp_directory, VECTORS_NAME))
+            row_scales.tofile(os.path.join(tmp_directory, SCALES_NAME))
+        np.asarray(offsets, dtype=np.uint64).tofile(os.path.join(tmp_directory, OFFSETS_NAME))
+        header = {"version": STORE_VERSION, "dtype": self.dtype, "dim": dim, "count": len(rows),
+                  "ids": [self._ids[row] for row in rows], "ref_doc_ids": [self._ref_doc_ids[row] for row in rows]}
+        with open(os.path.join(tmp_directory, HEADER_NAME), "w") as f:
+            json.dump(header, f)
+
+        # Unmap before swapping directories, then map the new files
+        self._vectors = self._records = None
+        old_directory = f"{directory}.old"
+        shutil.rmtree(old_directory, ignore_errors=True)
+        if os.path.exists(directory):
+            os.replace(directory, old_directory)
+        os.replace(tmp_directory, directory)
+        shutil.rmtree(old_directory, ignore_errors=True)
+        self._map(directory, header)